@@ -151,6 +151,7 @@ if not exist "%OUTPUT_DIR%" mkdir "%OUTPUT_DIR%"
 
 echo Copying EXE to: %OUTPUT_DIR%
 copy "%BUILD_DIR%\dist\SC_GlobalIni_Extractor.exe" "%OUTPUT_DIR%\" >nul
+copy "%BUILD_DIR%\dist\SC_GlobalIni_Extractor_CLI.exe" "%OUTPUT_DIR%\" >nul
 
 echo.
 echo Cleaning up build files...
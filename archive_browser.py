@@ -0,0 +1,339 @@
+"""
+Archive Browser
+Virtual tree of every Data.p4k entry - folders load on demand and only the visible rows exist as widgets
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from tkinter import filedialog, messagebox, ttk
+
+import customtkinter as ctk
+
+import extractor_core
+import p4k_reader
+import p4k_tree
+
+
+ROW_HEIGHT = 22
+SELECT_LIMIT = 10000
+FILTER_DELAY_MS = 250
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class ArchiveBrowser(ctk.CTkToplevel):
+    """Browse one installation's Data.p4k and extract any files or folders from it
+
+    The Treeview only ever holds the rows that fit in the window; scrolling
+    re-labels those rows from the lazily paged p4k_tree model, so a folder with
+    a hundred thousand entries costs no more than one with ten.
+    """
+
+    def __init__(self, master, inst, index):
+        super().__init__(master)
+        self.inst = inst
+        self.index = index
+        self.title(f"Browse Data.p4k - {inst['display']}")
+        self.geometry("900x600")
+
+        self.archive_id = None
+        self.tree_model = None
+        self.model = None
+        self.top = 0
+        self.selected = {}
+        self.anchor = None
+        self.extracting = False
+        self.cancel_event = None
+        self._filter_pending = None
+        self._filter_generation = 0
+
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.pack(fill="x", padx=15, pady=(15, 5))
+        self.filter_entry = ctk.CTkEntry(
+            controls, height=35, placeholder_text="Filter by name, e.g. global.ini or *.dds"
+        )
+        self.filter_entry.pack(fill="x")
+        self.filter_entry.bind("<KeyRelease>", lambda event: self._schedule_filter())
+
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True, padx=15, pady=5)
+        style = ttk.Style(self)
+        style.configure(
+            "P4k.Treeview", rowheight=ROW_HEIGHT, background="#2b2b2b", fieldbackground="#2b2b2b",
+            foreground="#dce4ee", borderwidth=0
+        )
+        style.configure("P4k.Treeview.Heading", background="#333333", foreground="#dce4ee")
+        self.tree = ttk.Treeview(body, columns=("size",), style="P4k.Treeview", selectmode="none", height=1)
+        self.tree.heading("#0", text="Name", anchor="w")
+        self.tree.heading("size", text="Size", anchor="e")
+        self.tree.column("size", width=110, stretch=False, anchor="e")
+        self.tree.tag_configure("selected", background="#1f538d")
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", lambda event: self._render())
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", self._on_wheel)
+        self.tree.bind("<Button-5>", self._on_wheel)
+        self.tree.bind("<Button-1>", lambda event: self._on_click(event))
+        self.tree.bind("<Control-Button-1>", lambda event: self._on_click(event, "toggle"))
+        self.tree.bind("<Shift-Button-1>", lambda event: self._on_click(event, "range"))
+        self.tree.bind("<Double-Button-1>", self._on_double_click)
+
+        bottom = ctk.CTkFrame(self, fg_color="transparent")
+        bottom.pack(fill="x", padx=15, pady=(5, 15))
+        self.status_label = ctk.CTkLabel(bottom, text="Reading archive directory...", text_color="gray", anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True)
+        self.cancel_button = ctk.CTkButton(
+            bottom, text="Cancel", width=100, height=35, fg_color="gray30", hover_color="gray40",
+            command=self.cancel_extraction
+        )
+        self.extract_button = ctk.CTkButton(
+            bottom, text="Extract Selected...", width=160, height=35, state="disabled", command=self.extract_selected
+        )
+        self.extract_button.pack(side="right")
+        self.progress_bar = ctk.CTkProgressBar(bottom, width=160)
+        self.progress_bar.set(0)
+
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _post(self, callback, key=None):
+        """Run callback on the UI thread, unless the window has been closed meanwhile
+
+        Goes through the app's frame-rate event queue; a keyed update replaces a pending one with the same key.
+        """
+        def run():
+            if self.winfo_exists():
+                callback()
+        self.master.ui_events.post(run, key=None if key is None else (id(self), key))
+
+    # --- Loading ---
+
+    def _load(self):
+        try:
+            with p4k_reader.P4kArchive(self.inst["path"]) as archive:
+                if not self.index.is_indexed(archive.path):
+                    self._post(lambda: self._set_status("Indexing archive (once per patch)..."), key="status")
+                archive_id = self.index.ensure_folders(archive)
+            tree = p4k_tree.ArchiveTree(self.index, archive_id)
+            error = None
+        except (OSError, p4k_reader.P4kError, sqlite3.Error) as e:
+            archive_id, tree, error = None, None, str(e)
+        self._post(lambda: self._loaded(archive_id, tree, error))
+
+    def _loaded(self, archive_id, tree, error):
+        if error:
+            self._set_status(f"Could not read Data.p4k: {error}", "#FF5555")
+            return
+        self.archive_id = archive_id
+        self.tree_model = self.model = tree
+        self.extract_button.configure(state="normal")
+        self._render()
+        self._update_status()
+
+    def _set_status(self, message, color="gray"):
+        self.status_label.configure(text=message, text_color=color)
+
+    def _update_status(self):
+        if self.model is None:
+            return
+        if isinstance(self.model, p4k_tree.FilteredList):
+            shown = f"{len(self.model):,} matching files" + (" (first matches only)" if self.model.truncated else "")
+        else:
+            shown = f"{len(self.model):,} rows"
+        self._set_status(f"{shown}  -  {len(self.selected):,} selected")
+
+    # --- Rendering (recycled rows) ---
+
+    def _page_rows(self):
+        return max(1, self.tree.winfo_height() // ROW_HEIGHT - 1)
+
+    def _render(self):
+        model = self.model
+        total = len(model) if model is not None else 0
+        count = self._page_rows()
+        self.top = max(0, min(self.top, total - count))
+        rows = model.rows(self.top, self.top + count) if model is not None else []
+
+        items = self.tree.get_children()
+        for i in range(len(items), len(rows)):
+            self.tree.insert("", "end", iid=str(i))
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for i, row in enumerate(rows):
+            if row.is_dir:
+                label = "    " * row.depth + ("▾ " if row.expanded else "▸ ") + row.name
+                size = f"{row.children:,} items"
+            else:
+                label = "    " * row.depth + "   " + row.name
+                size = _format_size(row.size)
+            self.tree.item(
+                str(i), text=label, values=(size,), tags=("selected",) if row.path in self.selected else ()
+            )
+        if total:
+            self.scrollbar.set(self.top / total, (self.top + len(rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if self.model is None:
+            return
+        if action == "moveto":
+            self.top = int(float(amount) * len(self.model))
+        else:
+            self.top += int(amount) * (self._page_rows() if unit == "pages" else 1)
+        self._render()
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.top -= 3
+        else:
+            self.top += 3
+        self._render()
+        return "break"
+
+    # --- Selection and expansion ---
+
+    def _row_at(self, event):
+        iid = self.tree.identify_row(event.y)
+        return self.top + int(iid) if iid and self.model is not None else None
+
+    def _on_click(self, event, mode=None):
+        number = self._row_at(event)
+        if number is None:
+            return "break"
+        row = self.model.row(number)
+        if mode == "toggle":
+            if self.selected.pop(row.path, None) is None:
+                self.selected[row.path] = row.is_dir
+            self.anchor = number
+        elif mode == "range" and self.anchor is not None:
+            start, stop = sorted((self.anchor, number))
+            for other in self.model.rows(start, min(stop + 1, start + SELECT_LIMIT)):
+                self.selected[other.path] = other.is_dir
+        else:
+            self.selected = {row.path: row.is_dir}
+            self.anchor = number
+        self._render()
+        self._update_status()
+        return "break"
+
+    def _on_double_click(self, event):
+        number = self._row_at(event)
+        if number is not None and self.model.toggle(number):
+            # Row numbers below the folder moved, so a range anchor would point elsewhere
+            self.anchor = None
+            self._render()
+            self._update_status()
+        return "break"
+
+    # --- Filtering ---
+
+    def _schedule_filter(self):
+        if self._filter_pending is not None:
+            self.after_cancel(self._filter_pending)
+        self._filter_pending = self.after(FILTER_DELAY_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_pending = None
+        if self.tree_model is None:
+            return
+        self._filter_generation += 1
+        generation = self._filter_generation
+        text = self.filter_entry.get().strip()
+        if not text:
+            self._show_model(self.tree_model)
+            return
+
+        self._set_status("Filtering...")
+
+        def run():
+            try:
+                result, error = p4k_tree.FilteredList(self.index, self.archive_id, text), None
+            except sqlite3.Error as e:
+                result, error = None, str(e)
+            self._post(lambda: self._filtered(generation, result, error))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _filtered(self, generation, result, error):
+        if generation != self._filter_generation:
+            # A newer filter was typed while this one ran
+            return
+        if error:
+            self._set_status(f"Filter failed: {error}", "#FF5555")
+            return
+        self._show_model(result)
+
+    def _show_model(self, model):
+        self.model = model
+        self.top = 0
+        self.anchor = None
+        self._render()
+        self._update_status()
+
+    # --- Extraction ---
+
+    def extract_selected(self):
+        if self.extracting:
+            return
+        if not self.selected:
+            messagebox.showinfo("Extract", "Select files or folders first (Ctrl/Shift+click for several).", parent=self)
+            return
+        dest = filedialog.askdirectory(title="Extract the selection to", parent=self)
+        if not dest:
+            return
+
+        self.extracting = True
+        self.cancel_event = threading.Event()
+        self.extract_button.configure(state="disabled", text="Extracting...")
+        self.progress_bar.set(0)
+        self.progress_bar.pack(side="right", padx=10)
+        self.cancel_button.configure(state="normal", text="Cancel")
+        self.cancel_button.pack(side="right", padx=(0, 10))
+        threading.Thread(
+            target=self._extract_thread, args=(sorted(self.selected), Path(dest), self.cancel_event), daemon=True
+        ).start()
+
+    def cancel_extraction(self):
+        if self.extracting and self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.configure(state="disabled", text="Cancelling...")
+
+    def _extract_thread(self, names, dest, cancel):
+        def progress(fraction=None, message=None):
+            if fraction is not None:
+                self._post(lambda: self.progress_bar.set(fraction), key="progress")
+            if message is not None:
+                self._post(lambda: self._set_status(message), key="status")
+
+        try:
+            saved = extractor_core.extract_entries(self.inst["path"], names, dest, self.index, progress, cancel)
+            self._post(lambda: self._extract_complete(f"{len(saved)} file(s) saved to:\n{dest}"))
+        except extractor_core.ExtractionCancelled:
+            self._post(lambda: self._extract_complete(None))
+        except Exception as e:
+            # e is unbound once the except block ends, so capture the message now
+            error = str(e)
+            self._post(lambda: self._extract_complete(None, error))
+
+    def _extract_complete(self, message, error=None):
+        self.extracting = False
+        self.cancel_event = None
+        self.extract_button.configure(state="normal", text="Extract Selected...")
+        self.cancel_button.pack_forget()
+        self.progress_bar.pack_forget()
+        self._update_status()
+        if error:
+            messagebox.showerror("Error", f"Extraction failed:\n{error}", parent=self)
+        elif message:
+            messagebox.showinfo("Success", message, parent=self)
+        else:
+            self._set_status("Extraction cancelled")
@@ -0,0 +1,174 @@
+"""
+Synthetic P4K Fixtures
+Writes ZIP64 / Data.p4k-style archives of any size without a game install
+"""
+
+import os
+import random
+import struct
+import tempfile
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd entries are skipped without it
+    zstandard = None
+
+
+METHOD_STORED = 0
+METHOD_DEFLATE = 8
+METHOD_ZSTD = 100
+
+LANGUAGES = [
+    "english", "german", "french", "spanish", "italian",
+    "portuguese", "polish", "japanese", "korean", "chinese"
+]
+
+_LOCAL = struct.Struct("<4sHHHHHIIIHH")
+_CENTRAL = struct.Struct("<4sHHHHHHIIIHHHHHII")
+_ZIP64_EOCD = struct.Struct("<4sQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<4sIQI")
+_EOCD = struct.Struct("<4sHHHHIIH")
+_MAX32 = 0xFFFFFFFF
+_BLOCK = 1024 * 1024
+
+
+class P4kWriter:
+    """Streams entries into a Data.p4k-style archive (PK\\x03\\x14 local headers, ZIP64 directory)
+
+    Central directory records are spooled to a temp file so million-entry
+    archives don't have to be held in memory.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self._central = tempfile.TemporaryFile()
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, name, data, method=METHOD_STORED):
+        """Add an entry from bytes, compressing it with method"""
+        if method == METHOD_DEFLATE:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            payload = compressor.compress(data) + compressor.flush()
+        elif method == METHOD_ZSTD:
+            payload = zstandard.ZstdCompressor(level=3).compress(data)
+        else:
+            payload = data
+        self._write_entry(name, method, zlib.crc32(data), len(payload), len(data), [payload])
+
+    def add_stored_stream(self, name, size, block):
+        """Add a large stored entry made of a repeated block, without building it in memory"""
+        def chunks():
+            remaining = size
+            while remaining:
+                piece = block[:remaining]
+                remaining -= len(piece)
+                yield piece
+
+        crc = 0
+        for piece in chunks():
+            crc = zlib.crc32(piece, crc)
+        self._write_entry(name, METHOD_STORED, crc, size, size, chunks())
+
+    def _write_entry(self, name, method, crc, csize, usize, payload_chunks):
+        raw_name = name.encode("utf-8")
+        offset = self.file.tell()
+
+        local_extra = b""
+        local_sizes = (csize, usize)
+        if csize >= _MAX32 or usize >= _MAX32:
+            local_extra = struct.pack("<HHQQ", 1, 16, usize, csize)
+            local_sizes = (_MAX32, _MAX32)
+        self.file.write(_LOCAL.pack(
+            b"PK\x03\x14", 45, 0, method, 0, 0, crc, local_sizes[0], local_sizes[1],
+            len(raw_name), len(local_extra)
+        ))
+        self.file.write(raw_name)
+        self.file.write(local_extra)
+        for chunk in payload_chunks:
+            self.file.write(chunk)
+
+        # ZIP64 extra holds only the fields that overflowed, in usize, csize, offset order
+        overflow = [value for value in (usize, csize, offset) if value >= _MAX32]
+        extra = struct.pack(f"<HH{len(overflow)}Q", 1, 8 * len(overflow), *overflow) if overflow else b""
+        self._central.write(_CENTRAL.pack(
+            b"PK\x01\x02", 45, 45, 0x800, method, 0, 0, crc,
+            min(csize, _MAX32), min(usize, _MAX32), len(raw_name), len(extra), 0, 0, 0, 0,
+            min(offset, _MAX32)
+        ))
+        self._central.write(raw_name)
+        self._central.write(extra)
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        cd_offset = self.file.tell()
+        self._central.seek(0)
+        while True:
+            chunk = self._central.read(_BLOCK)
+            if not chunk:
+                break
+            self.file.write(chunk)
+        cd_size = self.file.tell() - cd_offset
+        self._central.close()
+
+        zip64_offset = self.file.tell()
+        self.file.write(_ZIP64_EOCD.pack(
+            b"PK\x06\x06", _ZIP64_EOCD.size - 12, 45, 45, 0, 0, self.count, self.count, cd_size, cd_offset
+        ))
+        self.file.write(_ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, zip64_offset, 1))
+        self.file.write(_EOCD.pack(b"PK\x05\x06", 0, 0, 0xFFFF, 0xFFFF, _MAX32, _MAX32, 0))
+        self.file.close()
+
+
+def global_ini_text(keys, language="english", seed=0):
+    """A global.ini-like file: UTF-8 BOM, then key=value lines"""
+    rng = random.Random(f"{seed}-{language}")
+    words = ["Ship", "Cargo", "Quantum", "Drive", "Mission", "Contract", "Armor", "Shield", "Hangar", "Station"]
+    lines = [
+        f"{prefix}_{i:06d}={' '.join(rng.choice(words) for _ in range(rng.randint(2, 12)))}"
+        for i, prefix in ((i, rng.choice(("item_Name", "item_Desc", "mission", "ui"))) for i in range(keys))
+    ]
+    return ("﻿" + "\n".join(lines) + "\n").encode("utf-8")
+
+
+def build_fixture(path, size_mb=256, entries=20000, languages=3, ini_keys=80000, seed=0):
+    """Write a synthetic Data.p4k of roughly size_mb MB
+
+    Small XML-ish entries cycle through stored, deflate and zstd. The localization
+    files are buried in the middle of the central directory, and stored bulk
+    entries pad the archive to the requested size (crossing 4 GB gives real ZIP64 offsets).
+    """
+    methods = [METHOD_STORED, METHOD_DEFLATE] + ([METHOD_ZSTD] if zstandard is not None else [])
+    rng = random.Random(seed)
+    half = entries // 2
+
+    def filler(i):
+        folder = rng.choice(("Objects", "Scripts", "Libs\\Foundry", "Entities\\Spaceships"))
+        body = f"<Entity id=\"{i}\" class=\"{rng.getrandbits(32):08x}\">" + "<Param v=\"1\"/>" * rng.randint(4, 64)
+        return f"Data\\{folder}\\record_{i:07d}.xml", body.encode("ascii"), methods[i % len(methods)]
+
+    with P4kWriter(path) as writer:
+        for i in range(half):
+            writer.add(*filler(i))
+        for n, language in enumerate(LANGUAGES[:languages]):
+            data = global_ini_text(ini_keys, language, seed)
+            writer.add(f"Data\\Localization\\{language}\\global.ini", data, methods[(n + 1) % len(methods)])
+        for i in range(half, entries):
+            writer.add(*filler(i))
+
+        target = size_mb * 1024 * 1024
+        block = os.urandom(_BLOCK)
+        bulk = 0
+        while writer.file.tell() < target:
+            size = min(256 * 1024 * 1024, target - writer.file.tell())
+            writer.add_stored_stream(f"Data\\Textures\\bulk_{bulk:04d}.dds", size, block)
+            bulk += 1
+    return path
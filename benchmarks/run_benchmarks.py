@@ -0,0 +1,321 @@
+"""
+Extraction Benchmarks
+Times discovery, indexing, extraction and cache hits against synthetic Data.p4k
+fixtures, and fails when a stage regresses against the stored baseline
+
+    python benchmarks/run_benchmarks.py                      # 256 MB fixture
+    python benchmarks/run_benchmarks.py --size-mb 8192       # ZIP64 offsets past 4 GB
+    python benchmarks/run_benchmarks.py --save-baseline      # record this machine's numbers
+    python benchmarks/run_benchmarks.py --stages gui_first_frame --gui-exe dist/SC_GlobalIni_Extractor.exe
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import diagnostics
+import extractor_core
+import p4k_index
+import p4k_reader
+import p4k_tree
+import version_cache
+from p4k_fixture import build_fixture
+
+
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+VERSION = "4.4.0"
+
+STAGES = [
+    "discovery", "index_build", "browse_tree", "extract_single", "extract_languages", "cache_restore",
+    "incremental_check"
+]
+# Need a display and customtkinter, so they only run when asked for with --stages
+GUI_STAGES = ["gui_first_frame"]
+# Absolute limits in seconds, checked with or without a baseline
+TARGETS = {"gui_first_frame": 1.0}
+
+GUI_EXE = None
+
+
+def fixture_params(args):
+    return {
+        "size_mb": args.size_mb,
+        "entries": args.entries,
+        "languages": args.languages,
+        "ini_keys": args.ini_keys
+    }
+
+
+def prepare(args):
+    """Build (or reuse) the fixture plus a fake StarCitizen folder pointing at it"""
+    work = Path(args.workdir)
+    params = fixture_params(args)
+    name = "fixture-{size_mb}mb-{entries}e-{languages}l-{ini_keys}k.p4k".format(**params)
+    archive = work / name
+    if not archive.exists():
+        work.mkdir(parents=True, exist_ok=True)
+        print(f"Generating {archive.name}...", flush=True)
+        started = time.perf_counter()
+        build_fixture(archive.with_suffix(".tmp"), **params)
+        archive.with_suffix(".tmp").replace(archive)
+        print(f"  done in {time.perf_counter() - started:.1f}s", flush=True)
+
+    root = work / "StarCitizen"
+    for branch in ("LIVE", "PTU"):
+        branch_dir = root / branch
+        branch_dir.mkdir(parents=True, exist_ok=True)
+        link = branch_dir / "Data.p4k"
+        if not link.exists():
+            try:
+                link.symlink_to(archive)
+            except OSError:
+                os.link(archive, link)
+        (branch_dir / "build_manifest.id").write_text(
+            json.dumps({"Data": {"Version": f"{VERSION}-{branch.lower()}.123456", "Branch": f"sc-alpha-{VERSION}"}}),
+            encoding="utf-8"
+        )
+    return work, root / "LIVE" / "Data.p4k"
+
+
+# --- Stages (each runs in a fresh child process so peak RSS belongs to it alone) ---
+
+def stage_discovery(work, p4k):
+    installations = extractor_core.scan_root(p4k.parent.parent)
+    assert len(installations) == 2 and installations[0]["version"] == VERSION, installations
+    return {"items": len(installations)}
+
+
+def stage_index_build(work, p4k):
+    db = work / "stage_index.db"
+    if db.exists():
+        db.unlink()
+    with p4k_reader.P4kArchive(p4k) as archive:
+        p4k_index.P4kIndex(db).ensure(archive)
+        return {"items": archive.entry_count}
+
+
+def stage_browse_tree(work, p4k):
+    """Folder index from scratch, then expand every top-level folder and page to the end of the largest"""
+    db = work / "stage_browse.db"
+    if db.exists():
+        db.unlink()
+    index = p4k_index.P4kIndex(db)
+    with p4k_reader.P4kArchive(p4k) as archive:
+        tree = p4k_tree.ArchiveTree(index, index.ensure_folders(archive))
+        tree.toggle(0)
+        for number in range(len(tree) - 1, 0, -1):
+            tree.toggle(number)
+        for start in range(0, len(tree), len(tree) // 20 or 1):
+            tree.rows(start, start + 40)
+        return {"items": archive.entry_count}
+
+
+def stage_extract_single(work, p4k):
+    out = work / "out" / "global.ini"
+    out.parent.mkdir(exist_ok=True)
+    extractor_core.extract_global_ini(p4k, out, _warm_index(work, p4k))
+    return {"items": 1, "bytes": out.stat().st_size}
+
+
+def stage_extract_languages(work, p4k):
+    out = work / "out" / "global.ini"
+    out.parent.mkdir(exist_ok=True)
+    saved = extractor_core.extract_all_languages(p4k, out, _warm_index(work, p4k))
+    return {"items": len(saved), "bytes": sum(path.stat().st_size for path in saved)}
+
+
+def stage_cache_restore(work, p4k):
+    out = work / "out" / "cached.ini"
+    cache = version_cache.VersionCache(work / "cache")
+    assert extractor_core.restore_from_cache(cache, "LIVE", VERSION, p4k, out), "cache miss"
+    return {"items": 1, "bytes": out.stat().st_size}
+
+
+def stage_incremental_check(work, p4k):
+    assert extractor_core.is_up_to_date(p4k, work / "out" / "cached.ini", _warm_index(work, p4k))
+    return {"items": 1}
+
+
+def stage_gui_first_frame(work, p4k):
+    """Launch the GUI (or the built exe given with --gui-exe) and wait until it has painted and closed"""
+    command = [GUI_EXE] if GUI_EXE else [sys.executable, str(BENCH_DIR.parent / "extract_tool.py")]
+    proc = subprocess.run(command + [diagnostics.FIRST_FRAME_EXIT_FLAG], capture_output=True, text=True, timeout=60)
+    if proc.returncode != 0:
+        raise RuntimeError(f"GUI exited with {proc.returncode}:\n{proc.stderr[-2000:]}")
+    return {"items": 1}
+
+
+def _warm_index(work, p4k):
+    index = p4k_index.P4kIndex(work / "warm_index.db")
+    with p4k_reader.P4kArchive(p4k) as archive:
+        index.ensure(archive)
+    return index
+
+
+def setup_cache(work, p4k):
+    """Seed the version cache once so cache_restore measures a hit"""
+    seed = work / "out" / "seed.ini"
+    seed.parent.mkdir(exist_ok=True)
+    extractor_core.extract_global_ini(p4k, seed, _warm_index(work, p4k))
+    extractor_core.add_to_cache(version_cache.VersionCache(work / "cache"), "LIVE", VERSION, p4k, seed)
+
+
+def run_stage_in_child(stage, work, p4k, repeat):
+    """Run one stage repeat times in this process and print its figures as JSON"""
+    func = globals()[f"stage_{stage}"]
+    seconds = []
+    figures = {}
+    for _ in range(repeat):
+        extractor_core._VERSION_CACHE.clear()
+        started = time.perf_counter()
+        figures = func(work, p4k)
+        seconds.append(time.perf_counter() - started)
+    figures.update({"seconds": seconds, "peak_rss": diagnostics.peak_rss()})
+    print(json.dumps(figures))
+
+
+def run_stage(stage, args, work, p4k):
+    command = [sys.executable, __file__, "--child", stage, "--workdir", str(work), "--p4k", str(p4k),
+               "--repeat", str(args.repeat)]
+    if args.gui_exe:
+        command += ["--gui-exe", args.gui_exe]
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage} failed:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["median"] = statistics.median(result["seconds"])
+    return result
+
+
+# --- Reporting ---
+
+def compare(results, baseline, params, time_tolerance, memory_tolerance):
+    """Return regression messages for stages slower or larger than the baseline (or target) allows"""
+    regressions = [
+        f"{stage}: {results[stage]['median'] * 1000:.1f} ms vs target {target * 1000:.0f} ms"
+        for stage, target in TARGETS.items() if stage in results and results[stage]["median"] > target
+    ]
+    if not baseline or baseline.get("fixture") != params:
+        return regressions
+    for stage, result in results.items():
+        base = baseline["stages"].get(stage)
+        if not base:
+            continue
+        if result["median"] > base["median"] * (1 + time_tolerance):
+            regressions.append(f"{stage}: {result['median'] * 1000:.1f} ms vs baseline {base['median'] * 1000:.1f} ms")
+        if base.get("peak_rss") and result["peak_rss"] and result["peak_rss"] > base["peak_rss"] * (1 + memory_tolerance):
+            regressions.append(
+                f"{stage}: peak RSS {result['peak_rss'] / 1e6:.0f} MB vs baseline {base['peak_rss'] / 1e6:.0f} MB"
+            )
+    return regressions
+
+
+def print_table(results, baseline, params):
+    comparable = baseline and baseline.get("fixture") == params
+    print(f"\n{'stage':<20}{'median':>12}{'throughput':>14}{'peak RSS':>12}{'vs base':>10}")
+    for stage, result in results.items():
+        median = result["median"]
+        throughput = ""
+        if result.get("bytes"):
+            throughput = f"{result['bytes'] / median / 1e6:.0f} MB/s"
+        elif result.get("items", 0) > 1:
+            throughput = f"{result['items'] / median:.0f} /s"
+        rss = f"{result['peak_rss'] / 1e6:.0f} MB" if result["peak_rss"] else "-"
+        delta = ""
+        if comparable and stage in baseline["stages"]:
+            delta = f"{(median / baseline['stages'][stage]['median'] - 1) * 100:+.0f}%"
+        print(f"{stage:<20}{median * 1000:>9.1f} ms{throughput:>14}{rss:>12}{delta:>10}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark Data.p4k extraction on synthetic archives")
+    parser.add_argument("--size-mb", type=int, default=256, help="Approximate fixture size (default: 256)")
+    parser.add_argument("--entries", type=int, default=20000, help="Small entries around global.ini (default: 20000)")
+    parser.add_argument("--languages", type=int, default=3, help="Localization folders (default: 3)")
+    parser.add_argument("--ini-keys", type=int, default=80000, help="Keys per global.ini (default: 80000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage; the median is reported (default: 5)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES + GUI_STAGES, default=STAGES)
+    parser.add_argument("--workdir", default=str(BENCH_DIR / ".work"), help="Where fixtures are generated and reused")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing (default: 0.25)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="Allowed peak RSS growth (default: 0.25)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--clean", action="store_true", help="Delete the work folder (fixtures included) afterwards")
+    parser.add_argument("--gui-exe", help="Time this built GUI exe in gui_first_frame instead of extract_tool.py")
+    parser.add_argument("--child", choices=STAGES + GUI_STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--p4k", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.child:
+        global GUI_EXE
+        GUI_EXE = args.gui_exe
+        run_stage_in_child(args.child, Path(args.workdir), Path(args.p4k), args.repeat)
+        return 0
+
+    work, p4k = prepare(args)
+    params = fixture_params(args)
+    if "cache_restore" in args.stages or "incremental_check" in args.stages:
+        setup_cache(work, p4k)
+    if "incremental_check" in args.stages and "cache_restore" not in args.stages:
+        run_stage("cache_restore", args, work, p4k)
+
+    results = {}
+    for stage in args.stages:
+        print(f"Running {stage}...", flush=True)
+        results[stage] = run_stage(stage, args, work, p4k)
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.json:
+        print(json.dumps({"fixture": params, "stages": results}, indent=2))
+    else:
+        print_table(results, baseline, params)
+
+    regressions = [] if args.save_baseline else compare(
+        results, baseline, params, args.tolerance, args.memory_tolerance
+    )
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "fixture": params,
+                "stages": {
+                    stage: {"median": result["median"], "peak_rss": result["peak_rss"]}
+                    for stage, result in results.items()
+                }
+            }, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+    elif baseline is None:
+        print("\nNo baseline yet - run with --save-baseline to record one")
+    elif baseline.get("fixture") != params:
+        print("\nBaseline was recorded with different fixture settings - not compared")
+
+    if args.clean:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if regressions:
+        print("\nREGRESSIONS:", file=sys.stderr)
+        for message in regressions:
+            print(f"  {message}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Diagnostics
+Stage timing spans with I/O and memory figures, exportable as a Chrome trace
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+TRACE_DIRNAME = "traces"
+KEEP_TRACES = 20
+PROFILE_STARTUP_FLAG = "--profile-startup"
+# Makes the GUI close again as soon as its window has painted (for the startup benchmark)
+FIRST_FRAME_EXIT_FLAG = "--exit-after-first-frame"
+
+_local = threading.local()
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes, or None if unavailable"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            if ctypes.windll.psapi.GetProcessMemoryInfo(
+                    ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+            return None
+
+        if sys.platform.startswith("linux"):
+            # VmHWM belongs to this program image; ru_maxrss can carry the parent's peak across exec
+            with open("/proc/self/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def io_counters():
+    """Bytes this process has read and written through the OS, or None if unavailable
+
+    Reads served from a memory mapping don't show up here; spans that know their
+    figures record them explicitly as bytes_read / bytes_written.
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            class IO_COUNTERS(ctypes.Structure):
+                _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                    "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                    "ReadTransferCount", "WriteTransferCount", "OtherTransferCount"
+                )]
+
+            counters = IO_COUNTERS()
+            if ctypes.windll.kernel32.GetProcessIoCounters(
+                    ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+                return counters.ReadTransferCount, counters.WriteTransferCount
+            return None
+
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except Exception:
+        return None
+
+
+class Trace:
+    """Timing spans collected over one run (a scan or an extraction)
+
+    Spans may be opened from any thread. I/O figures are process-wide, so spans
+    that overlap in time share each other's reads and writes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.spans = []
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time a stage; the yielded dict collects extra figures such as bytes_written"""
+        args = dict(args)
+        io_before = io_counters()
+        start_ns = time.perf_counter_ns()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            end_ns = time.perf_counter_ns()
+            io_after = io_counters()
+            if io_before and io_after:
+                args["process_bytes_read"] = io_after[0] - io_before[0]
+                args["process_bytes_written"] = io_after[1] - io_before[1]
+            args["peak_rss"] = peak_rss()
+            self._add(name, start_ns, end_ns, args)
+
+    def mark(self, name, **args):
+        """Record a milestone as a span from the start of the trace until now"""
+        self._add(name, self._origin_ns, time.perf_counter_ns(), args)
+
+    def _add(self, name, start_ns, end_ns, args):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "thread": threading.current_thread().name,
+                "tid": threading.get_ident(),
+                "start_us": (start_ns - self._origin_ns) // 1000,
+                "duration_us": (end_ns - start_ns) // 1000,
+                "args": args
+            })
+
+    def summary_lines(self):
+        """Human-readable one line per span, in start order"""
+        lines = []
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_us"])
+        for span in spans:
+            args = span["args"]
+            line = f"{span['duration_us'] / 1000:9.1f} ms  {span['name']}"
+            written = args.get("bytes_written", args.get("process_bytes_written"))
+            if written:
+                line += f"  {written / 1e6:.1f} MB out"
+            if args.get("error"):
+                line += f"  [{args['error']}]"
+            lines.append(line)
+        if lines:
+            peaks = [span["args"]["peak_rss"] for span in spans if span["args"].get("peak_rss")]
+            if peaks:
+                lines.append(f"peak memory {max(peaks) / 1e6:.0f} MB")
+        return lines
+
+    def to_chrome_trace(self):
+        """Return the spans as a Chrome trace (chrome://tracing, Perfetto) document"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {"name": span["name"], "cat": self.name, "ph": "X", "ts": span["start_us"],
+             "dur": span["duration_us"], "pid": pid, "tid": span["tid"], "args": span["args"]}
+            for span in spans
+        ]
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in {span["tid"]: span["thread"] for span in spans}.items()
+        )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run": self.name, "started_at": self.started_at}
+        }
+
+    def export(self, path):
+        """Write the Chrome trace JSON to path"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, indent=1)
+        return path
+
+
+def export_run(trace, trace_dir, keep=KEEP_TRACES):
+    """Save a run's trace as <trace_dir>/<name>-<timestamp>.json, keeping only the newest few"""
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started_at))
+    path = trace.export(Path(trace_dir) / f"{trace.name}-{stamp}-{os.getpid()}.json")
+    try:
+        old = sorted(Path(trace_dir).glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[keep:]
+        for stale in old:
+            stale.unlink()
+    except OSError:
+        pass
+    return path
+
+
+def process_uptime():
+    """Seconds since this process was created, or None if unavailable"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            created, exited, kernel, user, now = (wintypes.FILETIME() for _ in range(5))
+            if not ctypes.windll.kernel32.GetProcessTimes(
+                    ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(created), ctypes.byref(exited),
+                    ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            ctypes.windll.kernel32.GetSystemTimePreciseAsFileTime(ctypes.byref(now))
+            ticks = [(t.dwHighDateTime << 32) | t.dwLowDateTime for t in (created, now)]
+            return (ticks[1] - ticks[0]) / 1e7
+
+        with open("/proc/self/stat", "r") as f:
+            # The command name may contain spaces, so count fields from its closing parenthesis
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime", "r") as f:
+            return float(f.read().split()[0]) - started
+    except Exception:
+        return None
+
+
+def profile_imports(trace):
+    """Record a span for every module imported from now on, nested as the imports are
+
+    Works in the frozen exe too, where python -X importtime is not available.
+    Returns a function that removes the hook again.
+    """
+    import builtins
+
+    original = builtins.__import__
+
+    def profiled(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        start_ns = time.perf_counter_ns()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            trace._add(f"import {name}", start_ns, time.perf_counter_ns(), {})
+
+    builtins.__import__ = profiled
+
+    def remove():
+        builtins.__import__ = original
+    return remove
+
+
+def current():
+    """The trace spans on this thread are recorded into, or None"""
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def activate(trace):
+    """Record spans opened on this thread into trace (None disables recording)"""
+    previous = current()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def span(name, **args):
+    """Open a span on the active trace; a no-op when none is active"""
+    trace = current()
+    if trace is None:
+        return nullcontext({})
+    return trace.span(name, **args)
+
+
+def traced(name):
+    """Decorator wrapping every call of a function in a span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,424 @@
+"""
+Star Citizen Global.ini Extractor - Command Line
+Headless entry point for build servers and scheduled jobs (never imports tkinter)
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import diagnostics
+import extractor_core
+import ini_diff
+import ini_export
+import install_watcher
+
+
+def parse_exports(value):
+    formats = [fmt.strip().lower() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in ini_export.EXPORT_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown export format {unknown[0]} (choose from sqlite, binary)")
+    return formats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="SC_GlobalIni_Extractor_CLI",
+        description="Extract the vanilla global.ini from Star Citizen's Data.p4k"
+    )
+    parser.add_argument("--root", help="StarCitizen folder containing LIVE/PTU/... (default: auto-detect)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--branch", help="Branch to extract, e.g. LIVE or PTU (default: first found)")
+    target.add_argument("--all-branches", action="store_true", help="Extract every detected branch")
+    parser.add_argument("--version", help="Version used in the output filename (default: auto-detect)")
+    parser.add_argument("--out", help="Output file, or folder for the generated StockGlobal-*.ini name (default: current folder)")
+    parser.add_argument("--all-languages", action="store_true", help="Extract every Data/Localization language")
+    parser.add_argument("--pattern", help="Extract entries matching a glob, e.g. Data/Localization/**/*.ini")
+    parser.add_argument("--incremental", action="store_true", help="Skip global.ini when the output already matches the archive")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read from or add to the local version cache")
+    parser.add_argument("--cache-limit-mb", type=int, default=512, help="Size cap for the local version cache (default: 512)")
+    parser.add_argument("--jobs", type=int, default=extractor_core.DEFAULT_BATCH_WORKERS,
+                        help="Branches extracted at once; branches on the same drive always run in turn (default: 4)")
+    parser.add_argument("--export", type=parse_exports, default=[], metavar="FORMATS",
+                        help="Also write sqlite and/or binary lookup files next to global.ini, e.g. sqlite,binary")
+    parser.add_argument("--list", action="store_true", help="List detected installations and exit")
+    parser.add_argument("--diff", nargs="+", metavar=("OLD", "NEW"),
+                        help="Report keys added/removed/changed since OLD (against NEW, or the extracted file)")
+    parser.add_argument("--diff-format", default="json",
+                        help="Comma-separated report formats: ini, json, csv (default: json)")
+    parser.add_argument("--merge", nargs="+", metavar="FILE",
+                        help="OLD_STOCK [NEW_STOCK] TRANSLATED: rebase a translation onto the new stock file "
+                             "(the extracted one unless NEW_STOCK is given)")
+    parser.add_argument("--merge-out", help="Merged file (default: <TRANSLATED>-<version>.ini next to it)")
+    parser.add_argument("--use-new-source", action="store_true",
+                        help="When --merge finds changed English, use it instead of keeping the old translation")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and extract each branch (or --branch) whenever it is patched")
+    parser.add_argument("--interval", type=float, default=install_watcher.DEFAULT_INTERVAL,
+                        help="Seconds between Data.p4k checks in --watch mode (default: 30)")
+    parser.add_argument("--settle", type=float, default=install_watcher.DEFAULT_SETTLE,
+                        help="Seconds Data.p4k must stay unchanged before extracting (default: 120)")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Search the StockGlobal-*.ini files in --out (filtered by --branch/--version) and exit")
+    # Literal copies of search_index's SEARCH_MODES / DEFAULT_LIMIT / DEFAULT_PORT: the module
+    # pulls in sqlite3 and http.server, so it is only imported once a search actually runs
+    parser.add_argument("--search-mode", choices=("text", "prefix", "key"), default="text",
+                        help="text: substring of the English text, prefix: key prefix, key: key pattern with * and ?")
+    parser.add_argument("--limit", type=int, default=50,
+                        help="Maximum --search results (default: 50)")
+    parser.add_argument("--serve-search", nargs="?", type=int, const=8765, metavar="PORT",
+                        help="Serve searches over the --out folder as JSON on http://127.0.0.1:PORT/ (default: 8765)")
+    parser.add_argument("--trace", metavar="FILE", help="Write stage timings as a Chrome trace JSON file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON results")
+    return parser
+
+
+def resolve_output(out, version, branch, force_dir):
+    """Return the output file for one installation"""
+    filename = extractor_core.generate_filename(version, branch)
+    if not out:
+        return Path.cwd() / filename
+    is_dir = force_dir or out.endswith(("/", "\\")) or Path(out).is_dir()
+    out = Path(out)
+    if is_dir:
+        out.mkdir(parents=True, exist_ok=True)
+        return out / filename
+    return out
+
+
+def run_one(inst, args, index, cache, resource_dir, force_dir):
+    """Extract a single installation, returning a result record"""
+    version = args.version or inst["version"]
+    result = {
+        "branch": inst["branch"],
+        "p4k": inst["path"],
+        "version": version,
+        "files": [],
+        "status": "failed",
+        "ok": False,
+        "error": None,
+        "seconds": 0.0
+    }
+    started = time.perf_counter()
+    try:
+        if not version:
+            raise extractor_core.ExtractionError("Could not detect the version - pass --version")
+        output_file = resolve_output(args.out, version, inst["branch"], force_dir)
+
+        # With several branches, patterns go into per-branch folders so concurrent jobs can't collide
+        pattern_dir = output_file.parent / inst["branch"] if force_dir else None
+        status, saved = extractor_core.extract_installation(
+            inst, output_file, version,
+            all_languages=args.all_languages,
+            pattern=args.pattern,
+            pattern_dir=pattern_dir,
+            incremental=args.incremental,
+            index=index,
+            cache=cache,
+            resource_dir=resource_dir,
+            exports=args.export
+        )
+        result["files"] = [str(path) for path in saved]
+        result["status"] = status
+        result["ok"] = True
+        if not args.pattern and not args.all_languages:
+            manifest = extractor_core.read_manifest(output_file) or {}
+            result["verification"] = manifest.get("verification")
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def print_results(results, as_json):
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        if not result["ok"]:
+            print(f"[FAIL] {result['branch']}: {result['error']}", file=sys.stderr)
+            continue
+        if result["status"] in ("up-to-date", "cached"):
+            label = "up to date" if result["status"] == "up-to-date" else "from cache"
+            print(f"[OK]   {result['branch']} ({result['version']}) {label}: {result['files'][0]}")
+        else:
+            files = result["files"]
+            target = files[0] if len(files) == 1 else f"{len(files)} files"
+            print(f"[OK]   {result['branch']} ({result['version']}) -> {target} in {result['seconds']}s")
+        for problem in (result.get("verification") or {}).get("problems", []):
+            print(f"[WARN] {result['branch']}: {problem}", file=sys.stderr)
+        if result.get("diff"):
+            diff = result["diff"]
+            print(f"       diff: {diff['added']} added, {diff['removed']} removed, {diff['changed']} changed"
+                  f" -> {', '.join(diff['reports'])}")
+        if result.get("merge"):
+            print_merge(result["merge"])
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    trace = diagnostics.Trace("cli") if args.trace else None
+    try:
+        with diagnostics.activate(trace):
+            return run(args)
+    finally:
+        if trace is not None:
+            trace.export(args.trace)
+
+
+def single_file(args):
+    """Whether results hold global.ini first (rather than all languages or a pattern's matches)"""
+    return not args.pattern and not args.all_languages
+
+
+def diff_reports(old_file, new_file, formats):
+    """Diff two global.ini files, writing reports next to new_file"""
+    diff = ini_diff.diff_files(old_file, new_file)
+    return {
+        "added": len(diff.added),
+        "removed": len(diff.removed),
+        "changed": len(diff.changed),
+        "reports": [str(path) for path in ini_diff.write_reports(diff, formats)]
+    }
+
+
+def add_diffs(results, args, formats):
+    """Attach a diff against --diff OLD to every single-file result"""
+    for result in results:
+        if result["ok"] and single_file(args):
+            try:
+                result["diff"] = diff_reports(args.diff[0], result["files"][0], formats)
+            except (OSError, ValueError) as e:
+                result["ok"] = False
+                result["error"] = f"Diff failed: {e}"
+
+
+def merge_report(old_stock, new_stock, translated, merge_out, keep_outdated):
+    """Three-way merge a translation onto new_stock, writing the merged file and its conflict list"""
+    output_file = merge_out or ini_diff.merged_path(translated, new_stock)
+    result = ini_diff.merge_translation(old_stock, new_stock, translated, output_file, keep_outdated)
+    return {
+        "merged": str(result.output),
+        "conflicts_file": str(ini_diff.write_conflicts(result)),
+        "kept": result.kept,
+        "added": result.added,
+        "untranslated": result.untranslated,
+        "conflicts": len(result.conflicts),
+        "dropped": len(result.removed)
+    }
+
+
+def print_merge(merge):
+    print(f"       merge: {merge['kept']} kept, {merge['added']} new, {merge['untranslated']} untranslated, "
+          f"{merge['conflicts']} conflicts, {merge['dropped']} dropped -> {merge['merged']}")
+    print(f"       conflicts: {merge['conflicts_file']}")
+
+
+def search_folder(args):
+    """The folder whose extracted files --search and --serve-search cover"""
+    if not args.out:
+        return Path.cwd()
+    out = Path(args.out)
+    return out.parent if out.suffix.lower() == ".ini" and not out.is_dir() else out
+
+
+def search(args, exe_dir):
+    """Answer one --search query (or serve them) from the index over the output folder"""
+    import search_index
+
+    index = search_index.SearchIndex(exe_dir / search_index.INDEX_FILENAME)
+    folder = search_folder(args)
+
+    def progress(fraction, message):
+        if not args.json:
+            print(message, file=sys.stderr, flush=True)
+
+    with diagnostics.span("search_sync"):
+        index.sync(folder, progress)
+
+    if args.serve_search is not None:
+        server = search_index.SearchServer(index, [folder], port=args.serve_search)
+        print(f"Serving searches over {folder} at {server.url}search?q=... - press Ctrl+C to stop", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    started = time.perf_counter()
+    hits, more = index.search(
+        args.search, args.search_mode,
+        branches=[args.branch] if args.branch else None,
+        versions=[args.version] if args.version else None,
+        limit=args.limit,
+        folders=[folder]
+    )
+    elapsed = time.perf_counter() - started
+    if args.json:
+        print(json.dumps({
+            "hits": [search_index.hit_to_json(hit) for hit in hits], "more": more, "ms": round(elapsed * 1000, 2)
+        }, indent=2, ensure_ascii=False))
+    else:
+        for hit in hits:
+            print(search_index.format_hit(hit))
+        print(f"{len(hits)}{'+' if more else ''} result(s) in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def discover(args, cache_path, known):
+    """Find installations, reusing versions of archives that haven't changed"""
+    with diagnostics.span("scan_installations"):
+        if args.root:
+            return extractor_core.scan_root(args.root, known)
+        installations = extractor_core.find_installations(known)
+        extractor_core.save_installation_cache(cache_path, installations)
+        return installations
+
+
+def watch(args, cache_path, known, index, cache, resource_dir):
+    """Extract every watched branch whenever its Data.p4k settles after a patch (runs until Ctrl+C)"""
+    # The version comes from the patched install, and unchanged outputs are never rewritten
+    args.incremental = True
+
+    def find():
+        installations = discover(args, cache_path, known)
+        known.update((inst["path"], inst) for inst in installations)
+        if args.branch:
+            installations = [inst for inst in installations if inst["branch"].upper() == args.branch.upper()]
+        return installations
+
+    def on_event(inst, message):
+        print(f"[WATCH] {inst['branch']}: {message}", flush=True)
+
+    def on_stable(inst):
+        inst = dict(inst, version=extractor_core.detect_version(inst["path"]))
+        result = run_one(inst, args, index, cache, resource_dir, force_dir=True)
+        print_results([result], args.json)
+        sys.stdout.flush()
+        # A failed run (archive locked by the launcher, disk full, ...) is retried next interval
+        return result["ok"]
+
+    watcher = install_watcher.InstallationWatcher(
+        find, on_stable, interval=args.interval, settle=args.settle, on_event=on_event
+    )
+    print(f"Watching for patches every {args.interval:g}s - press Ctrl+C to stop", flush=True)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run(args):
+    resource_dir, exe_dir = extractor_core.get_app_dirs()
+
+    if args.merge and len(args.merge) not in (2, 3):
+        print("--merge takes OLD_STOCK [NEW_STOCK] TRANSLATED", file=sys.stderr)
+        return 2
+    if args.merge and len(args.merge) == 3:
+        # Plain merge of existing files - nothing to extract
+        try:
+            merge = merge_report(*args.merge, args.merge_out, not args.use_new_source)
+        except (OSError, ValueError) as e:
+            print(f"[FAIL] {e}", file=sys.stderr)
+            return 1
+        if args.json:
+            print(json.dumps(merge, indent=2))
+        else:
+            print_merge(merge)
+        return 0
+
+    if args.search is not None or args.serve_search is not None:
+        return search(args, exe_dir)
+
+    formats = []
+    if args.diff:
+        formats = [fmt.strip().lower() for fmt in args.diff_format.split(",") if fmt.strip()]
+        unknown = [fmt for fmt in formats if fmt not in ini_diff.REPORT_FORMATS]
+        if len(args.diff) > 2 or unknown or not formats:
+            print("--diff takes OLD [NEW] and --diff-format ini, json and/or csv", file=sys.stderr)
+            return 2
+        if len(args.diff) == 2:
+            # Plain comparison of two existing files - nothing to extract
+            try:
+                diff = diff_reports(args.diff[0], args.diff[1], formats)
+            except (OSError, ValueError) as e:
+                print(f"[FAIL] {e}", file=sys.stderr)
+                return 1
+            if args.json:
+                print(json.dumps(diff, indent=2))
+            else:
+                print(f"{diff['added']} added, {diff['removed']} removed, {diff['changed']} changed")
+                for path in diff["reports"]:
+                    print(f"  {path}")
+            return 0
+
+    cache_path = exe_dir / extractor_core.INSTALL_CACHE_FILENAME
+    known = {inst["path"]: inst for inst in extractor_core.load_installation_cache(cache_path)}
+    if args.watch:
+        if args.version:
+            print("--version can't be combined with --watch (each patch brings its own)", file=sys.stderr)
+            return 2
+        index = extractor_core.open_index(exe_dir)
+        cache = None
+        if not args.no_cache:
+            cache = extractor_core.open_version_cache(exe_dir, args.cache_limit_mb * 1024 * 1024)
+        return watch(args, cache_path, known, index, cache, resource_dir)
+
+    installations = discover(args, cache_path, known)
+
+    if args.list:
+        if args.json:
+            print(json.dumps(installations, indent=2))
+        else:
+            for inst in installations:
+                print(f"{inst['display']:<24} {inst['path']}")
+        return 0
+
+    if not installations:
+        print("No Star Citizen installations found - use --root", file=sys.stderr)
+        return 2
+
+    if args.all_branches:
+        selected = installations
+    elif args.branch:
+        selected = [inst for inst in installations if inst["branch"].upper() == args.branch.upper()]
+        if not selected:
+            print(f"Branch {args.branch} not found", file=sys.stderr)
+            return 2
+    else:
+        selected = installations[:1]
+
+    index = extractor_core.open_index(exe_dir)
+    cache = None
+    if not args.no_cache:
+        cache = extractor_core.open_version_cache(exe_dir, args.cache_limit_mb * 1024 * 1024)
+    force_dir = len(selected) > 1
+    results = extractor_core.run_by_drive(
+        selected, lambda inst: run_one(inst, args, index, cache, resource_dir, force_dir), args.jobs
+    )
+    if args.diff:
+        add_diffs(results, args, formats)
+    if args.merge:
+        for result in results:
+            if result["ok"] and single_file(args):
+                try:
+                    result["merge"] = merge_report(
+                        args.merge[0], result["files"][0], args.merge[1],
+                        args.merge_out if len(results) == 1 else None, not args.use_new_source
+                    )
+                except (OSError, ValueError) as e:
+                    result["ok"] = False
+                    result["error"] = f"Merge failed: {e}"
+    print_results(results, args.json)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
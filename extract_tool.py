@@ -3,23 +3,42 @@ Star Citizen Global.ini Extractor
 Modern GUI tool for extracting global.ini from Star Citizen installations
 """
 
+import sys
+
+import diagnostics
+
+# --profile-startup records every import below plus the time to the first painted frame
+STARTUP_TRACE = diagnostics.Trace("startup") if diagnostics.PROFILE_STARTUP_FLAG in sys.argv else None
+_stop_import_profile = diagnostics.profile_imports(STARTUP_TRACE) if STARTUP_TRACE is not None else None
+
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox, filedialog
-import subprocess
-import shutil
+import sqlite3
 import threading
+import time
 import webbrowser
 from pathlib import Path
-import sys
-import os
-import re
+
+import extractor_core
+import ui_events
+# ini_diff, ini_export, search_index and archive_browser are imported where they are first
+# needed, so none of them delays the first frame
 
 # Set appearance and theme
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 
+# Shown in the installation dropdown when a cached copy can be served instantly
+CACHED_SUFFIX = "  - cached copy available"
+
+# The output path follows the version field once typing pauses for this long
+OUTPUT_NAME_DELAY_MS = 200
+# Seconds an output folder existence check is trusted (it may sit on a slow network drive)
+DIR_CHECK_TTL = 10.0
+
+
 class SCExtractorApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -29,22 +48,28 @@ class SCExtractorApp(ctk.CTk):
         self.geometry("900x600")
         self.resizable(True, True)
 
-        # Get resource directory (for bundled files like unp4k.exe)
-        if getattr(sys, 'frozen', False):
-            # Running as compiled EXE - use PyInstaller's temp folder for resources
-            self.resource_dir = Path(sys._MEIPASS)
-            # EXE location for output files
-            self.exe_dir = Path(sys.executable).parent
-        else:
-            # Running as .py script
-            self.resource_dir = Path(__file__).parent
-            self.exe_dir = Path(__file__).parent
+        # Get resource directory (for bundled files like unp4k.exe) and EXE location for output files
+        self.resource_dir, self.exe_dir = extractor_core.get_app_dirs()
 
         # Initialize variables
         self.installations = []
         self.selected_installation = None
         self.extracting = False
+        self.cancel_event = None
         self.output_file = None
+        self.p4k_index = extractor_core.open_index(self.exe_dir)
+        self.install_cache_path = self.exe_dir / extractor_core.INSTALL_CACHE_FILENAME
+        self.version_cache = extractor_core.open_version_cache(self.exe_dir)
+        self.trace_dir = self.exe_dir / diagnostics.TRACE_DIRNAME
+        self.search_index = None
+        self.archive_browser = None
+        self.search_window = None
+        self.search_server = None
+        self._search_pending = None
+        self._output_name_pending = None
+        self._dir_checks = {}
+        # Worker threads post UI updates here; the main loop applies them at most once per frame
+        self.ui_events = ui_events.UiEventQueue(wake=self._schedule_ui_drain)
 
         # Configure grid layout (1x2)
         self.grid_columnconfigure(1, weight=1)
@@ -54,8 +79,39 @@ class SCExtractorApp(ctk.CTk):
         self.create_sidebar()
         self.create_main_area()
 
-        # Auto-scan for installations
-        self.after(100, self.scan_installations)
+        # Auto-scan for installations once the window has painted, so data never holds up the first frame
+        self._painted = False
+        self.bind("<Map>", self._on_map, add="+")
+
+    def _schedule_ui_drain(self):
+        """Called by ui_events when the first update arrives after an idle stretch"""
+        try:
+            self.after(ui_events.FRAME_MS, self._drain_ui_events)
+        except (RuntimeError, tk.TclError):
+            # Window destroyed or main loop not running yet - the next post tries again
+            return False
+        return True
+
+    def _drain_ui_events(self):
+        self.ui_events.drain(self.report_callback_exception)
+
+    def _on_map(self, event):
+        if event.widget is not self or self._painted:
+            return
+        self._painted = True
+        self.after_idle(self._first_frame)
+
+    def _first_frame(self):
+        """The window is on screen: record the startup profile, then start filling in data"""
+        self.update_idletasks()
+        if STARTUP_TRACE is not None:
+            _stop_import_profile()
+            STARTUP_TRACE.mark("first_frame", process_uptime=diagnostics.process_uptime())
+            self._finish_trace(STARTUP_TRACE)
+        if diagnostics.FIRST_FRAME_EXIT_FLAG in sys.argv:
+            self.after(0, self.destroy)
+            return
+        self.scan_installations()
 
     def create_sidebar(self):
         """Create the sidebar with logo and info"""
@@ -90,6 +146,29 @@ class SCExtractorApp(ctk.CTk):
         )
         self.info_label.grid(row=2, column=0, padx=20, pady=10)
 
+        # Diagnostics (collapsed by default): stage timings of the last scan/extraction
+        self.diagnostics_button = ctk.CTkButton(
+            self.sidebar_frame,
+            text="Diagnostics ▸",
+            font=ctk.CTkFont(size=11),
+            height=24,
+            width=120,
+            fg_color="transparent",
+            text_color="gray70",
+            hover_color=("gray70", "gray30"),
+            command=self.toggle_diagnostics
+        )
+        self.diagnostics_button.grid(row=3, column=0, padx=20, pady=(10, 0))
+
+        self.diagnostics_box = ctk.CTkTextbox(
+            self.sidebar_frame,
+            width=180,
+            font=ctk.CTkFont(family="Consolas", size=10),
+            wrap="none"
+        )
+        self.diagnostics_box.insert("end", "No runs yet")
+        self.diagnostics_box.configure(state="disabled")
+
         # Theme switch (optional, keeping it simple for now)
         # appearance_mode_label = ctk.CTkLabel(self.sidebar_frame, text="Appearance Mode:", anchor="w")
         # appearance_mode_label.grid(row=5, column=0, padx=20, pady=(10, 0))
@@ -125,6 +204,32 @@ class SCExtractorApp(ctk.CTk):
         )
         self.footer_label.pack()
 
+    def toggle_diagnostics(self):
+        """Show or hide the diagnostics panel"""
+        if self.diagnostics_box.winfo_ismapped():
+            self.diagnostics_box.grid_remove()
+            self.diagnostics_button.configure(text="Diagnostics ▸")
+        else:
+            self.diagnostics_box.grid(row=4, column=0, padx=10, pady=10, sticky="nsew")
+            self.diagnostics_button.configure(text="Diagnostics ▾")
+
+    def _finish_trace(self, trace):
+        """Export a run's trace for bug reports and show its stages (called from worker threads)"""
+        try:
+            path = diagnostics.export_run(trace, self.trace_dir)
+        except OSError:
+            path = None
+        self.ui_events.post(lambda: self._show_trace(trace, path))
+
+    def _show_trace(self, trace, path):
+        lines = [f"Last {trace.name}:"] + trace.summary_lines()
+        if path:
+            lines.append(f"Saved {path.name}")
+        self.diagnostics_box.configure(state="normal")
+        self.diagnostics_box.delete("1.0", "end")
+        self.diagnostics_box.insert("end", "\n".join(lines))
+        self.diagnostics_box.configure(state="disabled")
+
     def open_github(self):
         """Open GitHub repository in browser"""
         webbrowser.open("https://github.com/BeltaKoda/SC-GlobalIni-Extractor")
@@ -155,14 +260,28 @@ class SCExtractorApp(ctk.CTk):
             font=ctk.CTkFont(size=14, weight="bold")
         ).pack(anchor="w", padx=15, pady=(10, 5))
 
+        inst_row = ctk.CTkFrame(self.inst_frame, fg_color="transparent")
+        inst_row.pack(padx=15, pady=(0, 10), fill="x")
+
         self.installation_dropdown = ctk.CTkComboBox(
-            self.inst_frame,
+            inst_row,
             width=400,
             height=35,
             state="disabled",
             command=self._on_installation_changed
         )
-        self.installation_dropdown.pack(padx=15, pady=(0, 10), fill="x")
+        self.installation_dropdown.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        self.browse_archive_btn = ctk.CTkButton(
+            inst_row,
+            text="Browse Archive...",
+            width=130,
+            height=35,
+            fg_color="gray30",
+            hover_color="gray40",
+            command=self.open_archive_browser
+        )
+        self.browse_archive_btn.pack(side="right")
 
         # Custom path checkbox
         self.custom_path_var = ctk.BooleanVar(value=False)
@@ -210,7 +329,7 @@ class SCExtractorApp(ctk.CTk):
             height=35
         )
         self.version_entry.pack(padx=15, pady=(0, 15), fill="x")
-        self.version_entry.bind("<KeyRelease>", lambda e: self.update_output_filename())
+        self.version_entry.bind("<KeyRelease>", lambda e: self._schedule_output_filename())
 
         # --- Output Section ---
         self.out_frame = ctk.CTkFrame(self.main_frame)
@@ -237,6 +356,70 @@ class SCExtractorApp(ctk.CTk):
         )
         self.browse_btn.pack(side="right")
 
+        self.compare_btn = ctk.CTkButton(
+            out_inner,
+            text="Compare...",
+            width=100,
+            height=35,
+            fg_color="gray30",
+            hover_color="gray40",
+            command=self.compare_with_previous
+        )
+        self.compare_btn.pack(side="right", padx=(0, 10))
+
+        self.merge_btn = ctk.CTkButton(
+            out_inner,
+            text="Merge...",
+            width=100,
+            height=35,
+            fg_color="gray30",
+            hover_color="gray40",
+            command=self.merge_translation
+        )
+        self.merge_btn.pack(side="right", padx=(0, 10))
+
+        self.search_btn = ctk.CTkButton(
+            out_inner,
+            text="Search...",
+            width=100,
+            height=35,
+            fg_color="gray30",
+            hover_color="gray40",
+            command=self.open_search
+        )
+        self.search_btn.pack(side="right", padx=(0, 10))
+
+        self.all_languages_var = ctk.BooleanVar(value=False)
+        self.all_languages_checkbox = ctk.CTkCheckBox(
+            self.out_frame,
+            text="Extract all languages (saved next to the output file)",
+            variable=self.all_languages_var
+        )
+        self.all_languages_checkbox.pack(anchor="w", padx=15, pady=(0, 10))
+
+        self.skip_unchanged_var = ctk.BooleanVar(value=True)
+        self.skip_unchanged_checkbox = ctk.CTkCheckBox(
+            self.out_frame,
+            text="Skip if the output is already up to date",
+            variable=self.skip_unchanged_var
+        )
+        self.skip_unchanged_checkbox.pack(anchor="w", padx=15, pady=(0, 10))
+
+        self.exports_var = ctk.BooleanVar(value=False)
+        self.exports_checkbox = ctk.CTkCheckBox(
+            self.out_frame,
+            text="Also save SQLite and binary lookup files (.sqlite, .gidx)",
+            variable=self.exports_var
+        )
+        self.exports_checkbox.pack(anchor="w", padx=15, pady=(0, 10))
+
+        self.pattern_entry = ctk.CTkEntry(
+            self.out_frame,
+            placeholder_text="Extract by pattern (optional), e.g. Data/Localization/**/*.ini",
+            height=35
+        )
+        self.pattern_entry.pack(padx=15, pady=(0, 15), fill="x")
+
         # --- Action Section ---
         self.action_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
         self.action_frame.pack(fill="both", expand=True, pady=(10, 0))
@@ -265,104 +448,73 @@ class SCExtractorApp(ctk.CTk):
         )
         self.extract_button.pack(fill="x", side="bottom")
 
+        self.extract_all_button = ctk.CTkButton(
+            self.action_frame,
+            text="Extract All Branches",
+            height=35,
+            state="disabled",
+            command=self.start_batch_extraction
+        )
+        self.extract_all_button.pack(fill="x", side="bottom", pady=(0, 10))
+
+        # One row per branch while an "extract all" job runs (initially hidden)
+        self.batch_frame = ctk.CTkScrollableFrame(self.action_frame, height=110)
+        self.batch_rows = {}
+
+        # Only shown while an extraction is running
+        self.cancel_button = ctk.CTkButton(
+            self.action_frame,
+            text="Cancel",
+            height=35,
+            fg_color="#FF5555",
+            text_color="white",
+            hover_color="#cc4444",
+            command=self.cancel_extraction
+        )
+
     def scan_installations(self):
         """Scan for Star Citizen installations"""
-        self.status_label.configure(text="Scanning for Star Citizen installations...")
+        # Show the last known installations straight away, then refresh in the background
+        cached = extractor_core.load_installation_cache(self.install_cache_path)
+        if cached:
+            self._show_installations(cached)
+            self.status_label.configure(
+                text=f"Found {len(cached)} installation(s) - refreshing...", text_color="gray"
+            )
+        else:
+            self.status_label.configure(text="Scanning for Star Citizen installations...")
         self.progress_bar.configure(mode="indeterminate")
         self.progress_bar.start()
         
         # Run scan in background thread
-        thread = threading.Thread(target=self._scan_thread, daemon=True)
+        thread = threading.Thread(target=self._scan_thread, args=(cached,), daemon=True)
         thread.start()
 
-    def _scan_thread(self):
+    def _scan_thread(self, cached):
         """Background thread for scanning"""
-        installations = self.find_installations()
+        trace = diagnostics.Trace("scan")
+        with diagnostics.activate(trace), trace.span("scan_installations"):
+            known = {inst["path"]: inst for inst in cached}
+            installations = extractor_core.find_installations(known)
+            with trace.span("check_version_cache"):
+                for inst in installations:
+                    self._mark_cached(inst)
+            with trace.span("save_installation_cache"):
+                extractor_core.save_installation_cache(self.install_cache_path, installations)
+        self._finish_trace(trace)
         # Update UI on main thread
-        self.after(0, lambda: self._scan_complete(installations))
-
-    def detect_version(self, installation_path):
-        """Detect Star Citizen version from log files"""
-        try:
-            branch_folder = Path(installation_path).parent
-            # Try Game.log first
-            game_log = branch_folder / "Game.log"
-            if game_log.exists():
-                version = self._extract_version_from_log(game_log)
-                if version: return version
-
-            # Try logbackups folder
-            logbackups = branch_folder / "logbackups"
-            if logbackups.exists():
-                log_files = list(logbackups.glob("Game*.log"))
-                if log_files:
-                    latest_log = max(log_files, key=lambda p: p.stat().st_mtime)
-                    version = self._extract_version_from_log(latest_log)
-                    if version: return version
-        except Exception:
-            pass
-        return None
-
-    def _extract_version_from_log(self, log_path):
-        """Extract version number from log file"""
-        try:
-            with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for _ in range(200):
-                    line = f.readline()
-                    if not line: break
-                    
-                    # Pattern 1: "GameVersion: 4.4.0-PTU.12345"
-                    match = re.search(r'GameVersion[:\s]+(\d+\.\d+\.?\d*)', line, re.IGNORECASE)
-                    if match: return match.group(1)
-
-                    # Pattern 2: "Version 4.4.0" or "v4.4.0"
-                    match = re.search(r'Version\s+v?(\d+\.\d+\.?\d*)', line, re.IGNORECASE)
-                    if match:
-                        version = match.group(1)
-                        if version.startswith(('3.', '4.')): return version
-
-                    # Pattern 3: "Star Citizen Alpha 4.4.0"
-                    match = re.search(r'Star Citizen Alpha\s+(\d+\.\d+\.?\d*)', line, re.IGNORECASE)
-                    if match: return match.group(1)
-        except Exception:
-            pass
-        return None
-
-    def find_installations(self):
-        """Find all Star Citizen installations"""
-        installations = []
-        common_roots = [
-            r"C:\Program Files\Roberts Space Industries\StarCitizen",
-            r"D:\Program Files\Roberts Space Industries\StarCitizen",
-            r"E:\Program Files\Roberts Space Industries\StarCitizen",
-            r"F:\Program Files\Roberts Space Industries\StarCitizen",
-            r"C:\Games\Roberts Space Industries\StarCitizen",
-            r"D:\Games\Roberts Space Industries\StarCitizen",
-            r"E:\Games\Roberts Space Industries\StarCitizen",
-            r"F:\Games\Roberts Space Industries\StarCitizen",
-            r"C:\RSI\StarCitizen",
-            r"D:\RSI\StarCitizen",
-            r"E:\RSI\StarCitizen",
-            r"F:\RSI\StarCitizen"
-        ]
-        branches = ["LIVE", "PTU", "EPTU", "HOTFIX", "TECH-PREVIEW"]
-
-        for root in common_roots:
-            root_path = Path(root)
-            if root_path.exists():
-                for branch in branches:
-                    data_p4k = root_path / branch / "Data.p4k"
-                    if data_p4k.exists():
-                        detected_version = self.detect_version(str(data_p4k))
-                        # Show version if detected, otherwise just show branch name
-                        display_text = f"{branch} ({detected_version})" if detected_version else branch
-                        installations.append({
-                            "branch": branch,
-                            "path": str(data_p4k),
-                            "display": display_text,
-                            "version": detected_version
-                        })
-        return installations
+        self.ui_events.post(lambda: self._scan_complete(installations))
+
+    def _mark_cached(self, inst):
+        """Flag an installation whose current global.ini is already in the version cache"""
+        cached = bool(inst.get("version")) and self.version_cache.lookup(
+            inst["branch"], inst["version"], inst["path"]
+        ) is not None
+        inst["cached"] = cached
+        base = inst["display"]
+        if base.endswith(CACHED_SUFFIX):
+            base = base[:-len(CACHED_SUFFIX)]
+        inst["display"] = base + CACHED_SUFFIX if cached else base
 
     def _toggle_custom_path(self):
         """Show/hide custom path entry based on checkbox state"""
@@ -391,22 +543,10 @@ class SCExtractorApp(ctk.CTk):
         """Scan a custom path for Star Citizen installations"""
         self.status_label.configure(text="Scanning custom path...", text_color="gray")
         
-        installations = []
-        root_path = Path(custom_root)
-        branches = ["LIVE", "PTU", "EPTU", "HOTFIX", "TECH-PREVIEW"]
-        
-        for branch in branches:
-            data_p4k = root_path / branch / "Data.p4k"
-            if data_p4k.exists():
-                detected_version = self.detect_version(str(data_p4k))
-                display_text = f"{branch} ({detected_version})" if detected_version else branch
-                installations.append({
-                    "branch": branch,
-                    "path": str(data_p4k),
-                    "display": display_text,
-                    "version": detected_version
-                })
-        
+        installations = extractor_core.scan_root(custom_root)
+        for inst in installations:
+            self._mark_cached(inst)
+
         if installations:
             self.installations = installations
             display_values = [inst["display"] for inst in installations]
@@ -414,6 +554,7 @@ class SCExtractorApp(ctk.CTk):
             self.installation_dropdown.set(display_values[0])
             self._on_installation_changed(display_values[0])
             self.extract_button.configure(state="normal")
+            self.extract_all_button.configure(state="normal")
             self.status_label.configure(
                 text=f"Found {len(installations)} installation(s) in custom path", 
                 text_color="gray"
@@ -448,23 +589,41 @@ class SCExtractorApp(ctk.CTk):
         branch = "LIVE"
         if self.selected_installation:
             branch = self.selected_installation["branch"]
-            
-        version_formatted = version.replace(".", "-") if version else "0-0-0"
-        return f"StockGlobal-{version_formatted}-{branch}.ini"
+        return extractor_core.generate_filename(version, branch)
+
+    def _schedule_output_filename(self):
+        # Typing follows through to the output path once the keys pause, not on every keystroke
+        if self._output_name_pending is not None:
+            self.after_cancel(self._output_name_pending)
+        self._output_name_pending = self.after(OUTPUT_NAME_DELAY_MS, self.update_output_filename)
+
+    def _dir_exists(self, path):
+        """Path.exists for output folders, remembered for DIR_CHECK_TTL seconds"""
+        key = str(path)
+        now = time.monotonic()
+        checked = self._dir_checks.get(key)
+        if checked is None or now - checked[1] > DIR_CHECK_TTL:
+            checked = (Path(path).exists(), now)
+            self._dir_checks[key] = checked
+        return checked[0]
 
     def update_output_filename(self):
         """Update the output entry with new filename based on current inputs"""
+        if self._output_name_pending is not None:
+            self.after_cancel(self._output_name_pending)
+            self._output_name_pending = None
         current_path = self.output_entry.get().strip()
-        if current_path and Path(current_path).parent.exists():
+        if current_path and self._dir_exists(Path(current_path).parent):
             output_dir = Path(current_path).parent
         else:
             output_dir = self.exe_dir
 
         filename = self.generate_filename()
         new_path = output_dir / filename
-        
-        self.output_entry.delete(0, "end")
-        self.output_entry.insert(0, str(new_path))
+
+        if str(new_path) != current_path:
+            self.output_entry.delete(0, "end")
+            self.output_entry.insert(0, str(new_path))
         self.output_file = new_path
 
     def browse_output_file(self):
@@ -483,18 +642,261 @@ class SCExtractorApp(ctk.CTk):
 
         if selected_file:
             self.output_file = Path(selected_file)
+            self._dir_checks[str(self.output_file.parent)] = (True, time.monotonic())
             self.output_entry.delete(0, "end")
             self.output_entry.insert(0, selected_file)
 
+    def compare_with_previous(self):
+        """Diff the output file against an older global.ini, saving INI/JSON/CSV reports next to it"""
+        import ini_diff
+
+        if not self.output_file or not Path(self.output_file).exists():
+            messagebox.showerror("Error", "Extract global.ini first - the output file doesn't exist yet.")
+            return
+
+        old_file = filedialog.askopenfilename(
+            title="Compare with an older global.ini",
+            initialdir=str(Path(self.output_file).parent),
+            filetypes=[("INI Files", "*.ini"), ("All Files", "*.*")]
+        )
+        if not old_file:
+            return
+
+        try:
+            diff = ini_diff.diff_files(old_file, self.output_file)
+            reports = ini_diff.write_reports(diff, ini_diff.REPORT_FORMATS)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Compare failed:\n{e}")
+            return
+        self.status_label.configure(text=f"Compared: {ini_diff.summary(diff)}", text_color="gray")
+        messagebox.showinfo("Compare", f"{ini_diff.summary(diff)}\n\nReports saved to:\n{reports[0].parent}")
+
+    def merge_translation(self):
+        """Rebase a translated global.ini onto the extracted (new stock) file"""
+        import ini_diff
+
+        if not self.output_file or not Path(self.output_file).exists():
+            messagebox.showerror("Error", "Extract global.ini first - the output file doesn't exist yet.")
+            return
+
+        output_dir = str(Path(self.output_file).parent)
+        filetypes = [("INI Files", "*.ini"), ("All Files", "*.*")]
+        old_stock = filedialog.askopenfilename(
+            title="Old stock global.ini the translation was made from", initialdir=output_dir, filetypes=filetypes
+        )
+        if not old_stock:
+            return
+        translated = filedialog.askopenfilename(title="Translated global.ini", filetypes=filetypes)
+        if not translated:
+            return
+        default = ini_diff.merged_path(translated, self.output_file)
+        merged = filedialog.asksaveasfilename(
+            title="Save merged global.ini as",
+            initialdir=str(default.parent),
+            initialfile=default.name,
+            defaultextension=".ini",
+            filetypes=filetypes
+        )
+        if not merged:
+            return
+
+        try:
+            result = ini_diff.merge_translation(old_stock, self.output_file, translated, merged)
+            conflicts = ini_diff.write_conflicts(result)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Merge failed:\n{e}")
+            return
+        self.status_label.configure(text=f"Merged: {ini_diff.merge_summary(result)}", text_color="gray")
+        messagebox.showinfo(
+            "Merge", f"{ini_diff.merge_summary(result)}\n\nMerged file:\n{merged}\n\nConflicts:\n{conflicts}"
+        )
+
+    def open_archive_browser(self):
+        """Browse every entry of the selected installation's Data.p4k and extract any of them"""
+        if not self.selected_installation:
+            messagebox.showerror("Error", "Please select an installation first.")
+            return
+        browser = self.archive_browser
+        if browser is not None and browser.winfo_exists():
+            if browser.inst["path"] == self.selected_installation["path"]:
+                browser.deiconify()
+                browser.lift()
+                return
+            browser.destroy()
+
+        # Imported on first use - most runs never open the browser
+        import archive_browser
+        self.archive_browser = archive_browser.ArchiveBrowser(self, self.selected_installation, self.p4k_index)
+
+    def _search_folder(self):
+        output_path = self.output_entry.get().strip()
+        return Path(output_path).parent if output_path else self.exe_dir
+
+    def open_search(self):
+        """Search panel over every StockGlobal-*.ini in the output folder, across versions and branches"""
+        import search_index
+
+        if self.search_window is not None:
+            self.search_window.deiconify()
+            self.search_window.lift()
+            self.search_entry.focus_set()
+            return
+
+        window = ctk.CTkToplevel(self)
+        window.title("Search Extracted Strings")
+        window.geometry("820x520")
+        window.protocol("WM_DELETE_WINDOW", self._close_search)
+        self.search_window = window
+
+        controls = ctk.CTkFrame(window, fg_color="transparent")
+        controls.pack(fill="x", padx=15, pady=(15, 5))
+        self.search_entry = ctk.CTkEntry(controls, height=35, placeholder_text="Search text, key prefix or key pattern")
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.search_entry.bind("<KeyRelease>", lambda event: self._schedule_search())
+        self.search_mode = ctk.CTkSegmentedButton(
+            controls, values=["Text", "Key prefix", "Key pattern"], command=lambda value: self._schedule_search()
+        )
+        self.search_mode.set("Text")
+        self.search_mode.pack(side="left", padx=(0, 10))
+        self.search_branch = ctk.CTkOptionMenu(
+            controls, values=["All branches"], width=130, command=lambda value: self._schedule_search()
+        )
+        self.search_branch.pack(side="left")
+
+        self.search_status = ctk.CTkLabel(window, text="", text_color="gray", anchor="w")
+        self.search_status.pack(fill="x", padx=15)
+
+        self.search_results = ctk.CTkTextbox(window, wrap="none", font=ctk.CTkFont(family="Consolas", size=12))
+        self.search_results.pack(fill="both", expand=True, padx=15, pady=5)
+        self.search_results.configure(state="disabled")
+
+        self.search_serve_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            window,
+            text=f"Serve searches as JSON on http://127.0.0.1:{search_index.DEFAULT_PORT}/search?q=...",
+            variable=self.search_serve_var,
+            command=self._toggle_search_server
+        ).pack(anchor="w", padx=15, pady=(5, 15))
+
+        self.search_entry.focus_set()
+        self._sync_search()
+
+    def _close_search(self):
+        self.search_serve_var.set(False)
+        self._toggle_search_server()
+        self.search_window.destroy()
+        self.search_window = None
+
+    def _sync_search(self):
+        """Index files extracted since the last sync (in the background - unchanged files only cost a stat)"""
+        import search_index
+
+        if self.search_index is None:
+            self.search_index = search_index.SearchIndex(self.exe_dir / search_index.INDEX_FILENAME)
+        folder = self._search_folder()
+
+        def progress(fraction, message):
+            self.ui_events.post(lambda: self._set_search_status(message), key="search_status")
+
+        def sync():
+            try:
+                self.search_index.sync(folder, progress)
+                error = None
+            except Exception as e:
+                error = str(e)
+            self.ui_events.post(lambda: self._search_synced(error))
+
+        threading.Thread(target=sync, daemon=True).start()
+
+    def _set_search_status(self, message, color="gray"):
+        if self.search_window is not None:
+            self.search_status.configure(text=message, text_color=color)
+
+    def _search_synced(self, error):
+        if self.search_window is None:
+            return
+        if error:
+            self._set_search_status(f"Indexing failed: {error}", "#FF5555")
+            return
+        files = self.search_index.files([self._search_folder()]).values()
+        branches = sorted({info.branch for info in files})
+        self.search_branch.configure(values=["All branches"] + branches)
+        self._set_search_status(f"{len(files)} file(s) indexed in {self._search_folder()}")
+        self._run_search()
+
+    def _schedule_search(self):
+        # Typing fires a search once the keys pause, not on every keystroke
+        if self._search_pending is not None:
+            self.after_cancel(self._search_pending)
+        self._search_pending = self.after(150, self._run_search)
+
+    def _run_search(self):
+        import search_index
+
+        self._search_pending = None
+        if self.search_window is None or self.search_index is None:
+            return
+        query = self.search_entry.get()
+        mode = {"Text": "text", "Key prefix": "prefix", "Key pattern": "key"}[self.search_mode.get()]
+        branch = self.search_branch.get()
+        started = time.perf_counter()
+        try:
+            hits, more = self.search_index.search(
+                query, mode, branches=None if branch == "All branches" else [branch], limit=200,
+                folders=[self._search_folder()]
+            )
+        except sqlite3.Error as e:
+            self._set_search_status(f"Search failed: {e}", "#FF5555")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.search_results.configure(state="normal")
+        self.search_results.delete("1.0", "end")
+        self.search_results.insert("1.0", "\n".join(search_index.format_hit(hit) for hit in hits))
+        self.search_results.configure(state="disabled")
+        if query.strip():
+            self._set_search_status(f"{len(hits)}{'+' if more else ''} result(s) in {elapsed:.1f} ms")
+
+    def _toggle_search_server(self):
+        """Start or stop the localhost JSON endpoint"""
+        import search_index
+
+        if self.search_serve_var.get() and self.search_server is None:
+            try:
+                self.search_server = search_index.SearchServer(self.search_index, [self._search_folder()])
+            except OSError as e:
+                self.search_serve_var.set(False)
+                self._set_search_status(f"Could not start the server: {e}", "#FF5555")
+                return
+            threading.Thread(target=self.search_server.serve_forever, daemon=True).start()
+            self._set_search_status(f"Serving on {self.search_server.url}")
+        elif not self.search_serve_var.get() and self.search_server is not None:
+            server, self.search_server = self.search_server, None
+            # shutdown() waits for serve_forever to return, so don't block the UI on it
+            threading.Thread(target=lambda: (server.shutdown(), server.server_close()), daemon=True).start()
+
     def _scan_complete(self, installations):
         """Called when scan is complete"""
+        if self.extracting:
+            # Don't swap the list out from under a running extraction
+            self.after(500, lambda: self._scan_complete(installations))
+            return
+
         self.progress_bar.stop()
         self.progress_bar.configure(mode="determinate")
         self.progress_bar.set(0)
-        
-        self.installations = installations
+
+        # User switched to a custom path while we were refreshing - leave it alone
+        if self.custom_path_var.get():
+            return
 
         if not installations:
+            self.installations = installations
+            self.installation_dropdown.configure(values=[], state="disabled")
+            self.installation_dropdown.set("")
+            self.selected_installation = None
+            self.extract_button.configure(state="disabled")
+            self.extract_all_button.configure(state="disabled")
             self.status_label.configure(text="No Star Citizen installations found", text_color="#FF5555")
             # Prompt user to browse for custom path
             result = messagebox.askyesno(
@@ -509,15 +911,29 @@ class SCExtractorApp(ctk.CTk):
             return
 
         self.status_label.configure(text=f"Found {len(installations)} installation(s)", text_color="gray")
-        
+        if installations != self.installations:
+            self._show_installations(installations)
+
+    def _show_installations(self, installations):
+        """Fill the dropdown, keeping the current selection if it is still present"""
+        self.installations = installations
         display_values = [inst["display"] for inst in installations]
+
+        selection = display_values[0]
+        if self.selected_installation:
+            for inst in installations:
+                if inst["path"] == self.selected_installation["path"]:
+                    selection = inst["display"]
+                    break
+
         self.installation_dropdown.configure(values=display_values, state="readonly")
-        self.installation_dropdown.set(display_values[0])
+        self.installation_dropdown.set(selection)
         
-        # Trigger selection logic for the first item
-        self._on_installation_changed(display_values[0])
+        # Trigger selection logic for the chosen item
+        self._on_installation_changed(selection)
         
         self.extract_button.configure(state="normal")
+        self.extract_all_button.configure(state="normal")
 
     def start_extraction(self):
         """Start the extraction process"""
@@ -533,104 +949,263 @@ class SCExtractorApp(ctk.CTk):
             messagebox.showerror("Error", "Please enter a version number.")
             return
 
+        if self._output_name_pending is not None:
+            # A version edit is still waiting out its typing pause - apply it before extracting
+            self.update_output_filename()
         output_path = self.output_entry.get().strip()
         if not output_path:
             messagebox.showerror("Error", "Please select an output location.")
             return
 
-        # Check for unp4k.exe
-        unp4k_path = self.resource_dir / "unp4k.exe"
-        if not unp4k_path.exists():
-            messagebox.showerror("Error", f"unp4k.exe not found in {self.resource_dir}")
-            return
-
         # UI State Update
-        self.extracting = True
-        self.extract_button.configure(state="disabled", text="EXTRACTING...")
-        self.installation_dropdown.configure(state="disabled")
-        self.version_entry.configure(state="disabled")
-        self.output_entry.configure(state="disabled")
-        self.progress_bar.set(0)
-        self.status_label.configure(text="Preparing extraction...", text_color="#3B8ED0")
+        self._lock_inputs(True)
+        self.extract_button.configure(text="EXTRACTING...")
+        self.batch_frame.pack_forget()
 
         # Run in background
-        thread = threading.Thread(target=self._extract_thread, args=(version,), daemon=True)
+        all_languages = self.all_languages_var.get()
+        pattern = self.pattern_entry.get().strip()
+        skip_unchanged = self.skip_unchanged_var.get()
+        exports = self._selected_exports()
+        thread = threading.Thread(
+            target=self._extract_thread,
+            args=(version, all_languages, pattern, skip_unchanged, self.cancel_event, exports),
+            daemon=True
+        )
         thread.start()
 
-    def _extract_thread(self, version):
+    def _selected_exports(self):
+        import ini_export
+        return list(ini_export.EXPORT_FORMATS) if self.exports_var.get() else []
+
+    def _lock_inputs(self, locked):
+        """Disable the inputs while an extraction runs and re-enable them afterwards"""
+        self.extracting = locked
+        state = "disabled" if locked else "normal"
+        self.extract_button.configure(state=state, text="EXTRACT GLOBAL.INI")
+        self.extract_all_button.configure(state=state, text="Extract All Branches")
+        self.installation_dropdown.configure(state="disabled" if locked else "readonly")
+        self.version_entry.configure(state=state)
+        self.output_entry.configure(state=state)
+        self.pattern_entry.configure(state=state)
+        self.compare_btn.configure(state=state)
+        self.merge_btn.configure(state=state)
+
+        if locked:
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(0)
+            self.status_label.configure(text="Preparing extraction...", text_color="#3B8ED0")
+            self.cancel_event = threading.Event()
+            self.cancel_button.configure(state="normal", text="Cancel")
+            self.cancel_button.pack(fill="x", side="bottom", pady=(0, 10))
+        else:
+            self.cancel_event = None
+            self.cancel_button.pack_forget()
+
+    def cancel_extraction(self):
+        """Ask the running extraction to stop; partial output is removed by the worker"""
+        if self.extracting and self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.configure(state="disabled", text="Cancelling...")
+
+    def _extract_thread(self, version, all_languages=False, pattern="", skip_unchanged=False, cancel=None,
+                        exports=()):
         """Background thread for extraction"""
+        trace = diagnostics.Trace("extract")
         try:
-            self.after(0, lambda: self.progress_bar.set(0.1))
-            
-            # Create temp directory
-            temp_dir = Path(os.environ['TEMP']) / "sc_extract_temp"
-            if temp_dir.exists(): shutil.rmtree(temp_dir, ignore_errors=True)
-            temp_dir.mkdir(parents=True, exist_ok=True)
-
-            # Copy tools
-            self.after(0, lambda: self.status_label.configure(text="Setting up tools..."))
-            shutil.copy2(self.resource_dir / "unp4k.exe", temp_dir / "unp4k.exe")
-            for dll in self.resource_dir.glob("*.dll"):
-                shutil.copy2(dll, temp_dir / dll.name)
-            
-            # Copy arch dirs
-            for arch in ["x64", "x86"]:
-                src = self.resource_dir / arch
-                if src.exists():
-                    dst = temp_dir / arch
-                    if dst.exists(): shutil.rmtree(dst)
-                    shutil.copytree(src, dst)
-
-            self.after(0, lambda: self.progress_bar.set(0.3))
-            self.after(0, lambda: self.status_label.configure(text="Extracting (this may take a minute)..."))
-
-            # Run unp4k
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
-            result = subprocess.run(
-                [str(temp_dir / "unp4k.exe"), self.selected_installation["path"], "Data/Localization/english/global.ini"],
-                cwd=temp_dir,
-                capture_output=True,
-                timeout=300,
-                startupinfo=startupinfo
-            )
+            with diagnostics.activate(trace):
+                status, saved = extractor_core.extract_installation(
+                    self.selected_installation, self.output_file, version,
+                    all_languages=all_languages,
+                    pattern=pattern,
+                    incremental=skip_unchanged,
+                    index=self.p4k_index,
+                    cache=self.version_cache,
+                    resource_dir=self.resource_dir,
+                    progress=self._report_progress,
+                    cancel=cancel,
+                    exports=exports
+                )
+            if not pattern and not all_languages:
+                saved = None
+            self.ui_events.post(lambda: self._extraction_complete(
+                True, saved=saved, up_to_date=status == "up-to-date", from_cache=status == "cached"
+            ))
+
+        except extractor_core.ExtractionCancelled:
+            self.ui_events.post(lambda: self._extraction_complete(False, cancelled=True))
+        except Exception as e:
+            # e is unbound once the except block ends, so capture the message now
+            error = str(e)
+            self.ui_events.post(lambda: self._extraction_complete(False, error))
+        finally:
+            self._finish_trace(trace)
 
-            if result.returncode != 0:
-                raise Exception(f"Extraction failed: {result.stderr.decode()}")
-
-            self.after(0, lambda: self.progress_bar.set(0.8))
-            
-            # Find and save file
-            extracted = list(temp_dir.rglob("global.ini"))
-            if not extracted: raise Exception("global.ini not found in extracted files")
-            
-            self.after(0, lambda: self.status_label.configure(text="Saving file..."))
-            shutil.copy2(extracted[0], self.output_file)
-            
-            # Cleanup
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            self.after(0, lambda: self._extraction_complete(True))
+    def start_batch_extraction(self):
+        """Extract every detected installation at once, next to the current output file"""
+        if self.extracting or not self.installations: return
 
-        except Exception as e:
-            self.after(0, lambda: self._extraction_complete(False, str(e)))
+        output_path = self.output_entry.get().strip()
+        output_dir = Path(output_path).parent if output_path else self.exe_dir
+        installations = list(self.installations)
+
+        self._lock_inputs(True)
+        self.extract_all_button.configure(text="Extracting all...")
+        self.status_label.configure(text=f"Extracting {len(installations)} branches...")
+
+        # Fresh progress rows, one per branch
+        for widgets in self.batch_rows.values():
+            widgets[0].destroy()
+        self.batch_rows = {}
+        for inst in installations:
+            self.batch_rows[inst["path"]] = self._add_batch_row(inst["display"])
+        self.batch_frame.pack(fill="x", pady=(0, 10))
+
+        thread = threading.Thread(
+            target=self._batch_thread,
+            args=(installations, output_dir, self.all_languages_var.get(), self.pattern_entry.get().strip(),
+                  self.skip_unchanged_var.get(), self.cancel_event, self._selected_exports()),
+            daemon=True
+        )
+        thread.start()
+
+    def _add_batch_row(self, title):
+        """Create a progress row for one branch in the batch panel"""
+        row = ctk.CTkFrame(self.batch_frame, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text=title, width=160, anchor="w").pack(side="left")
+        bar = ctk.CTkProgressBar(row, width=160)
+        bar.pack(side="left", padx=10)
+        bar.set(0)
+        status = ctk.CTkLabel(row, text="Waiting...", text_color="gray", anchor="w")
+        status.pack(side="left", fill="x", expand=True)
+        return row, bar, status
+
+    def _update_batch_row(self, path, fraction=None, message=None, color=None):
+        widgets = self.batch_rows.get(path)
+        if widgets is None:
+            return
+        _, bar, status = widgets
+        if fraction is not None:
+            bar.set(fraction)
+        if message is not None:
+            status.configure(text=message, text_color=color or "#3B8ED0")
+
+    def _batch_thread(self, installations, output_dir, all_languages, pattern, skip_unchanged, cancel, exports):
+        """Background thread for "extract all": parallel across drives, one job at a time per drive"""
+        labels = {"up-to-date": "Up to date", "cached": "Restored from cache", "extracted": "Extracted"}
+
+        def run(inst):
+            path = inst["path"]
+
+            def progress(fraction=None, message=None):
+                # Separate keys, so a fraction-only update never swallows a pending message
+                if fraction is not None:
+                    self.ui_events.post(lambda: self._update_batch_row(path, fraction), key=("batch_bar", path))
+                if message is not None:
+                    self.ui_events.post(
+                        lambda: self._update_batch_row(path, message=message), key=("batch_status", path)
+                    )
+
+            try:
+                if cancel.is_set():
+                    raise extractor_core.ExtractionCancelled("Extraction cancelled")
+                if not inst.get("version"):
+                    raise extractor_core.ExtractionError("Version not detected")
+                output_file = output_dir / extractor_core.generate_filename(inst["version"], inst["branch"])
+                status, saved = extractor_core.extract_installation(
+                    inst, output_file,
+                    all_languages=all_languages,
+                    pattern=pattern,
+                    pattern_dir=output_dir / inst["branch"],
+                    incremental=skip_unchanged,
+                    index=self.p4k_index,
+                    cache=self.version_cache,
+                    resource_dir=self.resource_dir,
+                    progress=progress,
+                    cancel=cancel,
+                    exports=exports
+                )
+                result = (status, len(saved), None)
+                message, color = f"{labels[status]} ({len(saved)} file(s))", "#2CC985"
+            except extractor_core.ExtractionCancelled:
+                result = ("cancelled", 0, None)
+                message, color = "Cancelled", "gray"
+            except Exception as e:
+                result = ("failed", 0, str(e))
+                message, color = f"Failed: {e}", "#FF5555"
+
+            fraction = 1.0 if result[0] not in ("failed", "cancelled") else 0
+            self.ui_events.post(lambda: self._update_batch_row(path, fraction), key=("batch_bar", path))
+            self.ui_events.post(
+                lambda: self._update_batch_row(path, message=message, color=color), key=("batch_status", path)
+            )
+            return result
+
+        trace = diagnostics.Trace("extract-all")
+        with diagnostics.activate(trace):
+            results = extractor_core.run_by_drive(installations, run)
+        self._finish_trace(trace)
+        self.ui_events.post(lambda: self._batch_complete(installations, results, output_dir))
+
+    def _batch_complete(self, installations, results, output_dir):
+        """Called when every branch of an "extract all" job has finished"""
+        self._lock_inputs(False)
+
+        counts = {}
+        for status, _, _ in results:
+            counts[status] = counts.get(status, 0) + 1
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+        failures = [
+            f"{inst['display']}: {error}"
+            for inst, (status, _, error) in zip(installations, results) if status == "failed"
+        ]
 
-    def _extraction_complete(self, success, error_msg=None):
+        ok = not failures and "cancelled" not in counts
+        self.progress_bar.set(1.0 if ok else 0)
+        self.status_label.configure(
+            text=f"All branches: {summary}", text_color="#2CC985" if ok else "#FF5555"
+        )
+        if self.search_window is not None:
+            self._sync_search()
+        if failures:
+            messagebox.showerror("Error", f"{summary}\n\n" + "\n".join(failures))
+        elif "cancelled" not in counts:
+            messagebox.showinfo("Success", f"{summary}\n\nSaved to:\n{output_dir}")
+
+    def _report_progress(self, fraction=None, message=None):
+        """Forward progress from worker threads to the UI (only the latest of each per frame is drawn)"""
+        if fraction is not None:
+            self.ui_events.post(lambda: self.progress_bar.set(fraction), key="progress")
+        if message is not None:
+            self.ui_events.post(lambda: self.status_label.configure(text=message), key="status")
+
+    def _extraction_complete(self, success, error_msg=None, saved=None, up_to_date=False, from_cache=False,
+                             cancelled=False):
         """Called when extraction finishes"""
-        self.extracting = False
-        self.extract_button.configure(state="normal", text="EXTRACT GLOBAL.INI")
-        self.installation_dropdown.configure(state="readonly")
-        self.version_entry.configure(state="normal")
-        self.output_entry.configure(state="normal")
+        self._lock_inputs(False)
+        if success and self.search_window is not None:
+            self._sync_search()
 
-        if success:
+        if success and up_to_date:
             self.progress_bar.set(1.0)
-            self.status_label.configure(text="Extraction Complete!", text_color="#2CC985")
-            messagebox.showinfo("Success", f"File saved to:\n{self.output_file}")
+            self.status_label.configure(text=f"Up to date: {Path(self.output_file).name}", text_color="#2CC985")
+        elif success:
+            self.progress_bar.set(1.0)
+            status = "Restored from cache!" if from_cache else "Extraction Complete!"
+            self.status_label.configure(text=status, text_color="#2CC985")
+            if not saved and self.selected_installation and not self.selected_installation.get("cached"):
+                self._mark_cached(self.selected_installation)
+                self.installation_dropdown.configure(values=[inst["display"] for inst in self.installations])
+                self.installation_dropdown.set(self.selected_installation["display"])
+            if saved:
+                messagebox.showinfo("Success", f"{len(saved)} file(s) saved to:\n{Path(self.output_file).parent}")
+            else:
+                messagebox.showinfo("Success", f"File saved to:\n{self.output_file}")
+        elif cancelled:
+            self.progress_bar.set(0)
+            self.status_label.configure(text="Extraction Cancelled", text_color="gray")
         else:
             self.progress_bar.set(0)
             self.status_label.configure(text="Extraction Failed", text_color="#FF5555")
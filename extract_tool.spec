@@ -1,20 +1,21 @@
 # -*- mode: python ; coding: utf-8 -*-
 import os
+import sys
 
 block_cipher = None
 
-# Add unp4k.exe and dependencies as data files
+# unp4k.exe, its DLLs and the x64/x86 folders go in as one stored zip: the onefile
+# bootstrap then unpacks a single file per launch, and tool_cache stages the tools
+# themselves only when an extraction first needs them
+sys.path.insert(0, SPECPATH)
+import tool_cache
+
+tool_cache.pack_tools(SPECPATH, os.path.join(SPECPATH, tool_cache.TOOLS_ARCHIVE))
 added_files = [
-    ('unp4k.exe', '.'),
-    ('*.dll', '.'),
-    ('x64', 'x64'),
+    (tool_cache.TOOLS_ARCHIVE, '.'),
     ('version.txt', '.'),
 ]
 
-# Add x86 folder only if it exists (optional)
-if os.path.exists('x86'):
-    added_files.append(('x86', 'x86'))
-
 a = Analysis(
     ['extract_tool.py'],
     pathex=[],
@@ -55,3 +56,45 @@ exe = EXE(
     icon=None,  # Add icon file here if you have one
     version='version_info.txt',  # Version info for EXE Details tab (generated by GitHub Actions)
 )
+
+# Headless command line build - never pulls in tkinter/customtkinter
+cli_a = Analysis(
+    ['extract_cli.py'],
+    pathex=[],
+    binaries=[],
+    datas=added_files,
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter', 'customtkinter'],
+    win_no_prefer_redirects=False,
+    win_private_assemblies=False,
+    cipher=block_cipher,
+    noarchive=False,
+)
+
+cli_pyz = PYZ(cli_a.pure, cli_a.zipped_data, cipher=block_cipher)
+
+cli_exe = EXE(
+    cli_pyz,
+    cli_a.scripts,
+    cli_a.binaries,
+    cli_a.zipfiles,
+    cli_a.datas,
+    [],
+    name='SC_GlobalIni_Extractor_CLI',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=None,
+    version='version_info.txt',
+)
@@ -0,0 +1,840 @@
+"""
+Star Citizen Global.ini Extractor - Core
+GUI-free installation discovery, version detection and extraction logic
+shared by the desktop app and the command line interface
+"""
+
+import json
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import diagnostics
+import ini_check
+import p4k_reader
+import p4k_index
+import p4k_glob
+import tool_cache
+import version_cache
+
+# ini_export, subprocess and concurrent.futures are imported where they are used: the GUI
+# imports this module before its first frame, and most runs need none of them
+
+
+BRANCHES = ["LIVE", "PTU", "EPTU", "HOTFIX", "TECH-PREVIEW"]
+
+COMMON_ROOTS = [
+    r"C:\Program Files\Roberts Space Industries\StarCitizen",
+    r"D:\Program Files\Roberts Space Industries\StarCitizen",
+    r"E:\Program Files\Roberts Space Industries\StarCitizen",
+    r"F:\Program Files\Roberts Space Industries\StarCitizen",
+    r"C:\Games\Roberts Space Industries\StarCitizen",
+    r"D:\Games\Roberts Space Industries\StarCitizen",
+    r"E:\Games\Roberts Space Industries\StarCitizen",
+    r"F:\Games\Roberts Space Industries\StarCitizen",
+    r"C:\RSI\StarCitizen",
+    r"D:\RSI\StarCitizen",
+    r"E:\RSI\StarCitizen",
+    r"F:\RSI\StarCitizen"
+]
+
+INSTALL_CACHE_FILENAME = "installations_cache.json"
+
+# Seconds to wait for all roots before giving up on slow (sleeping/disconnected) drives
+PROBE_TIMEOUT = 5.0
+
+
+class ExtractionError(Exception):
+    """Raised when global.ini (or other entries) cannot be extracted"""
+
+
+def get_app_dirs():
+    """Return (resource_dir, exe_dir) for bundled tools and output files"""
+    if getattr(sys, 'frozen', False):
+        # Running as compiled EXE - use PyInstaller's temp folder for resources
+        return Path(sys._MEIPASS), Path(sys.executable).parent
+    # Running as .py script
+    return Path(__file__).parent, Path(__file__).parent
+
+
+def open_index(exe_dir):
+    """Return the persistent archive index stored next to the exe"""
+    return p4k_index.P4kIndex(Path(exe_dir) / p4k_index.INDEX_FILENAME)
+
+
+def open_version_cache(exe_dir, limit_bytes=version_cache.DEFAULT_LIMIT_BYTES):
+    """Return the store of previously extracted global.ini versions next to the exe"""
+    return version_cache.VersionCache(Path(exe_dir) / version_cache.CACHE_DIRNAME, limit_bytes)
+
+
+def _report(progress, fraction=None, message=None):
+    if progress is not None:
+        progress(fraction, message)
+
+
+# --- Installations & versions ---
+
+def detect_version(installation_path):
+    """Detect Star Citizen version from the build manifest, falling back to log files"""
+    try:
+        branch_folder = Path(installation_path).parent
+        version = _cached_version(branch_folder / "build_manifest.id", extract_version_from_manifest)
+        if version: return version
+
+        # Try Game.log first
+        version = _cached_version(branch_folder / "Game.log", extract_version_from_log)
+        if version: return version
+
+        # Try the newest log in logbackups (scandir reuses the directory listing's stat data on Windows)
+        latest_log = None
+        with os.scandir(branch_folder / "logbackups") as it:
+            for entry in it:
+                if entry.name.startswith("Game") and entry.name.endswith(".log") and entry.is_file():
+                    mtime = entry.stat().st_mtime_ns
+                    if latest_log is None or mtime > latest_log[0]:
+                        latest_log = (mtime, entry.path)
+        if latest_log:
+            version = _cached_version(Path(latest_log[1]), extract_version_from_log)
+            if version: return version
+    except Exception:
+        pass
+    return None
+
+
+_VERSION_CACHE = {}
+
+
+def _cached_version(path, extractor):
+    """Run extractor on path once per (path, size, mtime)"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    if key not in _VERSION_CACHE:
+        _VERSION_CACHE[key] = extractor(path)
+    return _VERSION_CACHE[key]
+
+
+_MANIFEST_VERSION = re.compile(r'(\d+\.\d+\.\d+)')
+
+# "GameVersion: 4.4.0-PTU.12345", "Version 4.4.0" / "v4.4.0", "Star Citizen Alpha 4.4.0"
+_LOG_VERSION = re.compile(
+    r'GameVersion[:\s]+(?P<game>\d+\.\d+\.?\d*)'
+    r'|Version\s+v?(?P<plain>\d+\.\d+\.?\d*)'
+    r'|Star Citizen Alpha\s+(?P<alpha>\d+\.\d+\.?\d*)',
+    re.IGNORECASE
+)
+
+# Version lines sit in the log header - no need to read past it
+LOG_HEADER_BYTES = 64 * 1024
+
+
+def extract_version_from_manifest(manifest_path):
+    """Extract version number from the launcher's build_manifest.id"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+            data = json.load(f).get("Data", {})
+        # "Version": "4.4.0.9876543" is preferred, "Branch": "sc-alpha-4.4.0" otherwise
+        for key in ("Version", "Branch"):
+            match = _MANIFEST_VERSION.search(str(data.get(key, "")))
+            if match: return match.group(1)
+    except Exception:
+        pass
+    return None
+
+
+def extract_version_from_log(log_path):
+    """Extract version number from the header of a log file"""
+    try:
+        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
+            header = f.read(LOG_HEADER_BYTES)
+        for match in _LOG_VERSION.finditer(header):
+            version = match.group("game") or match.group("alpha")
+            if version: return version
+            version = match.group("plain")
+            if version.startswith(('3.', '4.')): return version
+    except Exception:
+        pass
+    return None
+
+
+@diagnostics.traced("scan_root")
+def scan_root(root, known=None):
+    """Find branch installations (LIVE, PTU, ...) below a single StarCitizen folder
+
+    known maps Data.p4k paths to previously discovered installations; their version
+    is reused when the archive's size and mtime are unchanged.
+    """
+    installations = []
+    root_path = Path(root)
+    for branch in BRANCHES:
+        data_p4k = root_path / branch / "Data.p4k"
+        try:
+            st = data_p4k.stat()
+        except OSError:
+            continue
+
+        cached = (known or {}).get(str(data_p4k))
+        if (cached and cached.get("version") and cached.get("size") == st.st_size
+                and cached.get("mtime") == st.st_mtime_ns):
+            detected_version = cached["version"]
+        else:
+            with diagnostics.span("detect_version", branch=branch):
+                detected_version = detect_version(str(data_p4k))
+        # Show version if detected, otherwise just show branch name
+        display_text = f"{branch} ({detected_version})" if detected_version else branch
+        installations.append({
+            "branch": branch,
+            "path": str(data_p4k),
+            "display": display_text,
+            "version": detected_version,
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns
+        })
+    return installations
+
+
+@diagnostics.traced("find_installations")
+def find_installations(known=None, timeout=PROBE_TIMEOUT):
+    """Find all Star Citizen installations, probing every root concurrently
+
+    Roots that don't answer within timeout (sleeping HDDs, dead network drives)
+    are skipped rather than stalling the whole scan.
+    """
+    results = [None] * len(COMMON_ROOTS)
+    trace = diagnostics.current()
+
+    def probe(i, root):
+        with diagnostics.activate(trace), diagnostics.span("probe_root", root=root):
+            try:
+                if Path(root).exists():
+                    results[i] = scan_root(root, known)
+            except OSError:
+                pass
+
+    # Daemon threads so a probe stuck on a dead drive can't block exit
+    threads = [
+        threading.Thread(target=probe, args=(i, root), daemon=True)
+        for i, root in enumerate(COMMON_ROOTS)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    installations = []
+    for root, thread, found in zip(COMMON_ROOTS, threads, list(results)):
+        if thread.is_alive():
+            # Drive didn't answer in time - keep (copies of) what we knew about it;
+            # the caller's dicts stay its own
+            installations.extend(
+                dict(inst) for inst in (known or {}).values()
+                if str(Path(inst["path"]).parent.parent) == str(Path(root))
+            )
+        elif found:
+            installations.extend(found)
+    return installations
+
+
+def load_installation_cache(cache_path):
+    """Return the installations saved by the last scan (without touching any drive)"""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            installations = json.load(f)
+        if isinstance(installations, list):
+            return [inst for inst in installations if isinstance(inst, dict) and "path" in inst]
+    except (OSError, ValueError):
+        pass
+    return []
+
+
+def save_installation_cache(cache_path, installations):
+    """Persist discovered installations for instant display on next launch"""
+    try:
+        _write_json(cache_path, installations)
+    except OSError:
+        pass
+
+
+def _write_json(path, data):
+    """Write JSON through a temp file so readers never see a half-written file"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def generate_filename(version, branch="LIVE"):
+    """Generate filename based on version and branch"""
+    version_formatted = version.replace(".", "-") if version else "0-0-0"
+    return f"StockGlobal-{version_formatted}-{branch}.ini"
+
+
+def localization_output_path(output_file, entry_name):
+    """Map Data/Localization/<language>/... to a language-named path next to the output file"""
+    parts = entry_name[len(p4k_reader.LOCALIZATION_PREFIX):].split("/")
+    if len(parts) < 2:
+        return None
+    language, relative = parts[0], parts[1:]
+    output = Path(output_file)
+    stem = f"{output.stem}-{language}"
+    if relative == ["global.ini"]:
+        return output.with_name(stem + output.suffix)
+    return p4k_glob.output_path(output.parent / stem, "/".join(relative))
+
+
+# --- Archive lookups ---
+
+def _ensure_index(archive, index, progress):
+    """Build the index if needed, returning None when it is unavailable"""
+    if index is None:
+        return None
+    try:
+        with diagnostics.span("index") as span:
+            span["hit"] = index.is_indexed(archive.path)
+            if not span["hit"]:
+                _report(progress, message="Indexing archive (once per patch)...")
+            index.ensure(archive)
+        return index
+    except sqlite3.Error:
+        # Index location not writable or corrupt - scan the archive directly
+        return None
+
+
+def find_entry(archive, name, index=None, progress=None):
+    """Look up an entry through the persistent index, falling back to a direct scan"""
+    index = _ensure_index(archive, index, progress)
+    if index is None:
+        return archive.find_entry(name)
+    return index.find_entry(archive, name)
+
+
+def find_prefix(archive, prefix, index=None, progress=None):
+    """List entries under a prefix through the persistent index, falling back to a direct scan"""
+    index = _ensure_index(archive, index, progress)
+    if index is None:
+        return archive.find_prefix(prefix)
+    return index.find_prefix(archive, prefix)
+
+
+# --- Sidecar manifests ---
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(output_file):
+    """Return the sidecar manifest path for an extracted file"""
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + MANIFEST_SUFFIX)
+
+
+def read_manifest(output_file):
+    """Return the sidecar manifest for an extracted file, or None"""
+    try:
+        with open(manifest_path(output_file), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+@diagnostics.traced("write_manifest")
+def write_manifest(output_file, p4k_path, entry_name, crc, size, verification=None):
+    """Record where an extracted file came from, for later up-to-date checks
+
+    verification is the ini_check report (checksums and INI structure) from the
+    pass that wrote the file.
+    """
+    source_path, source_size, source_mtime_ns = p4k_index.fingerprint(p4k_path)
+    st = os.stat(output_file)
+    manifest = {
+        "source": {"path": source_path, "size": source_size, "mtime_ns": source_mtime_ns},
+        "entry": {"name": entry_name, "crc": crc, "size": size},
+        "output": {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    }
+    if verification is not None:
+        manifest["verification"] = verification
+    _write_json(manifest_path(output_file), manifest)
+
+
+@diagnostics.traced("up_to_date_check")
+def is_up_to_date(p4k_path, output_file, index=None):
+    """Check whether output_file already holds the archive's current global.ini
+
+    Matching archive and output fingerprints answer without opening Data.p4k; if
+    only the archive was touched, the entry's stored CRC and size decide.
+    """
+    manifest = read_manifest(output_file)
+    if manifest is None:
+        return False
+    try:
+        st = os.stat(output_file)
+        source = manifest["source"]
+        recorded_entry = manifest["entry"]
+        if (st.st_size, st.st_mtime_ns) != (manifest["output"]["size"], manifest["output"]["mtime_ns"]):
+            return False
+        if p4k_index.fingerprint(p4k_path) == (source["path"], source["size"], source["mtime_ns"]):
+            return True
+
+        with p4k_reader.P4kArchive(p4k_path) as archive:
+            entry = find_entry(archive, p4k_reader.GLOBAL_INI_ENTRY, index)
+        if entry is None or (entry.crc, entry.uncompressed_size) != (recorded_entry["crc"], recorded_entry["size"]):
+            return False
+    except (OSError, KeyError, TypeError, p4k_reader.P4kError, sqlite3.Error):
+        # A locked or unreadable index just means extracting again
+        return False
+
+    # Same content, new archive fingerprint - remember it so the next check is instant
+    try:
+        write_manifest(
+            output_file, p4k_path, entry.name, entry.crc, entry.uncompressed_size, manifest.get("verification")
+        )
+    except OSError:
+        pass
+    return True
+
+
+# --- Version cache ---
+
+@diagnostics.traced("cache_restore")
+def restore_from_cache(cache, branch, version, p4k_path, output_file):
+    """Serve global.ini from the version cache without touching the archive, if possible"""
+    record = cache.lookup(branch, version, p4k_path)
+    if record is None:
+        return False
+    check = ini_check.IniCheck()
+    try:
+        cache.restore(record, output_file, on_chunk=check.feed)
+        write_manifest(
+            output_file, p4k_path, p4k_reader.GLOBAL_INI_ENTRY, record["crc"], record["size"], check.report()
+        )
+    except (OSError, sqlite3.Error, EOFError, ValueError, zlib.error):
+        # Truncated or damaged blob (e.g. a crash mid-write) - extract from the archive instead
+        return False
+    return True
+
+
+@diagnostics.traced("cache_store")
+def add_to_cache(cache, branch, version, p4k_path, output_file):
+    """Keep a compressed copy of a freshly extracted global.ini (best effort)"""
+    manifest = read_manifest(output_file)
+    if manifest is None:
+        return
+    try:
+        cache.store(branch, version, p4k_path, manifest["entry"]["crc"], output_file)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+# --- Extraction ---
+
+ExtractionCancelled = p4k_reader.ExtractionCancelled
+
+
+class ProgressMeter:
+    """Turns decompressed byte counts into progress, throughput and ETA reports
+
+    Safe to feed from several worker threads; reports are throttled to interval seconds.
+    """
+
+    def __init__(self, total_bytes, progress, label, start=0.3, span=0.7, interval=0.1):
+        self.total_bytes = max(total_bytes, 1)
+        self.progress = progress
+        self.label = label
+        self.start = start
+        self.span = span
+        self.interval = interval
+        self.done_bytes = 0
+        self._started = time.monotonic()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.done_bytes += count
+            now = time.monotonic()
+            if now - self._last_report < self.interval and self.done_bytes < self.total_bytes:
+                return
+            self._last_report = now
+            fraction, message = self._snapshot(now)
+        _report(self.progress, fraction, message)
+
+    def _snapshot(self, now):
+        elapsed = max(now - self._started, 1e-6)
+        rate = self.done_bytes / elapsed
+        remaining = max(self.total_bytes - self.done_bytes, 0)
+        eta = remaining / rate if rate else 0.0
+        fraction = self.start + self.span * min(self.done_bytes / self.total_bytes, 1.0)
+        message = (
+            f"{self.label} {self.done_bytes / 1e6:.1f} / {self.total_bytes / 1e6:.1f} MB"
+            f" - {rate / 1e6:.1f} MB/s, ETA {eta:.0f}s"
+        )
+        return fraction, message
+
+
+def _extract_jobs(archive, jobs, progress, cancel=None):
+    """Run extraction jobs in parallel, reporting byte-level and per-file progress"""
+    total = len(jobs)
+    meter = ProgressMeter(sum(entry.uncompressed_size for entry, _ in jobs), progress, f"Extracting {total} files:")
+    done = []
+
+    def on_done(entry):
+        done.append(entry)
+        meter.label = f"Extracted {len(done)}/{total} files:"
+
+    _report(progress, 0.3)
+    with diagnostics.span("decompress", files=total) as span:
+        span["bytes_read"] = sum(entry.compressed_size for entry, _ in jobs)
+        archive.extract_many(jobs, on_done=on_done, on_bytes=meter.add, cancel=cancel)
+        span["bytes_written"] = meter.done_bytes
+    return [dest for _, dest in jobs]
+
+
+@diagnostics.traced("extract_global_ini")
+def extract_global_ini(p4k_path, output_file, index=None, resource_dir=None, progress=None, cancel=None, exports=()):
+    """Extract global.ini natively, falling back to unp4k for entries the reader can't decode
+
+    exports lists extra formats (see ini_export) built from the same decompression stream,
+    which also feeds the checksums and INI check recorded in the manifest.
+    """
+    _report(progress, 0.1, "Reading archive directory...")
+    with p4k_reader.P4kArchive(p4k_path) as archive:
+        entry = find_entry(archive, p4k_reader.GLOBAL_INI_ENTRY, index, progress)
+        if entry is None:
+            raise ExtractionError("global.ini not found in Data.p4k")
+
+        _report(progress, 0.3, "Extracting global.ini...")
+        meter = ProgressMeter(entry.uncompressed_size, progress, "Extracting global.ini:")
+        check, exporter, on_chunk = _stream_consumers(output_file, exports)
+        try:
+            with diagnostics.span("decompress", method=entry.method) as span:
+                span["bytes_read"] = entry.compressed_size
+                span["bytes_written"] = archive.extract(
+                    entry, output_file, on_bytes=meter.add, cancel=cancel, on_chunk=on_chunk
+                )
+        except p4k_reader.UnsupportedEntryError:
+            # Entry uses something the native reader can't decode - let unp4k handle it
+            if resource_dir is None:
+                raise
+            check, exporter, on_chunk = _stream_consumers(output_file, exports)
+            extract_with_unp4k(p4k_path, output_file, resource_dir, progress, cancel, entry, on_chunk)
+        except p4k_reader.ChecksumError as e:
+            raise ExtractionError(f"{e} - Data.p4k may be damaged, try verifying the game files")
+
+    verification = check.report()
+    if verification["problems"]:
+        _report(progress, message=f"Saved, but global.ini looks wrong: {'; '.join(verification['problems'])}")
+    write_manifest(output_file, p4k_path, entry.name, entry.crc, entry.uncompressed_size, verification)
+    saved = [Path(output_file)]
+    if exporter:
+        with diagnostics.span("export", formats=",".join(exports)):
+            saved.extend(exporter.finish(_export_meta(p4k_path, entry)))
+    return saved
+
+
+def _stream_consumers(output_file, exports):
+    """The checker and optional exporter fed by one extraction pass, plus the on_chunk feeding both"""
+    check = ini_check.IniCheck()
+    if not exports:
+        return check, None, check.feed
+    import ini_export
+    exporter = ini_export.IniExporter(output_file, exports)
+
+    def on_chunk(chunk):
+        check.feed(chunk)
+        exporter.feed(chunk)
+
+    return check, exporter, on_chunk
+
+
+def _export_meta(p4k_path, entry):
+    return {"source": str(p4k_path), "entry": entry.name, "crc": entry.crc}
+
+
+def ensure_exports(output_file, exports):
+    """Bring exports of an existing INI (up to date or restored from cache) in line with it"""
+    if not exports:
+        return []
+    import ini_export
+    if ini_export.is_current(output_file, exports):
+        return [ini_export.export_path(output_file, fmt) for fmt in exports]
+    manifest = read_manifest(output_file) or {}
+    meta = {
+        "source": manifest.get("source", {}).get("path", ""),
+        "entry": manifest.get("entry", {}).get("name", ""),
+        "crc": manifest.get("entry", {}).get("crc", "")
+    }
+    with diagnostics.span("export", formats=",".join(exports)):
+        return ini_export.export_file(output_file, exports, meta)
+
+
+@diagnostics.traced("extract_all_languages")
+def extract_all_languages(p4k_path, output_file, index=None, progress=None, cancel=None):
+    """Extract every Data/Localization file in one directory pass, decompressing in parallel"""
+    _report(progress, 0.1, "Reading archive directory...")
+    with p4k_reader.P4kArchive(p4k_path) as archive:
+        entries = find_prefix(archive, p4k_reader.LOCALIZATION_PREFIX, index, progress)
+        if not entries:
+            raise ExtractionError("No localization files found in Data.p4k")
+
+        jobs = []
+        for entry in entries:
+            dest = localization_output_path(output_file, entry.name)
+            if dest is not None:
+                jobs.append((entry, dest))
+        return _extract_jobs(archive, jobs, progress, cancel)
+
+
+@diagnostics.traced("extract_pattern")
+def extract_pattern(p4k_path, pattern, dest_dir, index=None, progress=None, cancel=None):
+    """Extract every entry matching a glob pattern, keeping archive paths below dest_dir"""
+    _report(progress, 0.1, "Reading archive directory...")
+    with p4k_reader.P4kArchive(p4k_path) as archive:
+        entries = p4k_glob.glob_archive(archive, pattern, _ensure_index(archive, index, progress))
+        if not entries:
+            raise ExtractionError(f"No files in Data.p4k match {pattern}")
+
+        jobs = [(entry, p4k_glob.output_path(dest_dir, entry.name)) for entry in entries]
+        return _extract_jobs(archive, jobs, progress, cancel)
+
+
+@diagnostics.traced("extract_entries")
+def extract_entries(p4k_path, names, dest_dir, index=None, progress=None, cancel=None):
+    """Extract chosen files and whole folders (archive paths), keeping archive paths below dest_dir"""
+    _report(progress, 0.1, "Reading archive directory...")
+    with p4k_reader.P4kArchive(p4k_path) as archive:
+        entries = {}
+        for name in names:
+            entry = find_entry(archive, name, index, progress)
+            if entry is not None:
+                found = [entry]
+            else:
+                found = [
+                    entry for entry in find_prefix(archive, name.rstrip("/") + "/", index, progress)
+                    if not entry.name.endswith("/")
+                ]
+            if not found:
+                raise ExtractionError(f"{name} is not in Data.p4k")
+            entries.update((entry.name, entry) for entry in found)
+
+        jobs = [(entry, p4k_glob.output_path(dest_dir, entry.name)) for entry in entries.values()]
+        return _extract_jobs(archive, jobs, progress, cancel)
+
+
+# --- Batch extraction ---
+
+DEFAULT_BATCH_WORKERS = 4
+
+
+@diagnostics.traced("extract_installation")
+def extract_installation(inst, output_file, version=None, all_languages=False, pattern=None, pattern_dir=None,
+                         incremental=False, index=None, cache=None, resource_dir=None, progress=None, cancel=None,
+                         exports=()):
+    """Extract one installation, trying the cheap paths first
+
+    Returns (status, saved files) where status is "up-to-date", "cached" or "extracted".
+    exports only applies to single global.ini extractions.
+    """
+    version = version or inst.get("version")
+    single_file = not pattern and not all_languages
+    if single_file and incremental and is_up_to_date(inst["path"], output_file, index):
+        return "up-to-date", [Path(output_file)] + ensure_exports(output_file, exports)
+    if single_file and cache is not None and restore_from_cache(cache, inst["branch"], version, inst["path"], output_file):
+        return "cached", [Path(output_file)] + ensure_exports(output_file, exports)
+
+    if pattern:
+        saved = extract_pattern(
+            inst["path"], pattern, pattern_dir or Path(output_file).parent, index, progress, cancel
+        )
+    elif all_languages:
+        saved = extract_all_languages(inst["path"], output_file, index, progress, cancel)
+    else:
+        saved = extract_global_ini(inst["path"], output_file, index, resource_dir, progress, cancel, exports)
+        if cache is not None:
+            add_to_cache(cache, inst["branch"], version, inst["path"], output_file)
+    return "extracted", saved
+
+
+def drive_key(path):
+    """Identify the device a file lives on, so jobs sharing a disk can be serialized
+
+    Uses the volume's device number, falling back to the drive letter or root.
+    """
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        drive, _ = os.path.splitdrive(os.path.abspath(path))
+        return drive.upper() or os.sep
+
+
+def run_by_drive(items, run, max_workers=DEFAULT_BATCH_WORKERS, key=None):
+    """Call run(item) for every item, in parallel across drives but one at a time per drive
+
+    Two branches on one HDD would only thrash its head between archives, while
+    branches on different drives don't compete. Results come back in input order.
+    """
+    key = key or (lambda item: drive_key(item["path"]))
+    groups = {}
+    for i, item in enumerate(items):
+        groups.setdefault(key(item), []).append(i)
+    results = [None] * len(items)
+
+    trace = diagnostics.current()
+
+    def run_group(positions):
+        with diagnostics.activate(trace):
+            for i in positions:
+                results[i] = run(items[i])
+
+    if not groups:
+        return results
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as pool:
+        for future in [pool.submit(run_group, positions) for positions in groups.values()]:
+            future.result()
+    return results
+
+
+_TOOL_CACHES = {}
+
+
+def get_tool_cache(resource_dir):
+    """Return the per-process tool cache for a resource folder"""
+    key = str(resource_dir)
+    if key not in _TOOL_CACHES:
+        _TOOL_CACHES[key] = tool_cache.ToolCache(resource_dir)
+    return _TOOL_CACHES[key]
+
+
+UNP4K_TIMEOUT = 300
+
+
+def extract_with_unp4k(p4k_path, output_file, resource_dir, progress=None, cancel=None, entry=None, on_chunk=None):
+    """Extract global.ini by running the bundled unp4k.exe
+
+    With the archive's entry, unp4k's output is checked against its size and
+    CRC32 before it replaces output_file; on_chunk sees the output in that same read.
+    """
+    # Tools are staged once per version into a persistent folder shared by all runs
+    _report(progress, message="Setting up tools...")
+    try:
+        with diagnostics.span("stage_tools"):
+            tools_dir = get_tool_cache(resource_dir).ensure()
+    except FileNotFoundError as e:
+        raise ExtractionError(str(e))
+
+    # Each run gets its own working folder so concurrent extractions can't collide. It
+    # lives next to the output so the result is moved into place by a rename, not copied
+    output_file = Path(output_file)
+    work_dir = Path(tempfile.mkdtemp(prefix=".sc_extract_", dir=output_file.parent))
+    try:
+        _report(progress, 0.3, "Extracting (this may take a minute)...")
+        with diagnostics.span("unp4k"):
+            returncode, output = _run_unp4k(
+                [str(tools_dir / "unp4k.exe"), str(p4k_path), p4k_reader.GLOBAL_INI_ENTRY],
+                work_dir, progress, cancel
+            )
+        if returncode != 0:
+            raise ExtractionError(f"Extraction failed: {''.join(output[-20:])}")
+
+        _report(progress, 0.8)
+
+        # unp4k mirrors the archive path below its working folder
+        with diagnostics.span("locate_output"):
+            extracted = work_dir.joinpath(*p4k_reader.GLOBAL_INI_ENTRY.split("/"))
+            if not extracted.is_file():
+                extracted = next(work_dir.rglob("global.ini"), None)
+        if extracted is None: raise ExtractionError("global.ini not found in extracted files")
+
+        if entry is not None or on_chunk is not None:
+            with diagnostics.span("verify_output"):
+                crc, size = _read_through(extracted, on_chunk)
+            if entry is not None and (size != entry.uncompressed_size or (entry.crc and crc != entry.crc)):
+                raise ExtractionError(
+                    f"unp4k produced a damaged global.ini ({size} bytes, CRC {crc:08x}; the archive has "
+                    f"{entry.uncompressed_size} bytes, CRC {entry.crc:08x}) - the previous output was kept"
+                )
+
+        _report(progress, message="Saving file...")
+        with diagnostics.span("move_output") as span:
+            with open(extracted, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(extracted, output_file)
+            span["bytes_written"] = os.path.getsize(output_file)
+    finally:
+        # Cleanup
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _read_through(path, on_chunk=None):
+    """Return (crc32, size) of a file, handing each chunk to on_chunk as it is read"""
+    crc = 0
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+    return crc, size
+
+
+def _run_unp4k(args, work_dir, progress, cancel):
+    """Run unp4k, streaming its output into progress reports; kills it on cancel or timeout"""
+    import subprocess
+
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+
+    proc = subprocess.Popen(
+        args,
+        cwd=work_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        startupinfo=startupinfo
+    )
+    lines = queue.Queue()
+
+    def read_output():
+        for raw in proc.stdout:
+            lines.put(raw.decode(errors="replace"))
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    output = []
+    started = time.monotonic()
+    try:
+        while reader.is_alive() or not lines.empty():
+            try:
+                line = lines.get(timeout=0.1)
+                output.append(line)
+                if line.strip():
+                    _report(progress, message=f"unp4k: {line.strip()[-80:]}")
+            except queue.Empty:
+                elapsed = time.monotonic() - started
+                _report(progress, message=f"Extracting with unp4k... {elapsed:.0f}s")
+            if cancel is not None and cancel.is_set():
+                raise ExtractionCancelled("Extraction cancelled")
+            if time.monotonic() - started > UNP4K_TIMEOUT:
+                raise ExtractionError(f"unp4k did not finish within {UNP4K_TIMEOUT}s")
+        return proc.wait(), output
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
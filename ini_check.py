@@ -0,0 +1,170 @@
+"""
+Global.ini Verification
+Checksums and a structural check of global.ini, built from the decompressed chunks as they are written
+"""
+
+import codecs
+import hashlib
+import zlib
+
+
+MAX_EXAMPLES = 10
+
+_BOM = b"\xef\xbb\xbf"
+_CHUNK_SIZE = 1024 * 1024
+
+
+class IniCheck:
+    """CRC32, SHA-256 and line statistics for one global.ini, fed chunk by chunk
+
+    Pass feed as (part of) the extractor's on_chunk callback and call report()
+    once the stream ends - the output file is never read back.
+    """
+
+    def __init__(self):
+        self.crc = 0
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decode_error = None
+        self.bom = False
+        self._started = False
+        self._tail = b""
+        self._keys = set()
+        self.lines = 0
+        self.keys = 0
+        self.comments = 0
+        self.blank = 0
+        self.crlf = 0
+        self.malformed_lines = []
+        self.malformed = 0
+        self.duplicate_keys = []
+        self.duplicates = 0
+        self.final_newline = True
+
+    def feed(self, chunk):
+        self.crc = zlib.crc32(chunk, self.crc)
+        self._sha256.update(chunk)
+        if self.decode_error is None:
+            try:
+                self._decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                self.decode_error = f"invalid UTF-8 at byte {self.size + e.start}"
+        self.size += len(chunk)
+
+        data = self._tail + bytes(chunk)
+        if not self._started:
+            if len(data) < len(_BOM) and _BOM.startswith(data):
+                self._tail = data
+                return
+            if data.startswith(_BOM):
+                self.bom = True
+                data = data[len(_BOM):]
+            self._started = True
+        lines = data.split(b"\n")
+        self._tail = lines.pop()
+        if lines:
+            self.crlf += data.count(b"\r\n", 0, len(data) - len(self._tail))
+            self._lines(lines)
+
+    def feed_file(self, path, on_chunk=None):
+        """Check a file already on disk, passing each chunk on to on_chunk as well"""
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                self.feed(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+
+    def _lines(self, lines):
+        """Classify a batch of complete lines; key=value lines (nearly all of them) take the fast path"""
+        first = self.lines
+        self.lines += len(lines)
+        parts = [raw.partition(b"=") for raw in lines]
+        keys = [key.strip() for key, sep, _ in parts if sep and key[:1] not in b";#"]
+
+        if len(keys) < len(lines):
+            for number, (key, sep, _) in enumerate(parts, first + 1):
+                if sep and key[:1] not in b";#":
+                    continue
+                stripped = lines[number - first - 1].strip()
+                if not stripped:
+                    self.blank += 1
+                elif stripped[:1] in b";#":
+                    self.comments += 1
+                else:
+                    self._malformed(number)
+        if b"" in keys:
+            # " =value": an '=' but no key in front of it
+            for number, (key, sep, _) in enumerate(parts, first + 1):
+                if sep and key[:1] not in b";#" and not key.strip():
+                    self._malformed(number)
+            keys = [key for key in keys if key]
+
+        batch = set(keys)
+        repeated = batch & self._keys
+        duplicates = len(keys) - len(batch) + len(repeated)
+        if duplicates:
+            self.duplicates += duplicates
+            if len(self.duplicate_keys) < MAX_EXAMPLES:
+                seen = set()
+                for key in keys:
+                    if key in seen or key in repeated:
+                        self.duplicate_keys.append(key.decode("utf-8", "replace"))
+                        if len(self.duplicate_keys) == MAX_EXAMPLES:
+                            break
+                    seen.add(key)
+        self._keys |= batch
+        self.keys += len(batch) - len(repeated)
+
+    def _malformed(self, number):
+        self.malformed += 1
+        if len(self.malformed_lines) < MAX_EXAMPLES:
+            self.malformed_lines.append(number)
+
+    def report(self):
+        """Finish the stream and return the verification record for the manifest"""
+        if self._tail:
+            self.final_newline = False
+            self.crlf += self._tail.endswith(b"\r")
+            self._lines([self._tail])
+            self._tail = b""
+        if self.decode_error is None:
+            try:
+                self._decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                self.decode_error = "file ends inside a UTF-8 sequence"
+        self._keys = set()
+
+        problems = []
+        if self.decode_error:
+            problems.append(self.decode_error)
+        if not self.keys:
+            problems.append("no key=value lines")
+        if self.malformed:
+            problems.append(f"{self.malformed} line(s) without key=value")
+        if self.duplicates:
+            problems.append(f"{self.duplicates} duplicate key(s)")
+
+        if not self.crlf:
+            line_endings = "lf"
+        elif self.crlf == self.lines - (0 if self.final_newline else 1):
+            line_endings = "crlf"
+        else:
+            line_endings = "mixed"
+        return {
+            "crc32": f"{self.crc:08x}",
+            "sha256": self._sha256.hexdigest(),
+            "size": self.size,
+            "encoding": "invalid" if self.decode_error else ("utf-8-sig" if self.bom else "utf-8"),
+            "lines": self.lines,
+            "keys": self.keys,
+            "comments": self.comments,
+            "blank": self.blank,
+            "line_endings": line_endings,
+            "final_newline": self.final_newline,
+            "malformed": self.malformed,
+            "malformed_lines": self.malformed_lines,
+            "duplicates": self.duplicates,
+            "duplicate_keys": self.duplicate_keys,
+            "problems": problems
+        }
@@ -0,0 +1,282 @@
+"""
+Global.ini Diff
+Streaming key=value indexing, linear-time deltas between two global.ini versions
+and three-way merges of translations onto a new stock file
+"""
+
+import csv
+import io
+import json
+from collections import namedtuple
+from pathlib import Path
+
+from p4k_reader import atomic_output
+
+
+REPORT_FORMATS = ("ini", "json", "csv")
+
+_BOM = b"\xef\xbb\xbf"
+
+IniDiff = namedtuple("IniDiff", ["old", "new", "added", "removed", "changed"])
+
+MergeResult = namedtuple("MergeResult", ["output", "kept", "added", "untranslated", "removed", "conflicts"])
+
+# Conflict kinds reported by merge_translation
+SOURCE_CHANGED = "source-changed"
+NO_OLD_SOURCE = "no-old-source"
+
+
+def iter_lines(path):
+    """Yield (offset, key, value) for every key=value line, reading the file as a stream
+
+    Keys and values stay undecoded bytes. Blank lines, ; / # comments and lines
+    without '=' are skipped, the UTF-8 BOM is ignored, and values keep everything
+    after the first '='.
+    """
+    offset = 0
+    with open(path, "rb") as f:
+        first = f.read(len(_BOM))
+        if first == _BOM:
+            offset = len(_BOM)
+        else:
+            f.seek(0)
+        for raw in f:
+            line_offset = offset
+            offset += len(raw)
+            key, value = split_line(raw)
+            if key is not None:
+                yield line_offset, key, value
+
+
+def split_line(raw):
+    """Return (key, value) for a key=value line, or (None, None) for anything else"""
+    key, sep, value = raw.partition(b"=")
+    if not sep or not key or key[:1] in b";#":
+        return None, None
+    return key.strip(), value.rstrip(b"\r\n")
+
+
+class KeyIndex:
+    """Key -> (value hash, line offset) for one file, in file order
+
+    Values are kept only as hashes; the few that a report needs are read back
+    from their recorded offsets.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.duplicates = 0
+        for offset, key, value in iter_lines(self.path):
+            if key in self.entries:
+                # Later definitions win, as with the game's own loader
+                self.duplicates += 1
+                del self.entries[key]
+            self.entries[key] = (hash(value), offset)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def values(self, keys):
+        """Read the values of keys back from the file, visiting offsets in order"""
+        wanted = sorted((self.entries[key][1], key) for key in keys)
+        values = {}
+        with open(self.path, "rb") as f:
+            for offset, key in wanted:
+                f.seek(offset)
+                line = f.readline().rstrip(b"\r\n")
+                values[key] = line.partition(b"=")[2].decode("utf-8", "replace")
+        return values
+
+
+def diff_indexes(old, new):
+    """Compare two key indexes in one pass over each"""
+    old_entries = old.entries
+    new_entries = new.entries
+    added = []
+    changed = []
+    for key, (value_hash, _) in new_entries.items():
+        previous = old_entries.get(key)
+        if previous is None:
+            added.append(key)
+        elif previous[0] != value_hash:
+            changed.append(key)
+    removed = [key for key in old_entries if key not in new_entries]
+    return IniDiff(old, new, added, removed, changed)
+
+
+def diff_files(old_path, new_path):
+    """Return the keys added, removed and changed from old_path to new_path"""
+    return diff_indexes(KeyIndex(old_path), KeyIndex(new_path))
+
+
+def summary(diff):
+    return f"{len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed"
+
+
+def report_path(new_path, old_path, fmt):
+    """StockGlobal-4-4-0-PTU.ini vs StockGlobal-4-3-2-LIVE.ini -> StockGlobal-4-4-0-PTU-vs-4-3-2-LIVE.<fmt>"""
+    new_path = Path(new_path)
+    old_stem = Path(old_path).stem
+    if old_stem.startswith("StockGlobal-"):
+        old_stem = old_stem[len("StockGlobal-"):]
+    suffix = "diff.ini" if fmt == "ini" else fmt
+    return new_path.with_name(f"{new_path.stem}-vs-{old_stem}.{suffix}")
+
+
+def _text(key):
+    return key.decode("utf-8", "replace")
+
+
+def render(diff, fmt):
+    """Render a diff as an INI fragment, JSON or CSV"""
+    old_values = {_text(key): value for key, value in diff.old.values(diff.removed + diff.changed).items()}
+    new_values = {_text(key): value for key, value in diff.new.values(diff.added + diff.changed).items()}
+    added = [_text(key) for key in diff.added]
+    removed = [_text(key) for key in diff.removed]
+    changed = [_text(key) for key in diff.changed]
+
+    if fmt == "json":
+        return json.dumps({
+            "old": str(diff.old.path),
+            "new": str(diff.new.path),
+            "summary": {"added": len(diff.added), "removed": len(diff.removed), "changed": len(diff.changed)},
+            "added": {key: new_values[key] for key in added},
+            "removed": {key: old_values[key] for key in removed},
+            "changed": {key: {"old": old_values[key], "new": new_values[key]} for key in changed}
+        }, indent=2, ensure_ascii=False)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(["change", "key", "old", "new"])
+        writer.writerows(["added", key, "", new_values[key]] for key in added)
+        writer.writerows(["removed", key, old_values[key], ""] for key in removed)
+        writer.writerows(["changed", key, old_values[key], new_values[key]] for key in changed)
+        return buffer.getvalue()
+
+    if fmt == "ini":
+        # Drop-in fragment: the new lines, with removed keys listed as comments
+        lines = [f"; {diff.old.path.name} -> {diff.new.path.name}: {summary(diff)}"]
+        if added:
+            lines.append("; --- added ---")
+            lines.extend(f"{key}={new_values[key]}" for key in added)
+        if changed:
+            lines.append("; --- changed ---")
+            lines.extend(f"{key}={new_values[key]}" for key in changed)
+        if removed:
+            lines.append("; --- removed ---")
+            lines.extend(f"; {key}={old_values[key]}" for key in removed)
+        return "\n".join(lines) + "\n"
+
+    raise ValueError(f"Unknown report format {fmt} (expected one of {', '.join(REPORT_FORMATS)})")
+
+
+def write_reports(diff, formats=("json",)):
+    """Write one report per format next to the new file, returning their paths"""
+    paths = []
+    for fmt in formats:
+        path = report_path(diff.new.path, diff.old.path, fmt)
+        with open(path, "w", encoding="utf-8-sig" if fmt == "ini" else "utf-8", newline="") as f:
+            f.write(render(diff, fmt))
+        paths.append(path)
+    return paths
+
+
+def merge_translation(old_stock, new_stock, translated, output_file, keep_outdated=True):
+    """Rebase a translated global.ini onto a new stock file
+
+    The merged file follows the new stock file line for line (order, comments,
+    line endings, BOM). Translations are kept where the English source is
+    unchanged, new keys come in untranslated, and keys whose source changed are
+    reported as conflicts (keeping the old translation unless keep_outdated is False).
+    """
+    old_index = KeyIndex(old_stock)
+    translations = {}
+    for _, key, value in iter_lines(translated):
+        translations[key] = value
+
+    used = set()
+    conflicts = []
+    counts = {"kept": 0, "added": 0, "untranslated": 0}
+    with open(new_stock, "rb") as src, atomic_output(output_file) as out:
+        first = src.read(len(_BOM))
+        if first == _BOM:
+            out.write(_BOM)
+        else:
+            src.seek(0)
+        for raw in src:
+            key, stock_value = split_line(raw)
+            if key is None:
+                out.write(raw)
+                continue
+
+            value = stock_value
+            translation = translations.get(key)
+            previous = old_index.entries.get(key)
+            if translation is None:
+                counts["added" if previous is None else "untranslated"] += 1
+            elif previous is None:
+                # Translated already, but the old stock file never had it - let a human decide
+                conflicts.append((key, NO_OLD_SOURCE, stock_value, translation))
+                value = translation
+            elif previous[0] == hash(stock_value):
+                counts["kept"] += 1
+                value = translation
+            else:
+                conflicts.append((key, SOURCE_CHANGED, stock_value, translation))
+                if keep_outdated:
+                    value = translation
+            if translation is not None:
+                used.add(key)
+
+            if value is stock_value:
+                out.write(raw)
+            else:
+                ending = raw[len(raw.rstrip(b"\r\n")):]
+                out.write(raw[:raw.index(b"=") + 1] + value + ending)
+
+    removed = [key for key in translations if key not in used]
+    old_values = old_index.values([key for key, kind, _, _ in conflicts if kind == SOURCE_CHANGED])
+    conflicts = [
+        (_text(key), kind, old_values.get(key, ""),
+         stock.decode("utf-8", "replace"), translation.decode("utf-8", "replace"))
+        for key, kind, stock, translation in conflicts
+    ]
+    return MergeResult(
+        Path(output_file), counts["kept"], counts["added"], counts["untranslated"],
+        [_text(key) for key in removed], conflicts
+    )
+
+
+def merge_summary(result):
+    return (f"{result.kept} kept, {result.added} new, {result.untranslated} untranslated, "
+            f"{len(result.conflicts)} conflicts, {len(result.removed)} dropped")
+
+
+def conflicts_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}.conflicts.csv")
+
+
+def write_conflicts(result):
+    """Write the conflict list (and keys dropped from the new stock file) as CSV next to the merged file"""
+    path = conflicts_path(result.output)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["key", "kind", "old_stock", "new_stock", "translation"])
+        writer.writerows(result.conflicts)
+        writer.writerows([key, "removed-from-stock", "", "", ""] for key in result.removed)
+    return path
+
+
+def merged_path(translated, new_stock):
+    """MyPack.ini + StockGlobal-4-4-0-PTU.ini -> MyPack-4-4-0-PTU.ini next to the translation"""
+    translated = Path(translated)
+    new_stem = Path(new_stock).stem
+    if new_stem.startswith("StockGlobal-"):
+        new_stem = new_stem[len("StockGlobal-"):]
+    return translated.with_name(f"{translated.stem}-{new_stem}{translated.suffix or '.ini'}")
@@ -0,0 +1,261 @@
+"""
+Global.ini Exports
+Precompiled lookup forms of global.ini built from the extraction stream:
+a SQLite database (key index + full-text table) and a compact, mmap-friendly binary file
+"""
+
+import mmap
+import os
+import sqlite3
+import struct
+from pathlib import Path
+
+from ini_diff import split_line
+from p4k_reader import atomic_output
+
+
+EXPORT_FORMATS = ("sqlite", "binary")
+SUFFIXES = {"sqlite": ".sqlite", "binary": ".gidx"}
+
+_BOM = b"\xef\xbb\xbf"
+
+# Binary layout (little endian):
+#   header   magic "GIDX", version, flags, count, table offset, blob offset
+#   table    count x (key offset, key length, value offset, value length) into the blob, sorted by key bytes
+#   blob     UTF-8 keys and values back to back
+_MAGIC = b"GIDX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIQQ")
+_SLOT = struct.Struct("<IIII")
+
+
+def export_path(output_file, fmt):
+    return Path(output_file).with_suffix(SUFFIXES[fmt])
+
+
+def is_current(output_file, formats):
+    """Check that every export exists and is newer than the INI it was built from"""
+    try:
+        source_mtime = os.stat(output_file).st_mtime_ns
+        return all(os.stat(export_path(output_file, fmt)).st_mtime_ns >= source_mtime for fmt in formats)
+    except OSError:
+        return False
+
+
+class IniExporter:
+    """Collects key=value pairs from decompressed chunks as they stream past
+
+    Pass feed as the extractor's on_chunk callback, then call finish() once the
+    INI itself is in place - the file is never read a second time.
+    """
+
+    def __init__(self, output_file, formats):
+        unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown export format {unknown[0]} (expected {', '.join(EXPORT_FORMATS)})")
+        self.output_file = Path(output_file)
+        self.formats = list(formats)
+        self.pairs = {}
+        self._tail = b""
+        self._started = False
+        self._line = 0
+
+    def feed(self, chunk):
+        data = self._tail + bytes(chunk)
+        if not self._started:
+            if len(data) < len(_BOM) and _BOM.startswith(data):
+                self._tail = data
+                return
+            if data.startswith(_BOM):
+                data = data[len(_BOM):]
+            self._started = True
+        lines = data.split(b"\n")
+        self._tail = lines.pop()
+        for raw in lines:
+            self._add(raw)
+
+    def feed_file(self, path):
+        """Fallback for outputs that didn't come through the native stream (unp4k, cache restores)"""
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                self.feed(chunk)
+
+    def _add(self, raw):
+        self._line += 1
+        key, value = split_line(raw)
+        if key is not None:
+            # Later definitions win, as with the game's own loader
+            self.pairs[key] = (value, self._line)
+
+    def finish(self, meta=None):
+        """Write the requested export files next to the INI, returning their paths"""
+        if self._tail:
+            self._add(self._tail)
+            self._tail = b""
+        written = []
+        for fmt in self.formats:
+            path = export_path(self.output_file, fmt)
+            if fmt == "sqlite":
+                write_sqlite(path, self.pairs, meta or {})
+            else:
+                write_binary(path, self.pairs)
+            written.append(path)
+        return written
+
+
+def export_file(output_file, formats, meta=None):
+    """Build exports from an INI already on disk"""
+    exporter = IniExporter(output_file, formats)
+    exporter.feed_file(output_file)
+    return exporter.finish(meta)
+
+
+# --- SQLite ---
+
+_SQLITE_SCHEMA = """
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE strings (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, value TEXT NOT NULL, line INTEGER NOT NULL);
+CREATE INDEX strings_key_nocase ON strings (key COLLATE NOCASE);
+"""
+
+
+def _create_fts(conn):
+    """Full-text table over the strings, using FTS5 where this SQLite build has it"""
+    for module in ("fts5", "fts4"):
+        try:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE strings_fts USING {module}(key, value, content='strings'"
+                + (", content_rowid='id')" if module == "fts5" else ")")
+            )
+        except sqlite3.OperationalError:
+            continue
+        if module == "fts5":
+            conn.execute("INSERT INTO strings_fts(strings_fts) VALUES ('rebuild')")
+        else:
+            conn.execute("INSERT INTO strings_fts(docid, key, value) SELECT id, key, value FROM strings")
+        return module
+    return None
+
+
+def write_sqlite(path, pairs, meta):
+    """Write strings(key, value, line) plus a full-text table, replacing path atomically"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.part")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    try:
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            with conn:
+                conn.executescript(_SQLITE_SCHEMA)
+                conn.executemany(
+                    "INSERT INTO strings (key, value, line) VALUES (?, ?, ?)",
+                    ((key.decode("utf-8", "replace"), value.decode("utf-8", "replace"), line)
+                     for key, (value, line) in pairs.items())
+                )
+                meta = dict(meta, count=len(pairs), fts=_create_fts(conn))
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", ((k, str(v)) for k, v in meta.items()))
+        finally:
+            conn.close()
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+# --- Compact binary ---
+
+def write_binary(path, pairs):
+    """Write the sorted key/offset table and string blob, replacing path atomically"""
+    keys = sorted(pairs)
+    table = []
+    blob = []
+    blob_size = 0
+    for key in keys:
+        value = pairs[key][0]
+        table.append(_SLOT.pack(blob_size, len(key), blob_size + len(key), len(value)))
+        blob.append(key)
+        blob.append(value)
+        blob_size += len(key) + len(value)
+    if blob_size > 0xFFFFFFFF:
+        raise ValueError("Too much text for the binary export")
+
+    table_offset = _HEADER.size
+    blob_offset = table_offset + _SLOT.size * len(keys)
+    with atomic_output(path) as out:
+        out.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(keys), table_offset, blob_offset))
+        out.write(b"".join(table))
+        out.write(b"".join(blob))
+
+
+class CompactIni:
+    """Memory-mapped reader for the binary export: O(log n) lookups without parsing the file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self._table, self._blob = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a global.ini binary export")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, i):
+        return _SLOT.unpack_from(self._map, self._table + i * _SLOT.size)
+
+    def _key(self, i):
+        key_offset, key_len, _, _ = self._slot(i)
+        start = self._blob + key_offset
+        return self._map[start:start + key_len]
+
+    def _value(self, i):
+        _, _, value_offset, value_len = self._slot(i)
+        start = self._blob + value_offset
+        return self._map[start:start + value_len].decode("utf-8", "replace")
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, key, default=None):
+        key = key.encode("utf-8")
+        i = self._lower_bound(key)
+        if i < self.count and self._key(i) == key:
+            return self._value(i)
+        return default
+
+    def prefix(self, prefix):
+        """Yield (key, value) for keys starting with prefix, in key order"""
+        prefix = prefix.encode("utf-8")
+        i = self._lower_bound(prefix)
+        while i < self.count:
+            key = self._key(i)
+            if not key.startswith(prefix):
+                break
+            yield key.decode("utf-8", "replace"), self._value(i)
+            i += 1
+
+    def items(self):
+        for i in range(self.count):
+            yield self._key(i).decode("utf-8", "replace"), self._value(i)
@@ -0,0 +1,129 @@
+"""
+Installation Watcher
+Polls each Data.p4k's size and mtime and reports branches once a patch has settled
+"""
+
+import os
+import threading
+import time
+
+
+DEFAULT_INTERVAL = 30.0
+DEFAULT_SETTLE = 120.0
+DEFAULT_RESCAN = 600.0
+
+
+def _fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class InstallationWatcher:
+    """Call on_stable(installation) once a Data.p4k has changed and then stayed unchanged for settle seconds
+
+    The launcher rewrites Data.p4k for minutes while patching, so a change only
+    counts once its size and mtime stop moving. Between polls the thread sleeps on
+    an Event: an idle watcher costs one stat() per archive per interval and never
+    opens an archive.
+
+    on_stable returns whether it succeeded; a failure (or exception) leaves the
+    change pending, so it is tried again on the next poll instead of waiting
+    for the next patch.
+    """
+
+    def __init__(self, discover, on_stable, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE,
+                 rescan=DEFAULT_RESCAN, on_event=None, clock=time.monotonic):
+        self.discover = discover
+        self.on_stable = on_stable
+        self.interval = interval
+        self.settle = settle
+        self.rescan = rescan
+        self.on_event = on_event
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self._installations = {}
+        self._handled = {}
+        self._pending = {}
+        self._catch_up = set()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _event(self, inst, message):
+        if self.on_event:
+            self.on_event(inst, message)
+
+    def _refresh(self, initial):
+        """Pick up branches that were installed or removed since the last discovery"""
+        found = {inst["path"]: inst for inst in self.discover()}
+        for path, inst in found.items():
+            if path not in self._installations:
+                if initial:
+                    # Anything already on disk is checked straight away
+                    self._catch_up.add(path)
+                else:
+                    self._event(inst, "new installation")
+        for path in set(self._installations) - set(found):
+            self._handled.pop(path, None)
+            self._pending.pop(path, None)
+        self._installations = found
+
+    def poll(self):
+        """Check every archive once, returning (installation, fingerprint) for the ones that just settled"""
+        now = self.clock()
+        settled = []
+        for path, inst in self._installations.items():
+            current = _fingerprint(path)
+            if current is None:
+                continue
+            if path in self._catch_up:
+                self._catch_up.discard(path)
+            elif current == self._handled.get(path):
+                self._pending.pop(path, None)
+                continue
+            else:
+                pending = self._pending.get(path)
+                if pending is None or pending[0] != current:
+                    self._pending[path] = (current, now)
+                    self._event(inst, "change detected - waiting for it to settle")
+                    continue
+                if now - pending[1] < self.settle:
+                    continue
+
+            self._pending.pop(path, None)
+            settled.append((inst, current))
+        return settled
+
+    def _handle(self, inst, fingerprint):
+        """Run on_stable for one settled archive, marking it handled only if that worked"""
+        try:
+            ok = self.on_stable(inst)
+        except Exception as e:
+            self._event(inst, f"failed: {e}")
+            ok = False
+        if ok:
+            self._handled[inst["path"]] = fingerprint
+        else:
+            # Still settled: the next poll retries unless the archive changes again first
+            self._pending[inst["path"]] = (fingerprint, self.clock() - self.settle)
+            self._event(inst, f"will retry in {self.interval:g}s")
+
+    def step(self):
+        """Poll once and run on_stable for every archive that settled"""
+        for inst, fingerprint in self.poll():
+            self._handle(inst, fingerprint)
+
+    def run(self):
+        """Watch until stop() is called (blocks the calling thread)"""
+        self._refresh(initial=True)
+        next_rescan = self.clock() + self.rescan
+        while True:
+            self.step()
+            if self.stop_event.wait(self.interval):
+                return
+            if self.clock() >= next_rescan:
+                self._refresh(initial=False)
+                next_rescan = self.clock() + self.rescan
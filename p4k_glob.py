@@ -0,0 +1,77 @@
+"""
+P4K Glob Matching
+Glob matching over Data.p4k entry names using the sorted name index
+"""
+
+import re
+from pathlib import Path
+
+from p4k_reader import normalize_name
+
+
+_WILDCARDS = "*?["
+
+
+def compile_glob(pattern):
+    """Split a glob into its literal path prefix and a case-insensitive regex for the full name
+
+    Supports ** (any number of folders), * and ? (within one folder) and [...] classes.
+    """
+    pattern = normalize_name(pattern).lstrip("/")
+    first_wildcard = min((pattern.find(c) for c in _WILDCARDS if c in pattern), default=len(pattern))
+    prefix = pattern[:first_wildcard]
+
+    parts = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+
+    return prefix, re.compile("".join(parts) + r"\Z", re.IGNORECASE)
+
+
+def glob_archive(archive, pattern, index=None):
+    """Return the entries of an open archive matching a glob pattern
+
+    With an index only the literal prefix's range of the sorted name index is
+    visited, so Data/Localization/**/*.ini never looks at the rest of the archive.
+    """
+    prefix, regex = compile_glob(pattern)
+    if index is not None:
+        candidates = index.find_prefix(archive, prefix)
+    else:
+        candidates = archive.find_prefix(prefix)
+    return [entry for entry in candidates if regex.match(entry.name)]
+
+
+def output_path(dest_dir, entry_name):
+    """Map an entry name to a path under dest_dir, refusing names that escape it"""
+    parts = [p for p in entry_name.split("/") if p]
+    if not parts or any(p in (".", "..") or ":" in p for p in parts):
+        raise ValueError(f"Refusing to extract unsafe path: {entry_name}")
+    return Path(dest_dir).joinpath(*parts)
+
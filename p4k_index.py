@@ -0,0 +1,234 @@
+"""
+P4K Central Directory Index
+Persistent SQLite cache of Data.p4k entries, keyed by the archive's fingerprint
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from p4k_reader import P4kEntry, normalize_name
+
+
+INDEX_FILENAME = "p4k_index.db"
+# Seconds a connection waits for another one's write before "database is locked"
+BUSY_TIMEOUT = 120.0
+
+# Branches on different drives extract in parallel against the same database. Building
+# writes ~1M rows in one transaction, so builds take turns here instead of racing for
+# SQLite's write lock (and a second branch finds the index already built after waiting)
+_BUILD_LOCK = threading.Lock()
+
+# What COLLATE NOCASE folds: ASCII letters only
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    UNIQUE (path, size, mtime_ns)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    archive_id INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    header_offset INTEGER NOT NULL,
+    compressed_size INTEGER NOT NULL,
+    uncompressed_size INTEGER NOT NULL,
+    method INTEGER NOT NULL,
+    crc INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    PRIMARY KEY (archive_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS folders_built (archive_id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS folders (
+    archive_id INTEGER NOT NULL,
+    parent TEXT NOT NULL COLLATE NOCASE,
+    is_file INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    size INTEGER NOT NULL,
+    children INTEGER NOT NULL,
+    PRIMARY KEY (archive_id, parent, is_file, name)
+) WITHOUT ROWID;
+"""
+
+_ENTRY_COLUMNS = "name, header_offset, compressed_size, uncompressed_size, method, crc, flags"
+
+
+def fingerprint(p4k_path):
+    """Return the (path, size, mtime_ns) fingerprint for an archive"""
+    path = str(Path(p4k_path).resolve())
+    st = os.stat(path)
+    return path, st.st_size, st.st_mtime_ns
+
+
+class P4kIndex:
+    """Name -> entry lookup table for Data.p4k files, rebuilt only when the archive changes"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT)
+        try:
+            # WAL lets lookups read while another branch's build is writing
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(_SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _archive_id(self, conn, fp):
+        row = conn.execute(
+            "SELECT id FROM archives WHERE path = ? AND size = ? AND mtime_ns = ?", fp
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_indexed(self, p4k_path):
+        """Check whether the archive's current fingerprint is already indexed"""
+        with self._connect() as conn:
+            return self._archive_id(conn, fingerprint(p4k_path)) is not None
+
+    def _build(self, conn, archive, fp):
+        """Index every central directory entry and evict stale fingerprints for the same path"""
+        stale = [row[0] for row in conn.execute("SELECT id FROM archives WHERE path = ?", (fp[0],))]
+        for archive_id in stale:
+            conn.execute("DELETE FROM entries WHERE archive_id = ?", (archive_id,))
+            conn.execute("DELETE FROM folders WHERE archive_id = ?", (archive_id,))
+            conn.execute("DELETE FROM folders_built WHERE archive_id = ?", (archive_id,))
+            conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+
+        archive_id = conn.execute(
+            "INSERT INTO archives (path, size, mtime_ns) VALUES (?, ?, ?)", fp
+        ).lastrowid
+        conn.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((archive_id,) + tuple(entry) for entry in archive.iter_entries())
+        )
+        return archive_id
+
+    def ensure(self, archive):
+        """Return the index id for an open archive, building the index on a miss"""
+        fp = fingerprint(archive.path)
+        with self._connect() as conn:
+            archive_id = self._archive_id(conn, fp)
+        if archive_id is not None:
+            return archive_id
+        with _BUILD_LOCK, self._connect() as conn:
+            # Another thread may have built it while this one waited
+            archive_id = self._archive_id(conn, fp)
+            if archive_id is None:
+                archive_id = self._build(conn, archive, fp)
+            return archive_id
+
+    def find_entry(self, archive, name):
+        """Look up a single entry of an open archive"""
+        archive_id = self.ensure(archive)
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE archive_id = ? AND name = ?",
+                (archive_id, normalize_name(name))
+            ).fetchone()
+        return P4kEntry(*row) if row else None
+
+    def find_prefix(self, archive, prefix):
+        """Return every file entry under a path prefix, using a range scan on the name index"""
+        archive_id = self.ensure(archive)
+        # NOCASE compares ASCII-lowercased text, so the range bounds must be lowercased the same way
+        # ('Z' + 1 is '[', which sorts below 'z'); the substr check trims the range to the exact prefix
+        prefix = normalize_name(prefix).translate(_ASCII_LOWER)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else "\U0010ffff"
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries "
+                "WHERE archive_id = ? AND name >= ? AND name < ? AND substr(name, 1, ?) = ? COLLATE NOCASE "
+                "AND name NOT LIKE '%/'",
+                (archive_id, prefix, upper, len(prefix), prefix)
+            ).fetchall()
+        return [P4kEntry(*row) for row in rows]
+
+    # --- Folder tree (built on first browse, not on every index build) ---
+
+    def ensure_folders(self, archive):
+        """Return the index id for an open archive, building its parent -> children table on a miss
+
+        Folders store their direct child count, files their uncompressed size,
+        so a browser can page through any folder without touching the rest.
+        """
+        archive_id = self.ensure(archive)
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM folders_built WHERE archive_id = ?", (archive_id,)).fetchone():
+                return archive_id
+        with _BUILD_LOCK, self._connect() as conn:
+            if conn.execute("SELECT 1 FROM folders_built WHERE archive_id = ?", (archive_id,)).fetchone():
+                return archive_id
+
+            counts = {"": 0}
+
+            def file_rows():
+                names = conn.execute(
+                    "SELECT name, uncompressed_size FROM entries WHERE archive_id = ?", (archive_id,)
+                )
+                for name, size in names:
+                    parent, _, leaf = name.rpartition("/")
+                    if not leaf:
+                        continue
+                    if parent not in counts:
+                        # First file in this folder: register it, and any new ancestors, with their parents
+                        chain = []
+                        folder = parent
+                        while folder not in counts:
+                            chain.append(folder)
+                            folder = folder.rpartition("/")[0]
+                        for sub in reversed(chain):
+                            counts[folder] += 1
+                            counts[sub] = 0
+                            folder = sub
+                    counts[parent] += 1
+                    yield archive_id, parent, 1, leaf, size, 0
+
+            conn.executemany("INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?, ?)", file_rows())
+            conn.executemany(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?, 0, ?, 0, ?)",
+                ((archive_id,) + folder.rpartition("/")[::2] + (count,) for folder, count in counts.items() if folder)
+            )
+            conn.execute("INSERT INTO folders_built VALUES (?)", (archive_id,))
+        return archive_id
+
+    def count_children(self, archive_id, parent):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM folders WHERE archive_id = ? AND parent = ?", (archive_id, parent)
+            ).fetchone()[0]
+
+    def list_children(self, archive_id, parent, offset, limit):
+        """Return (is_file, name, size, children) rows of one folder, folders first, by name"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT is_file, name, size, children FROM folders WHERE archive_id = ? AND parent = ? "
+                "ORDER BY is_file, name LIMIT ? OFFSET ?",
+                (archive_id, parent, limit, offset)
+            ).fetchall()
+
+    def search_names(self, archive_id, text, limit):
+        """Return up to limit (name, size) file pairs matching a filter, case-insensitively
+
+        Plain text matches anywhere in the path; with * or ? the filter is a
+        pattern over the whole path (e.g. *.dds).
+        """
+        pattern = normalize_name(text).replace("%", "\\%").replace("_", "\\_")
+        if "*" in pattern or "?" in pattern:
+            pattern = pattern.replace("*", "%").replace("?", "_")
+        else:
+            pattern = f"%{pattern}%"
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT name, uncompressed_size FROM entries WHERE archive_id = ? AND name LIKE ? ESCAPE '\\' "
+                "AND name NOT LIKE '%/' LIMIT ?",
+                (archive_id, pattern, limit)
+            ).fetchall()
@@ -0,0 +1,394 @@
+"""
+P4K Archive Reader
+Minimal in-process reader for Star Citizen's Data.p4k (ZIP64-based) archive
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+# Optional - imported on first use, only zstd-compressed entries need it
+_zstandard = None
+
+
+GLOBAL_INI_ENTRY = "Data/Localization/english/global.ini"
+LOCALIZATION_PREFIX = "Data/Localization/"
+
+METHOD_STORED = 0
+METHOD_DEFLATE = 8
+METHOD_ZSTD = 100
+METHOD_ZSTD_STANDARD = 93
+
+CHUNK_SIZE = 1024 * 1024
+
+_EOCD_SIG = b"PK\x05\x06"
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+_ZIP64_EOCD_SIG = b"PK\x06\x06"
+_CENTRAL_SIG = b"PK\x01\x02"
+# Regular ZIP local headers use PK\x03\x04, Data.p4k uses PK\x03\x14
+_LOCAL_SIGS = (b"PK\x03\x04", b"PK\x03\x14")
+
+_EOCD = struct.Struct("<4sHHHHIIH")
+_ZIP64_LOCATOR = struct.Struct("<4sIQI")
+_ZIP64_EOCD = struct.Struct("<4sQHHIIQQQQ")
+_CENTRAL = struct.Struct("<4sHHHHHHIIIHHHHHII")
+_LOCAL = struct.Struct("<4sHHHHHIIIHH")
+
+_ZIP64_EXTRA_ID = 0x0001
+_MAX_EOCD_SEARCH = _EOCD.size + 0xFFFF
+
+
+class P4kError(Exception):
+    """Raised when the archive cannot be read"""
+
+
+class UnsupportedEntryError(P4kError):
+    """Raised when an entry uses a feature the native reader cannot handle"""
+
+
+class ExtractionCancelled(P4kError):
+    """Raised when an extraction is stopped through its cancel event"""
+
+
+class ChecksumError(P4kError):
+    """Raised when decompressed data doesn't match the CRC32 stored in the archive"""
+
+
+def _zstd_decompressor():
+    global _zstandard
+    if _zstandard is None:
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedEntryError("zstandard module is not installed") from None
+        _zstandard = zstandard
+    return _zstandard.ZstdDecompressor()
+
+
+P4kEntry = namedtuple(
+    "P4kEntry",
+    ["name", "header_offset", "compressed_size", "uncompressed_size", "method", "crc", "flags"]
+)
+
+
+def normalize_name(name):
+    """Normalize an archive path to forward slashes"""
+    return name.replace("\\", "/")
+
+
+def _default_file_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mkstemp creates files as 0600 - finished outputs get the usual permissions instead
+_FILE_MODE = _default_file_mode()
+
+
+@contextmanager
+def atomic_output(dest_path):
+    """Open a temp file beside dest_path that replaces it only once fully written and synced
+
+    Readers see the previous file or the complete new one, never a truncated one.
+    """
+    dest_path = Path(dest_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{dest_path.name}.", suffix=".part", dir=dest_path.parent)
+    try:
+        with open(fd, "wb") as out:
+            yield out
+            out.flush()
+            os.fsync(out.fileno())
+        if os.name != "nt":
+            os.chmod(tmp_path, _FILE_MODE)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class P4kArchive:
+    """Read-only view over the central directory and entries of a Data.p4k file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise P4kError(f"{self.path} is empty")
+        try:
+            self.cd_offset, self.cd_size, self.entry_count = self._read_end_of_central_directory()
+        except Exception:
+            self._map.close()
+            raise
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # A slice is still referenced (e.g. from a traceback) - released when collected
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _read_end_of_central_directory(self):
+        """Locate the (ZIP64) end of central directory and return (offset, size, count)"""
+        data = self._map
+        file_size = len(data)
+        tail_start = max(0, file_size - _MAX_EOCD_SEARCH)
+
+        pos = data.rfind(_EOCD_SIG, tail_start)
+        if pos < 0 or pos + _EOCD.size > file_size:
+            raise P4kError("End of central directory not found - is this a Data.p4k file?")
+        _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(data, pos)
+
+        # ZIP64 archives store the real values in a separate record
+        locator_pos = pos - _ZIP64_LOCATOR.size
+        if locator_pos >= 0 and data[locator_pos:locator_pos + 4] == _ZIP64_LOCATOR_SIG:
+            _, _, zip64_offset, _ = _ZIP64_LOCATOR.unpack_from(data, locator_pos)
+            if (zip64_offset + _ZIP64_EOCD.size > file_size
+                    or data[zip64_offset:zip64_offset + 4] != _ZIP64_EOCD_SIG):
+                raise P4kError("Invalid ZIP64 end of central directory record")
+            _, _, _, _, _, _, _, count, cd_size, cd_offset = _ZIP64_EOCD.unpack_from(data, zip64_offset)
+
+        if cd_offset + cd_size > file_size:
+            raise P4kError("Central directory is truncated")
+        return cd_offset, cd_size, count
+
+    def _parse_central_record(self, data, pos):
+        """Parse one central directory record, returning (entry, next_pos)"""
+        (sig, _, _, flags, method, _, _, crc, csize, usize,
+         name_len, extra_len, comment_len, _, _, _, offset) = _CENTRAL.unpack_from(data, pos)
+        if sig != _CENTRAL_SIG:
+            raise P4kError(f"Corrupt central directory record at {pos}")
+
+        name_start = pos + _CENTRAL.size
+        extra_start = name_start + name_len
+        raw_name = data[name_start:extra_start]
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437", errors="replace")
+
+        if 0xFFFFFFFF in (usize, csize, offset):
+            usize, csize, offset = self._apply_zip64_extra(
+                data[extra_start:extra_start + extra_len], usize, csize, offset
+            )
+
+        entry = P4kEntry(normalize_name(name), offset, csize, usize, method, crc, flags)
+        return entry, extra_start + extra_len + comment_len
+
+    @staticmethod
+    def _apply_zip64_extra(extra, usize, csize, offset):
+        """Replace 0xFFFFFFFF placeholders with values from the ZIP64 extra field"""
+        pos = 0
+        while pos + 4 <= len(extra):
+            field_id, field_len = struct.unpack_from("<HH", extra, pos)
+            pos += 4
+            if field_id == _ZIP64_EXTRA_ID:
+                values = list(struct.unpack_from(f"<{field_len // 8}Q", extra, pos))
+                if usize == 0xFFFFFFFF and values:
+                    usize = values.pop(0)
+                if csize == 0xFFFFFFFF and values:
+                    csize = values.pop(0)
+                if offset == 0xFFFFFFFF and values:
+                    offset = values.pop(0)
+                break
+            pos += field_len
+        return usize, csize, offset
+
+    def iter_entries(self):
+        """Yield every entry in the central directory"""
+        pos = self.cd_offset
+        for _ in range(self.entry_count):
+            entry, pos = self._parse_central_record(self._map, pos)
+            yield entry
+
+    def find_prefix(self, prefix):
+        """Return every file entry whose path starts with prefix (case-insensitive)"""
+        lowered = normalize_name(prefix).lower()
+        return [
+            entry for entry in self.iter_entries()
+            if entry.name.lower().startswith(lowered) and not entry.name.endswith("/")
+        ]
+
+    def find_entry(self, name):
+        """Find a single entry by path without parsing the whole central directory"""
+        data = self._map
+        cd_end = self.cd_offset + self.cd_size
+        wanted = normalize_name(name)
+
+        # Names are stored verbatim after the fixed header, so a byte search lands
+        # directly on the record instead of walking a million entries in Python
+        for candidate in (wanted, wanted.replace("/", "\\")):
+            needle = candidate.encode("utf-8")
+            pos = data.find(needle, self.cd_offset, cd_end)
+            while pos >= 0:
+                header = pos - _CENTRAL.size
+                if header >= self.cd_offset and data[header:header + 4] == _CENTRAL_SIG:
+                    name_len = struct.unpack_from("<H", data, header + 28)[0]
+                    if name_len == len(needle):
+                        return self._parse_central_record(data, header)[0]
+                pos = data.find(needle, pos + 1, cd_end)
+
+        # Fall back to a case-insensitive walk
+        lowered = wanted.lower()
+        for entry in self.iter_entries():
+            if entry.name.lower() == lowered:
+                return entry
+        return None
+
+    def _data_range(self, entry):
+        """Return the (start, end) offsets of an entry's compressed data"""
+        header = entry.header_offset
+        if header + _LOCAL.size > len(self._map) or self._map[header:header + 4] not in _LOCAL_SIGS:
+            raise P4kError(f"Invalid local header for {entry.name}")
+        name_len, extra_len = _LOCAL.unpack_from(self._map, header)[9:11]
+        start = header + _LOCAL.size + name_len + extra_len
+        end = start + entry.compressed_size
+        if end > len(self._map):
+            raise P4kError(f"Unexpected end of archive while reading {entry.name}")
+        return start, end
+
+    @staticmethod
+    def _iter_decompressed(entry, data):
+        """Yield the decompressed bytes of an entry in chunks of at most CHUNK_SIZE"""
+        if entry.flags & 0x1:
+            raise UnsupportedEntryError(f"{entry.name} is encrypted")
+
+        if entry.method == METHOD_STORED:
+            for pos in range(0, len(data), CHUNK_SIZE):
+                yield data[pos:pos + CHUNK_SIZE]
+
+        elif entry.method == METHOD_DEFLATE:
+            d = zlib.decompressobj(-zlib.MAX_WBITS)
+            for pos in range(0, len(data), CHUNK_SIZE):
+                chunk = data[pos:pos + CHUNK_SIZE]
+                while chunk:
+                    out = d.decompress(chunk, CHUNK_SIZE)
+                    if out:
+                        yield out
+                    chunk = d.unconsumed_tail
+            out = d.flush()
+            if out:
+                yield out
+
+        elif entry.method in (METHOD_ZSTD, METHOD_ZSTD_STANDARD):
+            dctx = _zstd_decompressor()
+            with dctx.stream_reader(data, read_size=CHUNK_SIZE) as reader:
+                while True:
+                    out = reader.read(CHUNK_SIZE)
+                    if not out:
+                        break
+                    yield out
+
+        else:
+            raise UnsupportedEntryError(f"Unsupported compression method {entry.method} for {entry.name}")
+
+    def extract(self, entry, dest_path, on_bytes=None, cancel=None, on_chunk=None):
+        """Stream a single entry to dest_path straight from the memory-mapped archive
+
+        on_chunk(chunk) sees every decompressed chunk before it is written, so
+        derived outputs can be built in the same pass.
+        on_bytes(n) is called after every decompressed chunk; setting the cancel
+        event stops the copy and leaves any existing dest_path untouched.
+        The CRC32 of the output is checked against the archive's (when it records
+        one) before dest_path is replaced, so corrupt data never lands.
+        """
+        start, end = self._data_range(entry)
+        written = 0
+        crc = 0
+        # Compressed bytes are handed to the decompressor as slices of the mapping,
+        # so neither the compressed blob nor the output is ever held in full
+        with memoryview(self._map)[start:end] as data:
+            chunks = self._iter_decompressed(entry, data)
+            try:
+                # Written once, straight into the destination folder, and renamed into
+                # place only when complete - a crash or cancel never leaves a truncated file
+                with atomic_output(dest_path) as out:
+                    for chunk in chunks:
+                        if cancel is not None and cancel.is_set():
+                            raise ExtractionCancelled("Extraction cancelled")
+                        if on_chunk:
+                            on_chunk(chunk)
+                        out.write(chunk)
+                        crc = zlib.crc32(chunk, crc)
+                        written += len(chunk)
+                        if on_bytes:
+                            on_bytes(len(chunk))
+                    chunk = None
+                    if written != entry.uncompressed_size:
+                        raise P4kError(
+                            f"Size mismatch for {entry.name}: expected {entry.uncompressed_size}, got {written}"
+                        )
+                    if entry.crc and crc != entry.crc:
+                        raise ChecksumError(
+                            f"CRC mismatch for {entry.name}: archive has {entry.crc:08x}, data is {crc:08x}"
+                        )
+            finally:
+                chunks.close()
+                del chunks
+        return written
+
+    def extract_many(self, jobs, max_workers=None, on_done=None, on_bytes=None, cancel=None):
+        """Decompress several (entry, dest_path) jobs concurrently from the shared mapping"""
+        if max_workers is None:
+            max_workers = min(8, os.cpu_count() or 1)
+        # Largest entries first so one big file doesn't end up running alone at the end
+        jobs = sorted(jobs, key=lambda job: job[0].uncompressed_size, reverse=True)
+
+        # A failure (or Ctrl+C) in one job stops its siblings mid-file as well
+        stop = _StopSignal(cancel)
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        # zlib and zstandard release the GIL while decompressing, so threads scale
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {}
+            for entry, dest_path in jobs:
+                Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+                futures[pool.submit(self.extract, entry, dest_path, on_bytes, stop)] = entry
+            for future in as_completed(futures):
+                future.result()
+                if on_done:
+                    on_done(futures[future])
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            # On error or cancellation, drop queued jobs and wait for running ones to clean up
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _StopSignal:
+    """Event-like flag that is also raised by an optional caller-owned cancel event"""
+
+    def __init__(self, cancel=None):
+        self._cancel = cancel
+        self._stopped = False
+
+    def set(self):
+        self._stopped = True
+
+    def is_set(self):
+        return self._stopped or (self._cancel is not None and self._cancel.is_set())
+
+
+def extract_entry(p4k_path, entry_name, dest_path):
+    """Extract a single entry from a Data.p4k file to dest_path"""
+    with P4kArchive(p4k_path) as archive:
+        entry = archive.find_entry(entry_name)
+        if entry is None:
+            raise P4kError(f"{entry_name} not found in {p4k_path}")
+        return archive.extract(entry, dest_path)
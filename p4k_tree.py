@@ -0,0 +1,131 @@
+"""
+P4K Folder Tree
+Lazily loaded, flattened view of a Data.p4k's folders for virtual (recycled-row) list widgets
+"""
+
+import bisect
+from collections import OrderedDict, namedtuple
+
+
+PAGE_SIZE = 256
+MAX_PAGES = 64
+FILTER_LIMIT = 5000
+
+TreeRow = namedtuple("TreeRow", ["path", "name", "depth", "is_dir", "size", "children", "expanded"])
+
+
+class _Folder:
+    """An expanded folder: its child count plus whichever of its subfolders are expanded too"""
+
+    def __init__(self, path, depth, count, parent=None):
+        self.path = path
+        self.depth = depth
+        self.count = count
+        self.parent = parent
+        self.open = {}
+        self.open_order = []
+        self.visible = count
+
+    def _grow(self, delta):
+        folder = self
+        while folder is not None:
+            folder.visible += delta
+            folder = folder.parent
+
+
+class ArchiveTree:
+    """Row-indexed view of the expanded parts of an archive's folder tree
+
+    Only folder child counts and the expanded folders are held; row contents are
+    fetched from the index a page at a time and kept in a small LRU cache, so
+    memory stays bounded however large the archive or its folders are.
+    """
+
+    def __init__(self, index, archive_id):
+        self.index = index
+        self.archive_id = archive_id
+        self.root = _Folder("", -1, index.count_children(archive_id, ""))
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return self.root.visible
+
+    def _page(self, path, number):
+        key = (path, number)
+        page = self._pages.get(key)
+        if page is None:
+            page = self.index.list_children(self.archive_id, path, number * PAGE_SIZE, PAGE_SIZE)
+            self._pages[key] = page
+            if len(self._pages) > MAX_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(key)
+        return page
+
+    def _locate(self, row):
+        """Return (folder, child index) for a visible row number"""
+        folder = self.root
+        while True:
+            extra = 0
+            descend = None
+            for child in folder.open_order:
+                position = child + extra
+                if row <= position:
+                    break
+                sub = folder.open[child]
+                if row <= position + sub.visible:
+                    descend = sub
+                    row -= position + 1
+                    break
+                extra += sub.visible
+            if descend is None:
+                return folder, row - extra
+            folder = descend
+
+    def row(self, number):
+        folder, child = self._locate(number)
+        is_file, name, size, children = self._page(folder.path, child // PAGE_SIZE)[child % PAGE_SIZE]
+        path = f"{folder.path}/{name}" if folder.path else name
+        return TreeRow(path, name, folder.depth + 1, not is_file, size, children, child in folder.open)
+
+    def rows(self, start, stop):
+        return [self.row(number) for number in range(max(start, 0), min(stop, len(self)))]
+
+    def toggle(self, number):
+        """Expand or collapse the folder on a row; returns False for files"""
+        folder, child = self._locate(number)
+        row = self.row(number)
+        if not row.is_dir:
+            return False
+        if child in folder.open:
+            sub = folder.open.pop(child)
+            folder.open_order.remove(child)
+            folder._grow(-sub.visible)
+        else:
+            sub = _Folder(row.path, row.depth, row.children, folder)
+            folder.open[child] = sub
+            bisect.insort(folder.open_order, child)
+            folder._grow(sub.visible)
+        return True
+
+
+class FilteredList:
+    """Flat list of the files matching a name filter, capped at limit rows"""
+
+    def __init__(self, index, archive_id, text, limit=FILTER_LIMIT):
+        self._rows = index.search_names(archive_id, text, limit + 1)
+        self.truncated = len(self._rows) > limit
+        del self._rows[limit:]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, number):
+        name, size = self._rows[number]
+        return TreeRow(name, name, 0, False, size, 0, False)
+
+    def rows(self, start, stop):
+        return [self.row(number) for number in range(max(start, 0), min(stop, len(self)))]
+
+    def toggle(self, number):
+        return False
@@ -0,0 +1,458 @@
+"""
+Localization Search
+Inverted index over extracted StockGlobal-*.ini files, for text, key prefix and key pattern
+queries across versions and branches, plus a small localhost JSON endpoint
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from ini_diff import iter_lines
+
+
+INDEX_FILENAME = "search_index.db"
+DEFAULT_PORT = 8765
+DEFAULT_LIMIT = 50
+SEARCH_MODES = ("text", "prefix", "key")
+
+# StockGlobal-4-4-0-PTU.ini, StockGlobal-4-4-0-PTU-german.ini (diff reports don't match)
+_OUTPUT_NAME = re.compile(r"^StockGlobal-(\d+(?:-\d+)*)-([A-Za-z0-9]+)(?:-([a-z_]+))?\.ini$")
+
+# Keys and texts are stored once however many versions share them, so indexing a
+# new patch only adds the strings it actually changed to the full-text tables.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    language TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (id INTEGER PRIMARY KEY, key TEXT NOT NULL COLLATE NOCASE);
+CREATE UNIQUE INDEX IF NOT EXISTS keys_exact ON keys (key COLLATE BINARY);
+CREATE INDEX IF NOT EXISTS keys_nocase ON keys (key);
+CREATE TABLE IF NOT EXISTS texts (id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS strings (
+    file_id INTEGER NOT NULL,
+    key_id INTEGER NOT NULL,
+    text_id INTEGER NOT NULL,
+    PRIMARY KEY (file_id, key_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS strings_text ON strings (text_id, key_id, file_id);
+CREATE INDEX IF NOT EXISTS strings_key ON strings (key_id, text_id, file_id);
+"""
+
+IndexedFile = namedtuple("IndexedFile", ["id", "path", "version", "branch", "language"])
+
+SearchHit = namedtuple("SearchHit", ["key", "value", "files"])
+
+
+def parse_output_name(path):
+    """StockGlobal-4-4-0-PTU-german.ini -> ("4.4.0", "PTU", "german"), or None for other files"""
+    match = _OUTPUT_NAME.match(Path(path).name)
+    if match is None:
+        return None
+    version, branch, language = match.groups()
+    return version.replace("-", "."), branch, language or "english"
+
+
+def _like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _key_pattern(pattern, escape=True):
+    """Glob-style key pattern (* and ?) as a LIKE pattern; plain text matches anywhere in the key
+
+    The trigram index can't serve LIKE ... ESCAPE, so without escape a literal
+    _ also matches any single character (harmless for localization keys).
+    """
+    if "*" not in pattern and "?" not in pattern:
+        pattern = f"*{pattern}*"
+    if escape:
+        pattern = _like_escape(pattern)
+    return pattern.replace("*", "%").replace("?", "_")
+
+
+class SearchIndex:
+    """Full-text and key lookups over the extracted files in one or more output folders
+
+    Uses FTS5's trigram tokenizer where this SQLite build has it (true substring
+    matches for queries of three characters or more); older builds fall back to
+    word-prefix matching, and plain scans for anything the index can't answer.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._files = None
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            self.tokenizer = self._create_fts(conn)
+
+    def _conn(self):
+        # One connection per thread, so the HTTP endpoint can answer queries in parallel
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _connect(self):
+        conn = self._conn()
+        with conn:
+            yield conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _create_fts(conn):
+        """Create the full-text tables, returning the tokenizer in use (None without FTS5)"""
+        existing = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'texts_fts'").fetchone()
+        if existing:
+            return "trigram" if "trigram" in existing[0] else "unicode61"
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE texts_fts USING fts5(value, content='texts', content_rowid='id', "
+                    f"tokenize='{tokenizer}')"
+                )
+            except sqlite3.OperationalError:
+                continue
+            if tokenizer == "trigram":
+                conn.execute(
+                    "CREATE VIRTUAL TABLE keys_fts USING fts5(key, content='keys', content_rowid='id', "
+                    "tokenize='trigram')"
+                )
+            return tokenizer
+        return None
+
+    # --- Building ---
+
+    def files(self, folders=None):
+        """Every indexed file by id, or only those directly inside folders
+
+        The database is shared by every folder ever synced, so callers pass the
+        folders they just synced to keep other (possibly stale) ones out.
+        """
+        if self._files is None:
+            with self._connect() as conn:
+                self._files = {
+                    row[0]: IndexedFile(*row)
+                    for row in conn.execute("SELECT id, path, version, branch, language FROM files")
+                }
+        if folders is None:
+            return self._files
+        folders = {Path(folder).resolve() for folder in folders}
+        return {file_id: info for file_id, info in self._files.items() if Path(info.path).parent in folders}
+
+    def sync(self, folder, progress=None):
+        """Bring the index in line with the StockGlobal-*.ini files in folder
+
+        Unchanged files cost one stat() each; only new or rewritten files are read.
+        Returns (indexed, removed) file counts.
+        """
+        folder = Path(folder).resolve()
+        found = {}
+        try:
+            with os.scandir(folder) as it:
+                for item in it:
+                    info = parse_output_name(item.name)
+                    if info is not None and item.is_file():
+                        st = item.stat()
+                        found[str(Path(item.path))] = (st.st_size, st.st_mtime_ns, info)
+        except FileNotFoundError:
+            pass
+
+        with self._write_lock:
+            with self._connect() as conn:
+                known = {
+                    path: (file_id, size, mtime_ns)
+                    for file_id, path, size, mtime_ns in conn.execute("SELECT id, path, size, mtime_ns FROM files")
+                    if Path(path).parent == folder
+                }
+            stale = [
+                (path, record[0]) for path, record in known.items()
+                if path not in found or found[path][:2] != record[1:]
+            ]
+            fresh = [path for path in found if path not in known or found[path][:2] != known[path][1:]]
+
+            if stale:
+                with self._connect() as conn:
+                    for _, file_id in stale:
+                        conn.execute("DELETE FROM strings WHERE file_id = ?", (file_id,))
+                        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                    self._prune(conn)
+            for n, path in enumerate(fresh):
+                if progress is not None:
+                    progress(n / len(fresh), f"Indexing {Path(path).name}...")
+                size, mtime_ns, (version, branch, language) = found[path]
+                self._add(path, size, mtime_ns, version, branch, language)
+            self._files = None
+        removed = len([path for path, _ in stale if path not in found])
+        return len(fresh), removed
+
+    def _add(self, path, size, mtime_ns, version, branch, language):
+        with self._connect() as conn:
+            file_id = conn.execute(
+                "INSERT INTO files (path, size, mtime_ns, version, branch, language) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, version, branch, language)
+            ).lastrowid
+            last_key = conn.execute("SELECT IFNULL(MAX(id), 0) FROM keys").fetchone()[0]
+            last_text = conn.execute("SELECT IFNULL(MAX(id), 0) FROM texts").fetchone()[0]
+
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS staged (key TEXT NOT NULL, value TEXT NOT NULL)")
+            conn.execute("DELETE FROM staged")
+            conn.executemany(
+                "INSERT INTO staged VALUES (?, ?)",
+                ((key.decode("utf-8", "replace"), value.decode("utf-8", "replace"))
+                 for _, key, value in iter_lines(path))
+            )
+            conn.execute("INSERT OR IGNORE INTO keys (key) SELECT key FROM staged")
+            conn.execute("INSERT OR IGNORE INTO texts (value) SELECT value FROM staged")
+            # Later definitions win, as with the game's own loader
+            conn.execute(
+                "INSERT OR REPLACE INTO strings (file_id, key_id, text_id) "
+                "SELECT ?, k.id, t.id FROM staged s "
+                "JOIN keys k ON k.key = s.key COLLATE BINARY JOIN texts t ON t.value = s.value "
+                "ORDER BY s.rowid",
+                (file_id,)
+            )
+            conn.execute("DELETE FROM staged")
+
+            # Only strings this file introduced go into the full-text tables
+            if self.tokenizer:
+                conn.execute(
+                    "INSERT INTO texts_fts (rowid, value) SELECT id, value FROM texts WHERE id > ?", (last_text,)
+                )
+            if self.tokenizer == "trigram":
+                conn.execute("INSERT INTO keys_fts (rowid, key) SELECT id, key FROM keys WHERE id > ?", (last_key,))
+
+    def _prune(self, conn):
+        """Drop keys and texts no indexed file uses any more"""
+        orphans = conn.execute(
+            "SELECT id, value FROM texts WHERE NOT EXISTS (SELECT 1 FROM strings WHERE text_id = texts.id)"
+        ).fetchall()
+        if self.tokenizer:
+            conn.executemany("INSERT INTO texts_fts (texts_fts, rowid, value) VALUES ('delete', ?, ?)", orphans)
+        conn.executemany("DELETE FROM texts WHERE id = ?", ((text_id,) for text_id, _ in orphans))
+
+        orphans = conn.execute(
+            "SELECT id, key FROM keys WHERE NOT EXISTS (SELECT 1 FROM strings WHERE key_id = keys.id)"
+        ).fetchall()
+        if self.tokenizer == "trigram":
+            conn.executemany("INSERT INTO keys_fts (keys_fts, rowid, key) VALUES ('delete', ?, ?)", orphans)
+        conn.executemany("DELETE FROM keys WHERE id = ?", ((key_id,) for key_id, _ in orphans))
+
+    # --- Queries ---
+
+    def _matches(self, conn, query, mode):
+        """Yield (key_id, text_id, file_id) rows for a query, grouped by key/text pair"""
+        if mode == "text":
+            if self.tokenizer == "trigram" and len(query) >= 3:
+                match = '"' + query.replace('"', '""') + '"'
+            elif self.tokenizer == "unicode61" and re.search(r"\w", query):
+                match = " ".join('"' + word.replace('"', '""') + '"*' for word in re.findall(r"\w+", query))
+            else:
+                match = None
+            if match is not None:
+                return conn.execute(
+                    "SELECT s.key_id, s.text_id, s.file_id FROM texts_fts JOIN strings s ON s.text_id = texts_fts.rowid "
+                    "WHERE texts_fts MATCH ?", (match,)
+                )
+            return conn.execute(
+                "SELECT s.key_id, s.text_id, s.file_id FROM texts t JOIN strings s ON s.text_id = t.id "
+                "WHERE t.value LIKE ? ESCAPE '\\'", (f"%{_like_escape(query)}%",)
+            )
+
+        if mode == "prefix":
+            return conn.execute(
+                "SELECT s.key_id, s.text_id, s.file_id FROM keys k JOIN strings s ON s.key_id = k.id "
+                "WHERE k.key LIKE ? ESCAPE '\\' ORDER BY k.key", (_like_escape(query) + "%",)
+            )
+
+        if mode == "key":
+            if self.tokenizer == "trigram":
+                return conn.execute(
+                    "SELECT s.key_id, s.text_id, s.file_id FROM keys_fts JOIN strings s ON s.key_id = keys_fts.rowid "
+                    "WHERE keys_fts.key LIKE ?", (_key_pattern(query, escape=False),)
+                )
+            return conn.execute(
+                "SELECT s.key_id, s.text_id, s.file_id FROM keys k JOIN strings s ON s.key_id = k.id "
+                "WHERE k.key LIKE ? ESCAPE '\\'", (_key_pattern(query),)
+            )
+
+        raise ValueError(f"Unknown search mode {mode} (expected one of {', '.join(SEARCH_MODES)})")
+
+    def search(self, query, mode="text", branches=None, versions=None, languages=None, limit=DEFAULT_LIMIT,
+               folders=None):
+        """Return (hits, more): up to limit key/text pairs, each with the files that contain it
+
+        Only files directly inside folders count (every indexed file without).
+        Matching stops as soon as limit pairs are found, so broad queries cost no
+        more than narrow ones.
+        """
+        query = query.strip()
+        if not query:
+            return [], False
+        files = self.files(folders)
+        branches = {branch.upper() for branch in branches} if branches else None
+        allowed = {
+            file_id for file_id, info in files.items()
+            if (not branches or info.branch.upper() in branches)
+            and (not versions or info.version in versions)
+            and (not languages or info.language in languages)
+        }
+
+        pairs = {}
+        more = False
+        with self._connect() as conn:
+            for key_id, text_id, file_id in self._matches(conn, query, mode):
+                if file_id not in allowed:
+                    continue
+                pair = pairs.get((key_id, text_id))
+                if pair is None:
+                    if len(pairs) == limit:
+                        more = True
+                        break
+                    pair = pairs[key_id, text_id] = []
+                pair.append(file_id)
+
+            keys = dict(self._lookup(conn, "keys", "key", {key_id for key_id, _ in pairs}))
+            texts = dict(self._lookup(conn, "texts", "value", {text_id for _, text_id in pairs}))
+
+        hits = [
+            SearchHit(keys[key_id], texts[text_id], [files[file_id] for file_id in file_ids])
+            for (key_id, text_id), file_ids in pairs.items()
+        ]
+        return hits, more
+
+    @staticmethod
+    def _lookup(conn, table, column, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            yield from conn.execute(
+                f"SELECT id, {column} FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+
+
+def hit_to_json(hit):
+    return {
+        "key": hit.key,
+        "value": hit.value,
+        "files": [
+            {"version": info.version, "branch": info.branch, "language": info.language, "path": info.path}
+            for info in hit.files
+        ]
+    }
+
+
+def format_hit(hit):
+    """One line per hit: key = value [4.4.0 PTU, 4.3.2 LIVE]"""
+    where = ", ".join(
+        f"{info.version} {info.branch}" + ("" if info.language == "english" else f" {info.language}")
+        for info in hit.files
+    )
+    return f"{hit.key} = {hit.value}  [{where}]"
+
+
+# --- HTTP endpoint ---
+
+SYNC_INTERVAL = 5.0
+
+
+class SearchServer(ThreadingHTTPServer):
+    """Localhost JSON endpoint: GET /search?q=...&mode=text|prefix|key&branch=&version=&language=&limit=
+
+    GET /files lists what is indexed. Only files directly inside folders are
+    served; the folders are re-synced at most every SYNC_INTERVAL seconds, so
+    files extracted while the server runs show up on their own.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, index, folders, host="127.0.0.1", port=DEFAULT_PORT):
+        super().__init__((host, port), _SearchHandler)
+        self.index = index
+        self.folders = [Path(folder) for folder in folders]
+        self._sync_lock = threading.Lock()
+        self._synced = 0.0
+
+    def sync(self):
+        if time.monotonic() - self._synced < SYNC_INTERVAL or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            for folder in self.folders:
+                self.index.sync(folder)
+            self._synced = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values for name, values in parse_qs(url.query).items()}
+        try:
+            self.server.sync()
+            if url.path == "/files":
+                self._reply(200, [
+                    {"version": info.version, "branch": info.branch, "language": info.language, "path": info.path}
+                    for info in self.server.index.files(self.server.folders).values()
+                ])
+            elif url.path in ("/", "/search"):
+                started = time.perf_counter()
+                hits, more = self.server.index.search(
+                    params.get("q", [""])[0],
+                    mode=params.get("mode", ["text"])[0],
+                    branches=params.get("branch"),
+                    versions=params.get("version"),
+                    languages=params.get("language"),
+                    limit=max(1, min(int(params.get("limit", [DEFAULT_LIMIT])[0]), 1000)),
+                    folders=self.server.folders
+                )
+                self._reply(200, {
+                    "hits": [hit_to_json(hit) for hit in hits],
+                    "more": more,
+                    "ms": round((time.perf_counter() - started) * 1000, 2)
+                })
+            else:
+                self._reply(404, {"error": f"Unknown path {url.path}"})
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+
+    def _reply(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,28 @@
+"""
+Shared test fixtures: small synthetic Data.p4k archives built with the benchmark fixture writer
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from p4k_fixture import P4kWriter  # noqa: E402
+
+
+@pytest.fixture
+def make_p4k(tmp_path):
+    """Build an archive from {name: bytes} (or {name: (bytes, method)}) and return its path"""
+    def make(entries, name="Data.p4k"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with P4kWriter(path) as writer:
+            for entry_name, data in entries.items():
+                data, method = data if isinstance(data, tuple) else (data, 0)
+                writer.add(entry_name, data, method)
+        return path
+    return make
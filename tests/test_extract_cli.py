@@ -0,0 +1,23 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import extract_cli
+import search_index
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_import_does_not_load_search_server():
+    code = "import sys, extract_cli; print('search_index' in sys.modules, 'http.server' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_search_defaults_match_search_index():
+    parser = extract_cli.build_parser()
+    args = parser.parse_args(["--search", "x", "--serve-search"])
+    assert args.limit == search_index.DEFAULT_LIMIT
+    assert args.serve_search == search_index.DEFAULT_PORT
+    modes = next(action for action in parser._actions if action.dest == "search_mode").choices
+    assert tuple(modes) == search_index.SEARCH_MODES
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import threading
+import zlib
+
+import extractor_core
+import p4k_reader
+import version_cache
+
+
+def test_timed_out_root_returns_copies_of_known(tmp_path, monkeypatch):
+    root = tmp_path / "StarCitizen"
+    path = str(root / "LIVE" / "Data.p4k")
+    known = {path: {"branch": "LIVE", "path": path, "display": "LIVE (4.4.0)", "version": "4.4.0"}}
+    release = threading.Event()
+    monkeypatch.setattr(extractor_core, "COMMON_ROOTS", [str(root)])
+    monkeypatch.setattr(extractor_core, "scan_root", lambda *args: release.wait())
+    root.mkdir()
+    try:
+        installations = extractor_core.find_installations(known, timeout=0.05)
+    finally:
+        release.set()
+    assert installations == [known[path]]
+    assert installations[0] is not known[path]
+
+
+class LockedIndex:
+    """An index another branch is still writing to"""
+
+    def is_indexed(self, path):
+        return True
+
+    def ensure(self, archive):
+        return 1
+
+    def find_entry(self, archive, name):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_locked_index_means_not_up_to_date(make_p4k, tmp_path):
+    data = b"key=value\r\n"
+    p4k = make_p4k({p4k_reader.GLOBAL_INI_ENTRY: data})
+    out = tmp_path / "global.ini"
+    out.write_bytes(data)
+    extractor_core.write_manifest(out, p4k, p4k_reader.GLOBAL_INI_ENTRY, zlib.crc32(data), len(data))
+    assert extractor_core.is_up_to_date(p4k, out, LockedIndex())
+    # A touched archive needs the entry's CRC - which the locked index can't give
+    os.utime(p4k, ns=(0, 0))
+    assert not extractor_core.is_up_to_date(p4k, out, LockedIndex())
+
+
+def test_corrupt_cached_copy_falls_back_to_the_archive(make_p4k, tmp_path):
+    data = "".join(f"key_{i}=Value {i}\r\n" for i in range(20000)).encode("utf-8")
+    inst = {"branch": "LIVE", "path": str(make_p4k({p4k_reader.GLOBAL_INI_ENTRY: data})), "version": "4.4.0"}
+    cache = version_cache.VersionCache(tmp_path / "global_ini_cache")
+    out = tmp_path / "global.ini"
+    assert extractor_core.extract_installation(inst, out, cache=cache)[0] == "extracted"
+    assert extractor_core.extract_installation(inst, out, cache=cache)[0] == "cached"
+
+    # Garble the deflate stream past the gzip header
+    blob = next((tmp_path / "global_ini_cache").rglob("*.ini.gz"))
+    raw = bytearray(blob.read_bytes())
+    raw[20:400] = bytes(380)
+    blob.write_bytes(bytes(raw))
+    out.write_bytes(b"previous")
+    assert not extractor_core.restore_from_cache(cache, "LIVE", "4.4.0", inst["path"], out)
+    assert out.read_bytes() == b"previous"
+    assert extractor_core.extract_installation(inst, out, cache=cache)[0] == "extracted"
+    assert out.read_bytes() == data
@@ -0,0 +1,97 @@
+import hashlib
+import zlib
+
+import pytest
+
+import ini_check
+
+BOM = b"\xef\xbb\xbf"
+
+
+def check(data, chunk_size=None):
+    checker = ini_check.IniCheck()
+    chunk_size = chunk_size or len(data) or 1
+    for start in range(0, len(data), chunk_size):
+        checker.feed(data[start:start + chunk_size])
+    return checker.report()
+
+
+def ini(lines, newline=b"\r\n", bom=True):
+    return (BOM if bom else b"") + b"".join(line.encode("utf-8") + newline for line in lines)
+
+
+LINES = ["; header", "ship_name=Aurora", "", "schlüssel=Wert ✓", "# note", "shield_name=Shield"]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 2, 5, 4096])
+def test_checksums_and_counts_match_whole_file(chunk_size):
+    data = ini(LINES * 50)
+    report = check(data, chunk_size)
+    assert report["crc32"] == f"{zlib.crc32(data):08x}"
+    assert report["sha256"] == hashlib.sha256(data).hexdigest()
+    assert report["size"] == len(data)
+    assert (report["lines"], report["comments"], report["blank"]) == (300, 100, 50)
+    # Every key after the first block is a repeat
+    assert report["keys"] == 3 and report["duplicates"] == 147
+    assert report["encoding"] == "utf-8-sig" and report["line_endings"] == "crlf"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_bom_detection(chunk_size):
+    assert check(ini(LINES), chunk_size)["encoding"] == "utf-8-sig"
+    report = check(ini(LINES, bom=False), chunk_size)
+    assert report["encoding"] == "utf-8" and report["problems"] == []
+    # A BOM that is only a prefix of the file's first bytes isn't one
+    assert check(b"\xef\xbbx=1\n", chunk_size)["encoding"] == "invalid"
+
+
+def test_line_endings():
+    assert check(ini(LINES, newline=b"\n"))["line_endings"] == "lf"
+    assert check(ini(LINES)[:-2])["line_endings"] == "crlf"
+    mixed = check(ini(LINES[:3]) + ini(LINES[3:], newline=b"\n", bom=False), 4)
+    assert mixed["line_endings"] == "mixed"
+    report = check(b"a=1\r\nb=2")
+    assert report["final_newline"] is False and report["keys"] == 2
+
+
+def test_malformed_lines():
+    report = check(ini(["a=1", "just text", " =no key", "b=2", "   ", "c"]), 3)
+    assert report["malformed"] == 3
+    assert report["malformed_lines"] == [2, 3, 6]
+    assert report["blank"] == 1 and report["keys"] == 2
+    assert "3 line(s) without key=value" in report["problems"]
+
+
+def test_duplicate_keys_across_chunks():
+    data = ini(["dup=1", "other=x", "dup=2", "other =y"])
+    for chunk_size in (1, 4, len(data)):
+        report = check(data, chunk_size)
+        assert report["duplicates"] == 2
+        assert sorted(report["duplicate_keys"]) == ["dup", "other"]
+        assert report["keys"] == 2
+
+
+def test_keys_spanning_chunk_boundaries():
+    data = ini([f"key_{i:04d}_ünïcödé=Value {i}" for i in range(500)])
+    for chunk_size in (7, 64, 1000):
+        report = check(data, chunk_size)
+        assert (report["keys"], report["duplicates"], report["malformed"]) == (500, 0, 0)
+        assert report["encoding"] == "utf-8-sig"
+
+
+def test_problems():
+    report = check(b"a=\xff\n")
+    assert report["encoding"] == "invalid" and report["problems"] == ["invalid UTF-8 at byte 2"]
+    assert check(b"a=\xc3")["problems"] == ["file ends inside a UTF-8 sequence"]
+    assert check(b"")["problems"] == ["no key=value lines"]
+    assert len(check(ini([f"k=x{i}" for i in range(20)]))["duplicate_keys"]) == ini_check.MAX_EXAMPLES
+
+
+def test_feed_file_passes_chunks_on(tmp_path):
+    path = tmp_path / "global.ini"
+    path.write_bytes(ini(LINES))
+    seen = []
+    checker = ini_check.IniCheck()
+    checker.feed_file(path, seen.append)
+    assert b"".join(seen) == path.read_bytes()
+    assert checker.report()["keys"] == 3
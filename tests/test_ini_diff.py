@@ -0,0 +1,133 @@
+import csv
+import json
+
+import ini_diff
+
+BOM = b"\xef\xbb\xbf"
+
+
+def write(path, text, bom=True, newline="\r\n"):
+    path.write_bytes((BOM if bom else b"") + text.replace("\n", newline).encode("utf-8"))
+    return path
+
+
+def test_diff_added_removed_changed(tmp_path):
+    old = write(tmp_path / "StockGlobal-4-3-2-LIVE.ini", "; header\na=Alpha\nb=Bravo\nc=Charlie\n")
+    new = write(tmp_path / "StockGlobal-4-4-0-PTU.ini", "; header\na=Alpha\nc=Charlie 2\nd=Delta\n", newline="\n")
+    diff = ini_diff.diff_files(old, new)
+    assert (diff.added, diff.removed, diff.changed) == ([b"d"], [b"b"], [b"c"])
+    assert ini_diff.summary(diff) == "1 added, 1 removed, 1 changed"
+
+
+def test_diff_ignores_bom_and_line_endings(tmp_path):
+    old = write(tmp_path / "old.ini", "a=Alpha\nb=Bravo\n", bom=True, newline="\r\n")
+    new = write(tmp_path / "new.ini", "a=Alpha\nb=Bravo", bom=False, newline="\n")
+    diff = ini_diff.diff_files(old, new)
+    assert (diff.added, diff.removed, diff.changed) == ([], [], [])
+
+
+def test_diff_duplicate_keys_last_wins(tmp_path):
+    old = write(tmp_path / "old.ini", "a=First\na=Second\n")
+    new = write(tmp_path / "new.ini", "a=Second\n")
+    index = ini_diff.KeyIndex(old)
+    assert index.duplicates == 1
+    assert ini_diff.diff_indexes(index, ini_diff.KeyIndex(new)).changed == []
+
+
+def test_diff_values_keep_everything_after_the_first_equals(tmp_path):
+    old = write(tmp_path / "old.ini", "formula=x=1\n")
+    new = write(tmp_path / "new.ini", "formula=x=2\n")
+    diff = ini_diff.diff_files(old, new)
+    assert diff.changed == [b"formula"]
+    assert diff.old.values(diff.changed) == {b"formula": "x=1"}
+
+
+def test_write_reports(tmp_path):
+    old = write(tmp_path / "StockGlobal-4-3-2-LIVE.ini", "a=Ä old\nb=gone\n")
+    new = write(tmp_path / "StockGlobal-4-4-0-PTU.ini", "a=Ä new\nc=new key\n")
+    paths = ini_diff.write_reports(ini_diff.diff_files(old, new), ini_diff.REPORT_FORMATS)
+    assert [path.name for path in paths] == [
+        "StockGlobal-4-4-0-PTU-vs-4-3-2-LIVE.diff.ini",
+        "StockGlobal-4-4-0-PTU-vs-4-3-2-LIVE.json",
+        "StockGlobal-4-4-0-PTU-vs-4-3-2-LIVE.csv",
+    ]
+
+    report = json.loads(paths[1].read_text(encoding="utf-8"))
+    assert report["added"] == {"c": "new key"}
+    assert report["removed"] == {"b": "gone"}
+    assert report["changed"] == {"a": {"old": "Ä old", "new": "Ä new"}}
+
+    fragment = paths[0].read_text(encoding="utf-8-sig")
+    assert "c=new key\n" in fragment and "a=Ä new\n" in fragment and "; b=gone\n" in fragment
+
+    with open(paths[2], encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["change", "key", "old", "new"]
+    assert ["changed", "a", "Ä old", "Ä new"] in rows
+
+
+# --- Three-way merge ---
+
+OLD_STOCK = "; stock header\nship=Ship\nshield=Shield\ncargo=Cargo\n\nlegacy=Legacy\n"
+NEW_STOCK = "; stock header\nship=Ship\nshield=Shield Generator\ncargo=Cargo\nquantum=Quantum\n\n"
+TRANSLATED = "ship=Schiff\nshield=Schild\ncargo=Fracht\nlegacy=Altlast\n"
+
+
+def merge_fixture(tmp_path, new_stock=NEW_STOCK, translated=TRANSLATED, **kwargs):
+    old = write(tmp_path / "StockGlobal-4-3-2-LIVE.ini", OLD_STOCK)
+    new = write(tmp_path / "StockGlobal-4-4-0-LIVE.ini", new_stock)
+    mine = write(tmp_path / "MyPack.ini", translated, bom=False, newline="\n")
+    output = ini_diff.merged_path(mine, new)
+    return ini_diff.merge_translation(old, new, mine, output, **kwargs), output
+
+
+def test_clean_merge_keeps_stock_layout(tmp_path):
+    result, output = merge_fixture(tmp_path, new_stock=OLD_STOCK)
+    assert output.name == "MyPack-4-4-0-LIVE.ini"
+    assert (result.kept, result.added, result.untranslated) == (4, 0, 0)
+    assert result.conflicts == [] and result.removed == []
+    # Layout (BOM, CRLF, comments, blank lines) follows the stock file, values the translation
+    assert output.read_bytes() == BOM + (
+        "; stock header\r\nship=Schiff\r\nshield=Schild\r\ncargo=Fracht\r\n\r\nlegacy=Altlast\r\n"
+    ).encode("utf-8")
+
+
+def test_merge_reports_changed_source_as_conflict(tmp_path):
+    result, output = merge_fixture(tmp_path)
+    assert result.conflicts == [("shield", ini_diff.SOURCE_CHANGED, "Shield", "Shield Generator", "Schild")]
+    assert (result.kept, result.added) == (2, 1)
+    lines = output.read_bytes().decode("utf-8-sig").split("\r\n")
+    # The outdated translation is kept by default, the new key comes in as English
+    assert "shield=Schild" in lines and "quantum=Quantum" in lines
+
+    result, output = merge_fixture(tmp_path, keep_outdated=False)
+    assert "shield=Shield Generator" in output.read_bytes().decode("utf-8-sig").split("\r\n")
+
+
+def test_merge_reports_keys_dropped_upstream(tmp_path):
+    result, output = merge_fixture(tmp_path)
+    assert result.removed == ["legacy"]
+    assert "legacy" not in output.read_text(encoding="utf-8-sig")
+
+    conflicts = ini_diff.write_conflicts(result)
+    assert conflicts.name == "MyPack-4-4-0-LIVE.conflicts.csv"
+    with open(conflicts, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[1:] == [
+        ["shield", ini_diff.SOURCE_CHANGED, "Shield", "Shield Generator", "Schild"],
+        ["legacy", "removed-from-stock", "", "", ""],
+    ]
+
+
+def test_merge_flags_translations_without_old_source(tmp_path):
+    result, output = merge_fixture(tmp_path, translated=TRANSLATED + "quantum=Quanten\n")
+    assert ("quantum", ini_diff.NO_OLD_SOURCE, "", "Quantum", "Quanten") in result.conflicts
+    assert b"quantum=Quanten\r\n" in output.read_bytes()
+
+
+def test_merge_without_bom_or_final_newline(tmp_path):
+    old = write(tmp_path / "old.ini", "a=A\nb=B", bom=False, newline="\n")
+    mine = write(tmp_path / "mine.ini", "a=X\nb=Y\n", bom=False, newline="\n")
+    output = tmp_path / "merged.ini"
+    ini_diff.merge_translation(old, old, mine, output)
+    assert output.read_bytes() == b"a=X\nb=Y"
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+
+import pytest
+
+import ini_export
+
+BOM = b"\xef\xbb\xbf"
+LINES = [
+    "; header comment",
+    "aaa_first=First",
+    "ship_name=Aurora",
+    "",
+    "ship_desc=A ship, with = signs",
+    "schlüssel_ä=Wert mit Ümlaut ✓",
+    "ship_name=Aurora Mk II",
+    "shield_name=Shield Generator",
+    "zzz_last=Last",
+    "ключ=значение",
+]
+
+
+def write_ini(path, lines=LINES):
+    path.write_bytes(BOM + "".join(f"{line}\r\n" for line in lines).encode("utf-8"))
+    return path
+
+
+def stream_export(path, formats, chunk_size=7):
+    """Export the way extraction does: from chunks small enough to split the BOM and UTF-8 sequences"""
+    data = path.read_bytes()
+    exporter = ini_export.IniExporter(path, formats)
+    for start in range(0, len(data), chunk_size):
+        exporter.feed(data[start:start + chunk_size])
+    return exporter.finish({"version": "4.4.0"})
+
+
+def test_binary_round_trip(tmp_path):
+    ini = write_ini(tmp_path / "global.ini")
+    [path] = stream_export(ini, ["binary"])
+    assert path.name == "global.gidx"
+    with ini_export.CompactIni(path) as compact:
+        assert len(compact) == 7
+        assert compact.get("ship_name") == "Aurora Mk II"
+        assert compact.get("ship_desc") == "A ship, with = signs"
+        assert compact.get("schlüssel_ä") == "Wert mit Ümlaut ✓"
+        assert compact.get("ключ") == "значение"
+        assert compact.get("; header comment") is None
+        assert compact.get("SHIP_NAME", "missing") == "missing"
+        keys = [key for key, _ in compact.items()]
+        assert keys == sorted(keys, key=lambda key: key.encode("utf-8"))
+        assert keys[0] == "aaa_first" and keys[-1] == "ключ"
+
+
+def test_binary_prefix_at_both_ends(tmp_path):
+    [path] = ini_export.export_file(write_ini(tmp_path / "global.ini"), ["binary"])
+    with ini_export.CompactIni(path) as compact:
+        assert list(compact.prefix("aaa")) == [("aaa_first", "First")]
+        assert list(compact.prefix("ключ")) == [("ключ", "значение")]
+        assert [key for key, _ in compact.prefix("sh")] == ["shield_name", "ship_desc", "ship_name"]
+        assert list(compact.prefix("")) == list(compact.items())
+        # Before the first key, past the last one, and between two keys
+        assert list(compact.prefix("a")) == [("aaa_first", "First")]
+        assert list(compact.prefix("0")) == []
+        assert list(compact.prefix("￿")) == []
+        assert list(compact.prefix("ship_z")) == []
+        assert compact.get("0") is None and compact.get("￿") is None
+
+
+def test_binary_empty_and_invalid(tmp_path):
+    [path] = ini_export.export_file(write_ini(tmp_path / "empty.ini", ["; nothing here"]), ["binary"])
+    with ini_export.CompactIni(path) as compact:
+        assert len(compact) == 0
+        assert compact.get("x") is None and list(compact.prefix("")) == []
+    bogus = tmp_path / "bogus.gidx"
+    bogus.write_bytes(b"NOPE" + bytes(60))
+    with pytest.raises(ValueError):
+        ini_export.CompactIni(bogus)
+
+
+def test_sqlite_export_and_full_text_query(tmp_path):
+    ini = write_ini(tmp_path / "global.ini")
+    [path] = stream_export(ini, ["sqlite"])
+    conn = sqlite3.connect(str(path))
+    try:
+        meta = dict(conn.execute("SELECT name, value FROM meta"))
+        assert meta["count"] == "7" and meta["version"] == "4.4.0"
+        if meta["fts"] == "None":
+            pytest.skip("SQLite built without FTS")
+        rows = conn.execute(
+            "SELECT s.key, s.value, s.line FROM strings_fts JOIN strings s ON s.id = strings_fts.rowid "
+            "WHERE strings_fts MATCH ? ORDER BY s.key", ("aurora",)
+        ).fetchall()
+        # Later definitions win, keeping their own line number
+        assert rows == [("ship_name", "Aurora Mk II", 7)]
+        assert conn.execute(
+            "SELECT key FROM strings WHERE key = ? COLLATE NOCASE", ("SHIELD_NAME",)
+        ).fetchone() == ("shield_name",)
+    finally:
+        conn.close()
+
+
+def test_is_current(tmp_path):
+    ini = write_ini(tmp_path / "global.ini")
+    assert not ini_export.is_current(ini, ["sqlite", "binary"])
+    ini_export.export_file(ini, ["sqlite", "binary"])
+    assert ini_export.is_current(ini, ["sqlite", "binary"])
+    st = os.stat(ini)
+    os.utime(ini, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not ini_export.is_current(ini, ["binary"])
+    with pytest.raises(ValueError):
+        ini_export.IniExporter(ini, ["xml"])
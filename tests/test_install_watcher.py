@@ -0,0 +1,99 @@
+import pytest
+
+import install_watcher
+
+LIVE = {"branch": "LIVE", "path": "C:/StarCitizen/LIVE/Data.p4k"}
+PTU = {"branch": "PTU", "path": "C:/StarCitizen/PTU/Data.p4k"}
+
+
+class Harness:
+    """A watcher over fake archives, a fake clock and a scripted on_stable"""
+
+    def __init__(self, monkeypatch, installations=(LIVE,), settle=100):
+        self.now = 0.0
+        self.fingerprints = {inst["path"]: (1000, 1) for inst in installations}
+        self.results = []
+        self.calls = []
+        self.events = []
+        monkeypatch.setattr(install_watcher, "_fingerprint", self.fingerprints.get)
+        self.watcher = install_watcher.InstallationWatcher(
+            lambda: list(installations), self.on_stable, interval=30, settle=settle,
+            on_event=lambda inst, message: self.events.append((inst["branch"], message)),
+            clock=lambda: self.now
+        )
+
+    def on_stable(self, inst):
+        self.calls.append(inst["branch"])
+        result = self.results.pop(0) if self.results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def step(self, advance=30):
+        self.now += advance
+        self.calls.clear()
+        self.watcher.step()
+        return self.calls
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    harness = Harness(monkeypatch)
+    harness.watcher._refresh(initial=True)
+    return harness
+
+
+def test_catch_up_on_startup(harness):
+    assert harness.step(0) == ["LIVE"]
+    # Handled: nothing more until the archive changes
+    assert harness.step() == []
+    assert harness.step() == []
+
+
+def test_change_waits_for_settle(harness):
+    harness.step(0)
+    harness.fingerprints[LIVE["path"]] = (2000, 2)
+    assert harness.step() == []
+    assert ("LIVE", "change detected - waiting for it to settle") in harness.events
+    assert harness.step(50) == []
+    assert harness.step(50) == ["LIVE"]
+    assert harness.step(200) == []
+
+
+def test_change_during_settle_restarts_it(harness):
+    harness.step(0)
+    harness.fingerprints[LIVE["path"]] = (2000, 2)
+    harness.step()
+    assert harness.step(90) == []
+    harness.fingerprints[LIVE["path"]] = (3000, 3)
+    assert harness.step(20) == []
+    assert harness.step(90) == []
+    assert harness.step(20) == ["LIVE"]
+
+
+@pytest.mark.parametrize("failure", [False, OSError("Data.p4k is locked")])
+def test_failure_is_retried_next_poll(harness, failure):
+    harness.results = [failure, True]
+    assert harness.step(0) == ["LIVE"]
+    assert ("LIVE", "will retry in 30s") in harness.events
+    if isinstance(failure, Exception):
+        assert ("LIVE", "failed: Data.p4k is locked") in harness.events
+    assert harness.step() == ["LIVE"]
+    assert harness.step() == []
+
+
+def test_retry_waits_again_if_the_archive_changes(harness):
+    harness.results = [False]
+    harness.step(0)
+    harness.fingerprints[LIVE["path"]] = (2000, 2)
+    assert harness.step() == []
+    assert harness.step(100) == ["LIVE"]
+
+
+def test_one_failing_installation_does_not_stop_the_others(monkeypatch):
+    harness = Harness(monkeypatch, installations=(LIVE, PTU))
+    harness.watcher._refresh(initial=True)
+    harness.results = [RuntimeError("boom"), True]
+    assert harness.step(0) == ["LIVE", "PTU"]
+    assert harness.step() == ["LIVE"]
+    assert harness.step() == []
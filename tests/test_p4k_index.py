@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import p4k_index
+import p4k_reader
+
+
+def names(entries):
+    return sorted(entry.name for entry in entries)
+
+
+def test_find_prefix_is_case_insensitive_at_the_range_end(make_p4k, tmp_path):
+    p4k = make_p4k({
+        "Data/Objects/Zeta/a.xml": b"a",
+        "Data/Objects/zulu/b.xml": b"b",
+        "Data/Objects/[bracket]/c.xml": b"c",
+        "Data/Objects/Alpha/d.xml": b"d",
+    })
+    index = p4k_index.P4kIndex(tmp_path / "index.db")
+    with p4k_reader.P4kArchive(p4k) as archive:
+        assert names(index.find_prefix(archive, "Data/Objects/Z")) == [
+            "Data/Objects/Zeta/a.xml", "Data/Objects/zulu/b.xml"
+        ]
+        assert names(index.find_prefix(archive, "data/objects/ZETA/")) == ["Data/Objects/Zeta/a.xml"]
+        assert names(index.find_prefix(archive, "Data/Objects/[")) == ["Data/Objects/[bracket]/c.xml"]
+        assert len(index.find_prefix(archive, "")) == 4
+
+
+def test_find_entry_is_case_insensitive(make_p4k, tmp_path):
+    p4k = make_p4k({"Data/Localization/english/global.ini": b"key=value\n"})
+    index = p4k_index.P4kIndex(tmp_path / "index.db")
+    with p4k_reader.P4kArchive(p4k) as archive:
+        assert index.find_entry(archive, "data/localization/ENGLISH/global.ini").uncompressed_size == 10
+        assert index.find_entry(archive, "Data/Localization/german/global.ini") is None
+
+
+def test_parallel_branches_share_the_index(make_p4k, tmp_path, monkeypatch):
+    files = {f"Data/Objects/{i:04d}.xml": b"x" for i in range(2000)}
+    archives = [make_p4k(files, name=f"{branch}/Data.p4k") for branch in ("LIVE", "PTU", "EPTU")]
+    index = p4k_index.P4kIndex(tmp_path / "index.db")
+    builds = []
+    build = p4k_index.P4kIndex._build
+    monkeypatch.setattr(p4k_index.P4kIndex, "_build", lambda *args: builds.append(1) or build(*args))
+
+    def lookup(path):
+        with p4k_reader.P4kArchive(path) as archive:
+            return len(index.find_prefix(archive, "Data/Objects/"))
+
+    # Every branch twice at once: each archive is built exactly once, nothing sees a locked database
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        counts = list(pool.map(lookup, archives * 2))
+    assert counts == [len(files)] * 6
+    assert len(builds) == 3
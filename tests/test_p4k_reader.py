@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+import zlib
+
+import pytest
+
+import p4k_reader
+from p4k_fixture import METHOD_DEFLATE, METHOD_STORED, METHOD_ZSTD, P4kWriter, zstandard
+
+INI = p4k_reader.GLOBAL_INI_ENTRY
+DATA = ("﻿" + "".join(f"item_{i:05d}=Value {i} ünïcödé\r\n" for i in range(5000))).encode("utf-8")
+
+METHODS = [
+    METHOD_STORED,
+    METHOD_DEFLATE,
+    pytest.param(METHOD_ZSTD, marks=pytest.mark.skipif(zstandard is None, reason="zstandard not installed")),
+]
+
+
+def leftovers(folder):
+    return [path.name for path in folder.iterdir() if path.name.endswith(".part")]
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_round_trip(make_p4k, tmp_path, method):
+    p4k = make_p4k({INI: (DATA, method), "Data/other.xml": (b"<x/>", method)})
+    out = tmp_path / "global.ini"
+    chunks = []
+    with p4k_reader.P4kArchive(p4k) as archive:
+        entry = archive.find_entry(INI)
+        assert entry.method == method
+        assert archive.extract(entry, out, on_chunk=chunks.append) == len(DATA)
+    assert out.read_bytes() == DATA
+    assert b"".join(chunks) == DATA
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_extract_many(make_p4k, tmp_path, method):
+    files = {f"Data/Localization/lang{i}/global.ini": DATA[i:] for i in range(6)}
+    p4k = make_p4k({name: (data, method) for name, data in files.items()})
+    done = []
+    with p4k_reader.P4kArchive(p4k) as archive:
+        jobs = [(entry, tmp_path / entry.name) for entry in archive.find_prefix("Data/Localization/")]
+        archive.extract_many(jobs, max_workers=3, on_done=done.append)
+    assert len(done) == len(files)
+    for name, data in files.items():
+        assert (tmp_path / name).read_bytes() == data
+
+
+def test_find_entry(make_p4k):
+    p4k = make_p4k({INI: DATA, "Data\\Backslash\\file.txt": b"x"})
+    with p4k_reader.P4kArchive(p4k) as archive:
+        assert archive.find_entry(INI).uncompressed_size == len(DATA)
+        assert archive.find_entry(INI.upper()).name == INI
+        assert archive.find_entry("Data/Backslash/file.txt").name == "Data/Backslash/file.txt"
+        assert archive.find_entry("Data/Localization/german/global.ini") is None
+        # A name that is only a suffix of a stored one must not match it
+        assert archive.find_entry("Localization/english/global.ini") is None
+    with pytest.raises(p4k_reader.P4kError):
+        p4k_reader.extract_entry(p4k, "Data/missing.ini", p4k.parent / "missing.ini")
+
+
+def test_crc_mismatch_keeps_previous_output(tmp_path):
+    p4k = tmp_path / "Data.p4k"
+    with P4kWriter(p4k) as writer:
+        writer._write_entry(INI, METHOD_STORED, zlib.crc32(DATA) ^ 1, len(DATA), len(DATA), [DATA])
+    out = tmp_path / "global.ini"
+    out.write_bytes(b"previous")
+    with p4k_reader.P4kArchive(p4k) as archive:
+        with pytest.raises(p4k_reader.ChecksumError):
+            archive.extract(archive.find_entry(INI), out)
+    assert out.read_bytes() == b"previous"
+    assert leftovers(tmp_path) == []
+
+
+def test_size_mismatch_keeps_previous_output(tmp_path):
+    p4k = tmp_path / "Data.p4k"
+    with P4kWriter(p4k) as writer:
+        # Declares one byte more than the payload holds
+        writer._write_entry(INI, METHOD_STORED, zlib.crc32(DATA), len(DATA), len(DATA) + 1, [DATA])
+        writer.add("Data/next.txt", b"padding")
+    out = tmp_path / "global.ini"
+    out.write_bytes(b"previous")
+    with p4k_reader.P4kArchive(p4k) as archive:
+        with pytest.raises(p4k_reader.P4kError, match="Size mismatch"):
+            archive.extract(archive.find_entry(INI), out)
+    assert out.read_bytes() == b"previous"
+    assert leftovers(tmp_path) == []
+
+
+def test_cancel_keeps_previous_output(make_p4k, tmp_path):
+    p4k = make_p4k({INI: DATA})
+    out = tmp_path / "global.ini"
+    out.write_bytes(b"previous")
+    cancel = threading.Event()
+    cancel.set()
+    with p4k_reader.P4kArchive(p4k) as archive:
+        with pytest.raises(p4k_reader.ExtractionCancelled):
+            archive.extract(archive.find_entry(INI), out, cancel=cancel)
+    assert out.read_bytes() == b"previous"
+    assert leftovers(tmp_path) == []
+
+
+def test_atomic_output_removes_temp_file_on_error(tmp_path):
+    out = tmp_path / "result.bin"
+    with pytest.raises(RuntimeError):
+        with p4k_reader.atomic_output(out) as f:
+            f.write(b"partial")
+            raise RuntimeError("boom")
+    assert not out.exists()
+    assert leftovers(tmp_path) == []
+
+
+# The 4 GB hole is only free where seek-and-write makes a sparse file; NTFS writes it out in full
+@pytest.mark.skipif(sys.platform == "win32" and not os.environ.get("P4K_LARGE_TESTS"),
+                    reason="writes 4 GB on Windows - set P4K_LARGE_TESTS=1 to run")
+def test_zip64_offsets_past_4gb(tmp_path):
+    p4k = tmp_path / "Data.p4k"
+    with P4kWriter(p4k) as writer:
+        writer.add("Data/first.txt", b"first")
+        # A sparse hole pushes the next local header past the 32-bit limit
+        writer.file.seek(0x1_0000_0000 + 123)
+        writer.add(INI, DATA, METHOD_DEFLATE)
+    out = tmp_path / "global.ini"
+    with p4k_reader.P4kArchive(p4k) as archive:
+        assert archive.entry_count == 2
+        entry = archive.find_entry(INI)
+        assert entry.header_offset > 0xFFFFFFFF
+        archive.extract(entry, out)
+        assert [e.name for e in archive.iter_entries()] == ["Data/first.txt", INI]
+    assert out.read_bytes() == DATA
+
+
+def test_not_an_archive(tmp_path):
+    path = tmp_path / "Data.p4k"
+    path.write_bytes(b"not a zip at all" * 100)
+    with pytest.raises(p4k_reader.P4kError):
+        p4k_reader.P4kArchive(path)
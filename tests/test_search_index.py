@@ -0,0 +1,105 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+import search_index
+
+BOM = "﻿"
+
+
+def write(folder, name, lines):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_text(BOM + "".join(f"{line}\r\n" for line in lines), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = search_index.SearchIndex(tmp_path / search_index.INDEX_FILENAME)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def folders(tmp_path):
+    live = tmp_path / "live"
+    ptu = tmp_path / "ptu"
+    write(live, "StockGlobal-4-3-2-LIVE.ini", ["ship_name=Aurora", "shield_name=Shield", "live_only=Läuft"])
+    write(ptu, "StockGlobal-4-4-0-PTU.ini", ["ship_name=Aurora Mk II", "shield_name=Shield", "ptu_only=Test"])
+    write(ptu, "StockGlobal-4-4-0-PTU-german.ini", ["ship_name=Aurora Mk II", "shield_name=Schild"])
+    return live, ptu
+
+
+def test_parse_output_name():
+    assert search_index.parse_output_name("StockGlobal-4-4-0-PTU-german.ini") == ("4.4.0", "PTU", "german")
+    assert search_index.parse_output_name("StockGlobal-4-3-2-LIVE.ini") == ("4.3.2", "LIVE", "english")
+    assert search_index.parse_output_name("StockGlobal-4-4-0-PTU-vs-4-3-2-LIVE.diff.ini") is None
+
+
+@pytest.mark.parametrize("query, mode", [("Shield", "text"), ("shield_", "prefix"), ("*_name", "key")])
+def test_search_covers_only_the_given_folders(index, folders, query, mode):
+    live, ptu = folders
+    assert index.sync(live) == (1, 0)
+    assert index.sync(ptu) == (2, 0)
+
+    hits, more = index.search(query, mode, folders=[live])
+    assert hits and not more
+    assert all(info.branch == "LIVE" for hit in hits for info in hit.files)
+
+    hits, _ = index.search(query, mode, folders=[ptu])
+    assert hits and all(info.branch == "PTU" for hit in hits for info in hit.files)
+
+    hits, _ = index.search(query, mode, folders=[live, ptu])
+    assert {info.branch for hit in hits for info in hit.files} == {"LIVE", "PTU"}
+
+
+def test_search_modes(index, folders):
+    live, ptu = folders
+    index.sync(live)
+    index.sync(ptu)
+    hits, _ = index.search("Mk II", "text", folders=[ptu])
+    assert [(hit.key, hit.value, len(hit.files)) for hit in hits] == [("ship_name", "Aurora Mk II", 2)]
+    hits, _ = index.search("läuft", "text", folders=[live])
+    assert [hit.key for hit in hits] == ["live_only"]
+    hits, _ = index.search("PTU_", "prefix", folders=[ptu])
+    assert [hit.key for hit in hits] == ["ptu_only"]
+    hits, _ = index.search("s*_name", "key", folders=[ptu], languages=["german"])
+    assert sorted(hit.value for hit in hits) == ["Aurora Mk II", "Schild"]
+    hits, more = index.search("name", "key", folders=[ptu], limit=1)
+    assert len(hits) == 1 and more
+    with pytest.raises(ValueError):
+        index.search("x", "regex")
+
+
+def test_deleted_files_are_pruned(index, folders):
+    live, ptu = folders
+    index.sync(live)
+    index.sync(ptu)
+    (ptu / "StockGlobal-4-4-0-PTU.ini").unlink()
+    assert index.sync(ptu) == (0, 1)
+    assert index.search("ptu_only", "prefix", folders=[ptu]) == ([], False)
+    # Strings still used by the other folder survive the prune
+    hits, _ = index.search("Aurora", "text", folders=[live])
+    assert [hit.value for hit in hits] == ["Aurora"]
+    assert [info.language for info in index.files([ptu]).values()] == ["german"]
+
+
+def test_server_covers_only_its_folders(index, folders):
+    live, ptu = folders
+    index.sync(live)
+    server = search_index.SearchServer(index, [ptu], port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        def get(path):
+            with urllib.request.urlopen(server.url + path, timeout=10) as response:
+                return json.loads(response.read().decode("utf-8"))
+
+        assert sorted(item["branch"] for item in get("files")) == ["PTU", "PTU"]
+        result = get("search?q=Aurora")
+        assert {item["branch"] for hit in result["hits"] for item in hit["files"]} == {"PTU"}
+    finally:
+        server.shutdown()
+        server.server_close()
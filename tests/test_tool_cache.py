@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+import tool_cache
+
+
+@pytest.fixture
+def tools(tmp_path):
+    source = tmp_path / "bin"
+    (source / "x64").mkdir(parents=True)
+    (source / "unp4k.exe").write_bytes(b"MZ tool")
+    (source / "zstd.dll").write_bytes(b"dll")
+    (source / "x64" / "native.dll").write_bytes(b"native")
+    return source
+
+
+def count_hashes(monkeypatch):
+    calls = []
+    real = tool_cache._sha256
+    monkeypatch.setattr(tool_cache, "_sha256", lambda path: calls.append(path) or real(path))
+    return calls
+
+
+def test_stage_loose_tools(tools, tmp_path):
+    staged = tool_cache.ToolCache(tools, tmp_path / "cache").ensure()
+    assert (staged / "unp4k.exe").read_bytes() == b"MZ tool"
+    assert (staged / "x64" / "native.dll").read_bytes() == b"native"
+
+
+def test_stage_from_archive(tools, tmp_path):
+    bundle = tmp_path / "bundle"
+    bundle.mkdir()
+    tool_cache.pack_tools(tools, bundle / tool_cache.TOOLS_ARCHIVE)
+    staged = tool_cache.ToolCache(bundle, tmp_path / "cache").ensure()
+    assert (staged / "zstd.dll").read_bytes() == b"dll"
+
+
+def test_unchanged_files_are_not_rehashed(tools, tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    first = tool_cache.ToolCache(tools, root).ensure()
+    calls = count_hashes(monkeypatch)
+    assert tool_cache.ToolCache(tools, root).ensure() == first
+    assert calls == []
+
+    # A touched source is hashed again, the content is the same so the staged copy is kept
+    os.utime(tools / "zstd.dll", ns=(0, 0))
+    assert tool_cache.ToolCache(tools, root).ensure() == first
+    assert [path.name for path in calls] == ["zstd.dll"]
+
+
+def test_corrupt_staged_copy_is_restaged(tools, tmp_path):
+    root = tmp_path / "cache"
+    staged = tool_cache.ToolCache(tools, root).ensure()
+    (staged / "unp4k.exe").write_bytes(b"MZ tooX")
+    assert tool_cache.ToolCache(tools, root).ensure() == staged
+    assert (staged / "unp4k.exe").read_bytes() == b"MZ tool"
+
+
+def test_only_unused_versions_are_evicted(tools, tmp_path):
+    root = tmp_path / "cache"
+    old = tool_cache.ToolCache(tools, root).ensure()
+    stale = root / "0123456789abcdef"
+    stale.mkdir()
+    (stale / tool_cache.MANIFEST_NAME).write_text("{}")
+    past = time.time() - tool_cache.EVICT_AFTER - 60
+    os.utime(stale / tool_cache.MANIFEST_NAME, (past, past))
+
+    # A new tool version arrives while the old folder is still in use
+    (tools / "unp4k.exe").write_bytes(b"MZ tool v2")
+    new = tool_cache.ToolCache(tools, root).ensure()
+    assert new != old
+    assert (old / "unp4k.exe").is_file()
+    assert not stale.exists()
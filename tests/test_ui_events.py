@@ -0,0 +1,73 @@
+import pytest
+
+import ui_events
+
+
+def test_keyed_posts_coalesce_in_place():
+    queue = ui_events.UiEventQueue()
+    ran = []
+    queue.post(lambda: ran.append("progress 1"), key="progress")
+    queue.post(lambda: ran.append("done"))
+    queue.post(lambda: ran.append("progress 2"), key="progress")
+    assert queue.drain() == 2
+    assert ran == ["progress 2", "done"]
+    assert queue.drain() == 0
+
+
+def test_wake_only_when_idle():
+    wakes = []
+    queue = ui_events.UiEventQueue(wake=lambda: wakes.append(1))
+    queue.post(lambda: None, key="status")
+    queue.post(lambda: None, key="status")
+    queue.post(lambda: None)
+    assert len(wakes) == 1
+
+    # Posts made while draining arm the next drain
+    queue.post(lambda: queue.post(lambda: None))
+    queue.drain()
+    assert len(wakes) == 2
+    queue.drain()
+    queue.drain()
+    assert len(wakes) == 2
+
+
+def test_errors_go_to_handler():
+    queue = ui_events.UiEventQueue()
+    errors, ran = [], []
+    queue.post(lambda: 1 / 0)
+    queue.post(lambda: ran.append(True))
+    queue.drain(lambda exc_type, exc, tb: errors.append(exc_type))
+    assert errors == [ZeroDivisionError] and ran == [True]
+
+
+def test_failed_wake_is_retried_on_next_post():
+    results = [False, True]
+    wakes = []
+
+    def wake():
+        wakes.append(1)
+        return results.pop(0)
+
+    queue = ui_events.UiEventQueue(wake=wake)
+    queue.post(lambda: None)
+    queue.post(lambda: None)
+    assert len(wakes) == 2
+    queue.post(lambda: None)
+    assert len(wakes) == 2
+    assert queue.drain() == 3
+
+
+def test_raising_wake_is_retried_on_next_post():
+    wakes = []
+
+    def wake():
+        wakes.append(1)
+        if len(wakes) == 1:
+            raise RuntimeError("main thread is not in main loop")
+
+    queue = ui_events.UiEventQueue(wake=wake)
+    with pytest.raises(RuntimeError):
+        queue.post(lambda: None)
+    queue.post(lambda: None)
+    queue.post(lambda: None)
+    assert len(wakes) == 2
@@ -0,0 +1,259 @@
+"""
+Tool Cache
+Persistent, content-hash-verified staging of the bundled unp4k tools
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from contextlib import nullcontext
+from pathlib import Path
+
+
+APP_DIRNAME = "SC-GlobalIni-Extractor"
+MANIFEST_NAME = ".tool_manifest.json"
+# [size, mtime_ns] of each staged file as written; a file that still matches needs no re-hash
+STAT_NAME = ".tool_stat.json"
+# Digests of loose source files, keyed by folder, trusted while size and mtime are unchanged
+SOURCES_NAME = "sources.json"
+# Folders of other tool versions are removed only once no process has used them for this long;
+# every ensure() touches the folder it hands out, so a still-running older instance keeps its copy
+EVICT_AFTER = 24 * 3600
+# Release builds bundle the tools as this one stored archive instead of loose files, so the
+# onefile bootstrap unpacks a single file per launch and the tools only come out on first use
+TOOLS_ARCHIVE = "unp4k_tools.zip"
+TOOL_PATTERNS = ["unp4k.exe", "*.dll", "x64", "x86"]
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def default_tools_root():
+    """Per-user folder that survives between runs (PyInstaller's _MEIPASS does not)"""
+    base = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    return Path(base) / APP_DIRNAME / "tools"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return f"crc32:{crc:08x}"
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _save_json(path, data):
+    """Best-effort atomic write - another process may be writing the same file"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _digest_like(path, digest):
+    """Hash path the same way digest was made (zip CRC32 for archived tools, else SHA-256)"""
+    return _crc32(path) if digest.startswith("crc32:") else _sha256(path)
+
+
+def pack_tools(source_dir, archive_path):
+    """Bundle the loose unp4k files in source_dir into TOOLS_ARCHIVE (run by the PyInstaller spec)"""
+    source_dir = Path(source_dir)
+    files = []
+    for pattern in TOOL_PATTERNS:
+        for path in sorted(source_dir.glob(pattern)):
+            files.extend(sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path])
+    if not any(path.name == "unp4k.exe" for path in files):
+        raise FileNotFoundError(f"unp4k.exe not found in {source_dir}")
+    # Stored, not deflated: PyInstaller compresses its bundle already
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_STORED) as zf:
+        for path in files:
+            zf.write(path, path.relative_to(source_dir).as_posix())
+    return Path(archive_path)
+
+
+class ToolCache:
+    """Stages unp4k.exe, its DLLs and x64/x86 folders once per tool version
+
+    The staged folder is named after a hash of the bundled files. Files whose
+    size and mtime still match what was recorded are trusted as they are; only
+    a mismatch costs a content hash (and a re-stage if the content differs).
+    """
+
+    def __init__(self, resource_dir, root=None):
+        self.resource_dir = Path(resource_dir)
+        self.root = Path(root) if root else default_tools_root()
+        self._lock = threading.Lock()
+        self._staged = None
+
+    def _source_files(self):
+        """Return the bundled tool files relative to resource_dir"""
+        files = []
+        if (self.resource_dir / "unp4k.exe").is_file():
+            files.append(Path("unp4k.exe"))
+        files.extend(Path(dll.name) for dll in self.resource_dir.glob("*.dll"))
+        for arch in ["x64", "x86"]:
+            src = self.resource_dir / arch
+            if src.is_dir():
+                files.extend(p.relative_to(self.resource_dir) for p in src.rglob("*") if p.is_file())
+        return sorted(files)
+
+    def _source_manifest(self):
+        archive = self.resource_dir / TOOLS_ARCHIVE
+        if archive.is_file():
+            # The zip directory already holds every size and CRC - nothing to hash up front
+            with zipfile.ZipFile(archive) as zf:
+                return {
+                    info.filename: [info.file_size, f"crc32:{info.CRC:08x}"]
+                    for info in zf.infolist() if not info.is_dir()
+                }
+
+        # Loose files (running from source): hash only the ones whose size or mtime changed
+        sources_path = self.root / SOURCES_NAME
+        sources = _load_json(sources_path, {})
+        known = sources.get(str(self.resource_dir), {})
+        manifest = {}
+        seen = {}
+        for path in self._source_files():
+            rel = path.as_posix()
+            stat = _stat(self.resource_dir / path)
+            cached = known.get(rel)
+            digest = cached[2] if cached and cached[:2] == stat else _sha256(self.resource_dir / path)
+            manifest[rel] = [stat[0], digest]
+            seen[rel] = stat + [digest]
+        if seen != known:
+            sources[str(self.resource_dir)] = seen
+            self.root.mkdir(parents=True, exist_ok=True)
+            _save_json(sources_path, sources)
+        return manifest
+
+    @staticmethod
+    def _matches(staged_dir, manifest):
+        """Check a staged folder against the manifest: stat first, content hash only on a stat mismatch"""
+        recorded = _load_json(staged_dir / STAT_NAME, {})
+        rehashed = False
+        for rel, (size, digest) in manifest.items():
+            path = staged_dir / rel
+            try:
+                stat = _stat(path)
+            except OSError:
+                return False
+            if stat[0] != size:
+                return False
+            if recorded.get(rel) != stat:
+                if _digest_like(path, digest) != digest:
+                    return False
+                recorded[rel] = stat
+                rehashed = True
+        if rehashed:
+            # Content was fine (e.g. only touched by a virus scanner) - don't hash it again next run
+            _save_json(staged_dir / STAT_NAME, recorded)
+        return True
+
+    @staticmethod
+    def _touch(staged_dir):
+        """Mark a staged folder as in use, so other versions' eviction passes leave it alone"""
+        try:
+            os.utime(staged_dir / MANIFEST_NAME)
+        except OSError:
+            pass
+
+    def ensure(self):
+        """Return the folder holding a verified copy of unp4k.exe, staging it if needed"""
+        with self._lock:
+            if self._staged is not None and (self._staged / "unp4k.exe").is_file():
+                self._touch(self._staged)
+                return self._staged
+
+            manifest = self._source_manifest()
+            if "unp4k.exe" not in manifest:
+                raise FileNotFoundError(f"unp4k.exe not found in {self.resource_dir}")
+            key = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:16]
+            staged_dir = self.root / key
+
+            if not self._matches(staged_dir, manifest):
+                self._stage(staged_dir, manifest)
+            self._touch(staged_dir)
+            self._evict_other_versions(key)
+            self._staged = staged_dir
+            return staged_dir
+
+    def _stage(self, staged_dir, manifest):
+        """Copy the tools into place via a private folder and an atomic rename"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix="staging-", dir=self.root))
+        try:
+            archive = self.resource_dir / TOOLS_ARCHIVE
+            with zipfile.ZipFile(archive) if archive.is_file() else nullcontext() as zf:
+                for rel in manifest:
+                    dst = work_dir / rel
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    if zf is None:
+                        shutil.copy2(self.resource_dir / rel, dst)
+                    else:
+                        with zf.open(rel) as src, open(dst, "wb") as out:
+                            shutil.copyfileobj(src, out, _CHUNK_SIZE)
+            with open(work_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            with open(work_dir / STAT_NAME, "w", encoding="utf-8") as f:
+                json.dump({rel: _stat(work_dir / rel) for rel in manifest}, f, indent=2)
+
+            if staged_dir.exists():
+                # Corrupt or partial copy from an older run
+                shutil.rmtree(staged_dir, ignore_errors=True)
+            try:
+                os.replace(work_dir, staged_dir)
+            except OSError:
+                # Another process staged the same version first - use theirs if it is good
+                if not self._matches(staged_dir, manifest):
+                    raise
+        finally:
+            if work_dir.exists():
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _evict_other_versions(self, key):
+        """Remove tool folders of other app versions that nothing has used for EVICT_AFTER (best effort)"""
+        now = time.time()
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name == key or path.name.startswith("staging-"):
+                continue
+            try:
+                last_used = (path / MANIFEST_NAME).stat().st_mtime
+            except OSError:
+                try:
+                    last_used = path.stat().st_mtime
+                except OSError:
+                    continue
+            if now - last_used > EVICT_AFTER:
+                shutil.rmtree(path, ignore_errors=True)
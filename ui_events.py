@@ -0,0 +1,65 @@
+"""
+UI Event Queue
+Thread-safe hand-off of UI updates from worker threads, drained by the Tk main loop at most once per frame
+"""
+
+import sys
+import threading
+
+
+# 30 frames per second: smooth progress bars without flooding Tk with redraws
+FRAME_MS = 33
+
+
+class UiEventQueue:
+    """Callbacks posted from any thread and run in posting order by drain() on the UI thread
+
+    A callback posted with a key replaces one still pending under the same key,
+    keeping its place in line - a burst of progress or status updates from a
+    worker costs one widget update per frame instead of one per chunk. Callbacks
+    posted without a key (completions, errors) always run.
+
+    wake() is called (from the posting thread) when a post finds no drain
+    scheduled yet, so the UI thread only wakes up when there is work; the
+    drain re-arms it, so a burst of posts schedules a single drain. A wake
+    that returns False (or raises) scheduled nothing, so the next post tries again.
+    """
+
+    def __init__(self, wake=None):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wake = wake
+        self._scheduled = False
+
+    def post(self, callback, key=None):
+        with self._lock:
+            self._pending[object() if key is None else key] = callback
+            wake = self._wake if not self._scheduled else None
+            self._scheduled = True
+        if wake is None:
+            return
+        scheduled = False
+        try:
+            scheduled = wake() is not False
+        finally:
+            if not scheduled:
+                with self._lock:
+                    self._scheduled = False
+
+    def drain(self, on_error=None):
+        """Run everything posted so far; callbacks posted meanwhile wait for the next frame
+
+        on_error(exc_type, exc, traceback) is given any exception so the rest still
+        run (pass Tk's report_callback_exception); without it the first one propagates.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+        for callback in pending.values():
+            try:
+                callback()
+            except Exception:
+                if on_error is None:
+                    raise
+                on_error(*sys.exc_info())
+        return len(pending)
@@ -0,0 +1,161 @@
+"""
+Extracted Version Cache
+Content-addressed store of compressed global.ini copies with LRU eviction
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import p4k_index
+import p4k_reader
+
+
+CACHE_DIRNAME = "global_ini_cache"
+DEFAULT_LIMIT_BYTES = 512 * 1024 * 1024
+
+_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    branch TEXT NOT NULL,
+    version TEXT NOT NULL,
+    p4k_path TEXT NOT NULL,
+    p4k_size INTEGER NOT NULL,
+    p4k_mtime_ns INTEGER NOT NULL,
+    crc INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (branch, version, p4k_path, p4k_size, p4k_mtime_ns, crc)
+);
+"""
+
+
+class VersionCache:
+    """Compressed global.ini copies keyed by (branch, version, archive fingerprint, entry CRC)
+
+    Identical files (e.g. LIVE and PTU on the same build) share one blob.
+    """
+
+    def __init__(self, cache_dir, limit_bytes=DEFAULT_LIMIT_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.limit_bytes = limit_bytes
+
+    @contextmanager
+    def _connect(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.cache_dir / "cache.db"))
+        try:
+            conn.executescript(_SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _blob_path(self, digest):
+        return self.cache_dir / digest[:2] / f"{digest}.ini.gz"
+
+    def lookup(self, branch, version, p4k_path):
+        """Return the cached record for an installation's current archive, or None
+
+        Only stats Data.p4k - the archive itself is never opened.
+        """
+        try:
+            path, size, mtime_ns = p4k_index.fingerprint(p4k_path)
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT v.crc, v.digest, b.size FROM versions v JOIN blobs b ON b.digest = v.digest "
+                    "WHERE v.branch = ? AND v.version = ? AND v.p4k_path = ? "
+                    "AND v.p4k_size = ? AND v.p4k_mtime_ns = ?",
+                    (branch, version, path, size, mtime_ns)
+                ).fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+        if row is None or not self._blob_path(row[1]).exists():
+            return None
+        return {"crc": row[0], "digest": row[1], "size": row[2]}
+
+    def restore(self, record, output_file, on_chunk=None):
+        """Decompress a cached copy to output_file, checking it against its SHA-256 before it lands
+
+        on_chunk(chunk) sees every decompressed chunk before it is written.
+        """
+        digest = hashlib.sha256()
+        with gzip.open(self._blob_path(record["digest"]), "rb") as src, p4k_reader.atomic_output(output_file) as dst:
+            for chunk in iter(lambda: src.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                dst.write(chunk)
+            if digest.hexdigest() != record["digest"]:
+                raise ValueError(f"Cached copy {record['digest'][:12]} is damaged")
+        with self._connect() as conn:
+            conn.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), record["digest"]))
+
+    def store(self, branch, version, p4k_path, crc, source_file):
+        """Add an extracted file to the cache, evicting least recently used copies over the limit"""
+        path, size, mtime_ns = p4k_index.fingerprint(p4k_path)
+
+        # Hash while compressing so the file is only read once
+        digest = hashlib.sha256()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / f"incoming-{os.getpid()}-{time.monotonic_ns()}.gz"
+        original_size = 0
+        try:
+            with open(source_file, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+                while True:
+                    chunk = src.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    dst.write(chunk)
+                    original_size += len(chunk)
+
+            digest = digest.hexdigest()
+            blob_path = self._blob_path(digest)
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            if not blob_path.exists():
+                os.replace(tmp_path, blob_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, stored_size, last_used) VALUES (?, ?, ?, ?)",
+                (digest, original_size, blob_path.stat().st_size, time.time())
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (branch, version, path, size, mtime_ns, crc, digest)
+            )
+            self._evict(conn, keep=digest)
+        return digest
+
+    def _evict(self, conn, keep=None):
+        """Drop least recently used blobs until the store fits within limit_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+        if total <= self.limit_bytes:
+            return
+        for digest, stored_size in conn.execute(
+                "SELECT digest, stored_size FROM blobs ORDER BY last_used").fetchall():
+            if total <= self.limit_bytes:
+                break
+            if digest == keep:
+                continue
+            conn.execute("DELETE FROM versions WHERE digest = ?", (digest,))
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            try:
+                self._blob_path(digest).unlink()
+            except OSError:
+                pass
+            total -= stored_size